@@ -0,0 +1,290 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import itertools
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stage durations assumed before any job has completed (seconds)
+DEFAULT_STAGE_SECONDS = {'scrape': 20.0, 'generate': 60.0, 'snapshot': 15.0}
+
+# Priority classes, most urgent first
+PRIORITIES = ('interactive', 'bulk')
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Client weights from "client=weight,client=weight" (client ids as shown in the admission stats)"""
+    weights = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        client, _, weight = entry.rpartition('=')
+        weights[client.strip()] = float(weight)
+    return weights
+
+
+class Overloaded(Exception):
+    """The service is over capacity; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class QueuedJob:
+    job_id: str
+    client: str
+    priority: str
+    mode: str
+    # Virtual start tag: the client's share of service received before this job
+    start: float
+    seq: int
+    # When it got a run slot (monotonic seconds)
+    started_at: Optional[float] = None
+
+    def order(self) -> Tuple[int, float, int]:
+        return (PRIORITIES.index(self.priority), self.start, self.seq)
+
+
+class AdmissionController:
+    """Admission, fair-share queueing and ETAs for clone jobs.
+
+    At most `max_running` jobs run at once. Waiting jobs are ordered by
+    priority class, then by start-time fair queuing across clients: each
+    job is tagged with how much weighted service its client has already
+    been given, so a client with a long backlog takes turns with everyone
+    else instead of holding the queue. No client runs more than
+    `client_max_running` jobs at once, and `interactive_reserve` slots are
+    kept free of bulk work so interactive jobs start promptly.
+
+    Throughput is estimated from the browser pool's slots over the recent
+    median scrape time and the LLM schedulers' current concurrency limits
+    over the recent median generation time, whichever is lower. A new job is
+    refused when the queue is full or when, at that rate, it would wait
+    longer than `max_wait` to start.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        browser_slots: int,
+        llm_slots: Callable[[], float],
+        max_running: int = 8,
+        max_queue: int = 100,
+        max_wait: float = 300.0,
+        client_max_running: Optional[int] = None,
+        client_max_queue: Optional[int] = None,
+        interactive_reserve: Optional[int] = None,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        self.pipeline = pipeline
+        self.browser_slots = browser_slots
+        self.llm_slots = llm_slots
+        self.max_running = max_running
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.client_max_running = client_max_running or max(1, max_running // 2)
+        self.client_max_queue = client_max_queue or max(1, max_queue // 4)
+        self.interactive_reserve = min(max_running - 1, 1 if interactive_reserve is None else interactive_reserve)
+        self.weights = weights or {}
+        self.queue: Dict[str, QueuedJob] = {}
+        self.running: Dict[str, QueuedJob] = {}
+        self.client_queued: Counter = Counter()
+        self.client_running: Counter = Counter()
+        # Start tag of the last job dispatched, and each client's next start tag
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._changed = asyncio.Condition()
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, pipeline, browser_slots: int, llm_slots: Callable[[], float]) -> Optional["AdmissionController"]:
+        """Build the controller from environment settings, or None to admit and start every job immediately"""
+        if os.getenv("ADMISSION_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            pipeline,
+            browser_slots,
+            llm_slots,
+            max_running=int(os.getenv("ADMISSION_MAX_RUNNING", str(browser_slots * 2))),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "100")),
+            max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "300")),
+            client_max_running=int(os.getenv("ADMISSION_CLIENT_MAX_RUNNING", "0")) or None,
+            client_max_queue=int(os.getenv("ADMISSION_CLIENT_MAX_QUEUE", "0")) or None,
+            interactive_reserve=int(os.getenv("ADMISSION_INTERACTIVE_RESERVE", "1")),
+            weights=parse_weights(os.getenv("ADMISSION_CLIENT_WEIGHTS", "")),
+        )
+
+    def weight(self, client: str) -> float:
+        return max(0.01, self.weights.get(client, 1.0))
+
+    def check(self, jobs: int = 1, mode: str = "llm", client: Optional[str] = None):
+        """Raise Overloaded unless `jobs` more jobs can be queued within the global and per-client limits"""
+        if client is not None:
+            excess = self.client_queued[client] + jobs - self.client_max_queue
+            if excess > 0:
+                self.rejected += 1
+                client_rate = self.client_max_running / self.service_time(mode)
+                raise Overloaded(
+                    f"Too many queued jobs for this client: {self.client_queued[client]} queued",
+                    max(1, min(int(self.max_wait), math.ceil(excess / client_rate)))
+                )
+        free = self.max_running - len(self.running)
+        allowed = min(self.max_queue, free + math.floor(self.max_wait * self.throughput(mode)))
+        excess = len(self.queue) + jobs - allowed
+        if excess > 0:
+            self.rejected += 1
+            retry_after = max(1, min(int(self.max_wait), math.ceil(excess / self.throughput(mode))))
+            raise Overloaded(
+                f"Over capacity: {len(self.queue)} jobs queued, {len(self.running)} running",
+                retry_after
+            )
+
+    def enqueue(self, job_id: str, client: str = "anonymous", priority: str = "interactive", mode: str = "llm"):
+        """Queue a job behind the client's earlier work; it starts once slot() lets it through"""
+        # A job costs its expected service time, scaled down by the client's weight
+        start = max(self.virtual_time, self.finish_tags.get(client, 0.0))
+        self.finish_tags[client] = start + self.service_time(mode) / self.weight(client)
+        self.queue[job_id] = QueuedJob(job_id, client, priority, mode, start, next(self._seq))
+        self.client_queued[client] += 1
+
+    @asynccontextmanager
+    async def slot(self, job_id: str):
+        """Wait for the job's turn and a free run slot, holding it for the block"""
+        if job_id not in self.queue:
+            self.enqueue(job_id)
+        job = self.queue[job_id]
+        try:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._next() is job)
+                self._dequeue(job)
+                job.started_at = time.monotonic()
+                self.running[job_id] = job
+                self.client_running[job.client] += 1
+                self.virtual_time = max(self.virtual_time, job.start)
+                self._prune_finish_tags()
+                # The next job may be able to start too
+                self._changed.notify_all()
+        except BaseException:
+            # Cancelled while waiting
+            if self.queue.get(job_id) is job:
+                self._dequeue(job)
+            await self._notify()
+            raise
+        try:
+            yield
+        finally:
+            del self.running[job_id]
+            self.client_running[job.client] -= 1
+            self._forget_idle(job.client)
+            await self._notify()
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place in the dispatch order, or None once the job has started (or was never queued)"""
+        job = self.queue.get(job_id)
+        if job is None:
+            return None
+        return 1 + sum(other.order() < job.order() for other in self.queue.values())
+
+    def started_at(self, job_id: str) -> Optional[float]:
+        """When a running job got its slot (monotonic seconds), or None if it isn't running"""
+        job = self.running.get(job_id)
+        return job.started_at if job else None
+
+    def estimate(self, position: Optional[int], mode: str = "llm", started_at: Optional[float] = None) -> Dict[str, Any]:
+        """Queue position with the estimated seconds until the job starts and until it completes.
+
+        For a running job (no position) the ETA is the typical service time less
+        the time since `started_at`, bottoming out at 0 once it runs long.
+        """
+        service = self.service_time(mode)
+        if position is None:
+            elapsed = time.monotonic() - started_at if started_at is not None else 0.0
+            return {'queue_position': None, 'estimated_start_seconds': 0, 'eta_seconds': round(max(0.0, service - elapsed), 1)}
+        free = max(0, self.max_running - len(self.running))
+        start = max(0, position - free) / self.throughput(mode)
+        return {
+            'queue_position': position,
+            'estimated_start_seconds': round(start, 1),
+            'eta_seconds': round(start + service, 1),
+        }
+
+    def service_time(self, mode: str = "llm") -> float:
+        """Typical seconds one job takes once started"""
+        if mode == "snapshot":
+            return self._stage('snapshot')
+        return self._stage('scrape') + self._stage('generate')
+
+    def throughput(self, mode: str = "llm") -> float:
+        """Jobs per second the service can currently complete"""
+        by_running = self.max_running / self.service_time(mode)
+        if mode == "snapshot":
+            return min(by_running, self.browser_slots / self._stage('snapshot'))
+        by_browser = self.browser_slots / self._stage('scrape')
+        by_llm = max(1.0, self.llm_slots()) / self._stage('generate')
+        return min(by_running, by_browser, by_llm)
+
+    def stats(self) -> Dict[str, Any]:
+        clients = set(self.client_queued) | set(self.client_running)
+        return {
+            'queued': len(self.queue),
+            'running': len(self.running),
+            'queued_by_priority': {
+                priority: sum(job.priority == priority for job in self.queue.values()) for priority in PRIORITIES
+            },
+            'max_running': self.max_running,
+            'max_queue': self.max_queue,
+            'client_max_running': self.client_max_running,
+            'client_max_queue': self.client_max_queue,
+            'interactive_reserve': self.interactive_reserve,
+            'clients': {
+                client: {
+                    'queued': self.client_queued[client],
+                    'running': self.client_running[client],
+                    'weight': self.weight(client),
+                }
+                for client in sorted(clients)
+            },
+            'rejected': self.rejected,
+            'throughput_per_min': round(self.throughput() * 60, 2),
+            'service_seconds': round(self.service_time(), 1),
+        }
+
+    def _can_start(self, job: QueuedJob) -> bool:
+        limit = self.max_running if job.priority == 'interactive' else self.max_running - self.interactive_reserve
+        return len(self.running) < limit and self.client_running[job.client] < self.client_max_running
+
+    def _next(self) -> Optional[QueuedJob]:
+        """The queued job to start next: most urgent class, then lowest start tag, among those allowed to start"""
+        startable = [job for job in self.queue.values() if self._can_start(job)]
+        return min(startable, key=QueuedJob.order) if startable else None
+
+    def _dequeue(self, job: QueuedJob):
+        del self.queue[job.job_id]
+        self.client_queued[job.client] -= 1
+        self._forget_idle(job.client)
+
+    def _forget_idle(self, client: str):
+        if self.client_queued[client] <= 0 and self.client_running[client] <= 0:
+            del self.client_queued[client]
+            del self.client_running[client]
+
+    def _prune_finish_tags(self):
+        """Drop idle clients whose finish tag virtual time has caught up with; their next job starts at it anyway"""
+        for client in [client for client, tag in self.finish_tags.items() if tag <= self.virtual_time]:
+            if client not in self.client_queued and client not in self.client_running:
+                del self.finish_tags[client]
+
+    def _stage(self, stage: str) -> float:
+        latency = self.pipeline.latency(stage)
+        return max(0.1, latency if latency is not None else DEFAULT_STAGE_SECONDS[stage])
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
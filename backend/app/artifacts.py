@@ -0,0 +1,385 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import asyncio
+import hashlib
+import itertools
+import logging
+import mimetypes
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from .http_cache import precompress, MIN_COMPRESS_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Fixed timestamp for every archive member so the same files always produce the same bytes
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Already-compressed formats are stored; deflating them again only costs CPU
+STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.woff', '.woff2', '.ico', '.mp4', '.webm', '.zip', '.gz', '.br'}
+
+# Text formats that get precompressed variants for preview hosting
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json', '.txt', '.xml'}
+
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """Non-seekable file object that collects what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def iter_zip(files: List[Tuple[str, Path]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a ZIP of (archive name, path) pairs chunk by chunk, never holding more than a chunk.
+
+    Writing to a non-seekable sink makes zipfile emit data descriptors instead
+    of seeking back to patch headers, and the fixed member timestamps make the
+    output byte-for-byte reproducible, which is what lets ranges be resumed.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for arcname, path in files:
+            info = zipfile.ZipInfo(arcname, date_time=ZIP_EPOCH)
+            info.external_attr = 0o644 << 16
+            info.compress_type = zipfile.ZIP_STORED if path.suffix.lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            with open(path, 'rb') as source, archive.open(info, 'w', force_zip64=path.stat().st_size > 0x7FFFFFFF) as dest:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+def slice_chunks(chunks: Iterator[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Pass through only bytes start..end (inclusive) of a chunk stream"""
+    position = 0
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - position):end + 1 - position]
+        position = chunk_end
+        if position > end:
+            return
+
+
+class ArtifactStore:
+    """On-disk files for each finished clone: index.html, styles.css, script.js and assets/.
+
+    Assets referenced by the generated HTML and CSS are downloaded once at
+    completion and stored under content-hashed names, with the references
+    rewritten to the local copies. Text files also get gzip (and, with the
+    optional brotli package, br) variants written next to them. A manifest of
+    file hashes gives every file and every clone export a strong ETag.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        download_assets: bool = True,
+        max_assets: int = 100,
+        max_asset_bytes: int = 5 * 1024 * 1024,
+        download_concurrency: int = 8,
+    ):
+        self.directory = Path(directory)
+        self.download_assets = download_assets
+        self.max_assets = max_assets
+        self.max_asset_bytes = max_asset_bytes
+        self.download_concurrency = download_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+        self._archive_sizes: Dict[Tuple[str, str], int] = {}
+        # Writes are numbered when they start; one that finishes after a newer one was published is dropped
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._sequence = itertools.count(1)
+        self._started: Dict[str, int] = {}
+        self._published: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["ArtifactStore"]:
+        """Build the store from environment settings, or None when disabled"""
+        if os.getenv("ARTIFACTS_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            os.getenv("ARTIFACTS_DIR", ".cache/artifacts"),
+            download_assets=os.getenv("ARTIFACT_DOWNLOAD_ASSETS", "true").lower() == "true",
+            max_assets=int(os.getenv("ARTIFACT_MAX_ASSETS", "100")),
+            max_asset_bytes=int(float(os.getenv("ARTIFACT_MAX_ASSET_MB", "5")) * 1024 * 1024),
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def path(self, clone_id: str) -> Path:
+        return self.directory / clone_id
+
+    async def write(self, clone_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Write (or replace) a clone's files and return its manifest.
+
+        Staging runs concurrently, but publishing is serialized per clone and a
+        write that finishes after a newer one has been published is discarded,
+        so the files on disk always belong to the latest result handed in.
+        """
+        sequence = self._started[clone_id] = next(self._sequence)
+        base_url = (result.get('metadata') or {}).get('original_url') or ''
+        html = result.get('html') or ''
+        css = result.get('css') or ''
+        javascript = result.get('javascript') or ''
+
+        staging = self.directory / f".{clone_id}.{uuid.uuid4().hex}"
+        (staging / 'assets').mkdir(parents=True, exist_ok=True)
+        try:
+            assets: Dict[str, str] = {}
+            if self.download_assets:
+                assets = await self._download_assets(staging / 'assets', base_url, html, css)
+            manifest = await asyncio.to_thread(self._write_files, staging, clone_id, base_url, html, css, javascript, assets)
+            async with self._locks.setdefault(clone_id, asyncio.Lock()):
+                if clone_id not in self._started or sequence < self._published.get(clone_id, 0):
+                    # Superseded by a newer write, or the clone was removed meanwhile
+                    logger.info(f"Discarding stale artifacts for clone {clone_id}")
+                    shutil.rmtree(staging, ignore_errors=True)
+                    return self._manifests.get(clone_id, manifest)
+                await asyncio.to_thread(self._publish, staging, self.path(clone_id))
+                self._published[clone_id] = sequence
+                self._manifests[clone_id] = manifest
+            logger.info(f"Wrote artifacts for clone {clone_id} ({len(manifest['files'])} files, {len(assets)} assets)")
+            return manifest
+        except BaseException:
+            # Also on cancellation, so an aborted job leaves no staging directory behind
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    async def manifest(self, clone_id: str) -> Optional[Dict[str, Any]]:
+        """A clone's manifest, or None if it has no artifacts"""
+        if clone_id in self._manifests:
+            return self._manifests[clone_id]
+        try:
+            text = await asyncio.to_thread((self.path(clone_id) / 'manifest.json').read_text, encoding='utf-8')
+            manifest = json.loads(text)
+        except (OSError, ValueError):
+            return None
+        self._manifests[clone_id] = manifest
+        return manifest
+
+    def files(self, clone_id: str, manifest: Dict[str, Any]) -> List[Tuple[str, Path]]:
+        """(archive name, path) for every file, in a stable order"""
+        root = self.path(clone_id)
+        return [(name, root / name) for name in sorted(manifest['files'])]
+
+    async def archive_size(self, clone_id: str, manifest: Dict[str, Any]) -> int:
+        """Length of the ZIP export, computed once per version with a counting dry run"""
+        key = (clone_id, manifest['etag'])
+        if key not in self._archive_sizes:
+            files = self.files(clone_id, manifest)
+            self._archive_sizes[key] = await asyncio.to_thread(lambda: sum(len(c) for c in iter_zip(files)))
+        return self._archive_sizes[key]
+
+    async def remove(self, clone_id: str):
+        async with self._locks.setdefault(clone_id, asyncio.Lock()):
+            # Forgetting the counters also makes any write still in flight discard itself
+            self._started.pop(clone_id, None)
+            self._published.pop(clone_id, None)
+            self._manifests.pop(clone_id, None)
+            for key in [k for k in self._archive_sizes if k[0] == clone_id]:
+                del self._archive_sizes[key]
+            await asyncio.to_thread(shutil.rmtree, self.path(clone_id), True)
+        self._locks.pop(clone_id, None)
+
+    def _write_files(
+        self,
+        staging: Path,
+        clone_id: str,
+        base_url: str,
+        html: str,
+        css: str,
+        javascript: str,
+        assets: Dict[str, str]
+    ) -> Dict[str, Any]:
+        css = self._rewrite_css(css, base_url, assets)
+        html = self._build_index(html, base_url, assets, has_css=bool(css), has_js=bool(javascript))
+
+        (staging / 'index.html').write_text(html, encoding='utf-8')
+        if css:
+            (staging / 'styles.css').write_text(css, encoding='utf-8')
+        if javascript:
+            (staging / 'script.js').write_text(javascript, encoding='utf-8')
+
+        files = {}
+        for path in sorted(staging.rglob('*')):
+            if path.is_file():
+                files[path.relative_to(staging).as_posix()] = hashlib.sha256(path.read_bytes()).hexdigest()
+        etag = hashlib.sha256(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+        manifest = {
+            'clone_id': clone_id,
+            'etag': f'"{etag}"',
+            'files': files,
+            'variants': self._write_variants(staging, files),
+        }
+        (staging / 'manifest.json').write_text(json.dumps(manifest), encoding='utf-8')
+        return manifest
+
+    def _write_variants(self, staging: Path, files: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+        """Precompress text files once so previews never compress per request"""
+        variants: Dict[str, Dict[str, str]] = {}
+        for name in files:
+            path = staging / name
+            if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            data = path.read_bytes()
+            if len(data) < MIN_COMPRESS_BYTES:
+                continue
+            for encoding, compressed in precompress(data, gzip_level=9, brotli_quality=11).items():
+                suffix = '.br' if encoding == 'br' else '.gz'
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                variants.setdefault(name, {})[encoding] = name + suffix
+        return variants
+
+    def _publish(self, staging: Path, target: Path):
+        """Swap the staged directory in; readers holding open files keep the old version"""
+        if target.exists():
+            retired = target.with_name(f".{target.name}.old.{uuid.uuid4().hex}")
+            target.rename(retired)
+            staging.rename(target)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            staging.rename(target)
+
+    def _build_index(self, html: str, base_url: str, assets: Dict[str, str], has_css: bool, has_js: bool) -> str:
+        soup = BeautifulSoup(html, 'html.parser')
+        for element in soup.find_all(True):
+            for attr in ('src', 'poster'):
+                if element.get(attr):
+                    element[attr] = assets.get(self._resolve(element[attr], base_url), element[attr])
+            if element.name == 'link' and element.get('href'):
+                element['href'] = assets.get(self._resolve(element['href'], base_url), element['href'])
+            if element.get('srcset'):
+                candidates = []
+                for candidate in element['srcset'].split(','):
+                    url, _, descriptor = candidate.strip().partition(' ')
+                    local = assets.get(self._resolve(url, base_url), url)
+                    candidates.append(f"{local} {descriptor}".strip())
+                element['srcset'] = ', '.join(candidates)
+            if element.get('style'):
+                element['style'] = self._rewrite_css(element['style'], base_url, assets)
+
+        head = soup.head or soup
+        if has_css:
+            head.append(soup.new_tag('link', rel='stylesheet', href='styles.css'))
+        if has_js:
+            (soup.body or soup).append(soup.new_tag('script', src='script.js'))
+        return str(soup)
+
+    def _rewrite_css(self, css: str, base_url: str, assets: Dict[str, str]) -> str:
+        def replace(match):
+            local = assets.get(self._resolve(match.group(2), base_url))
+            return f'url("{local}")' if local else match.group(0)
+        return _CSS_URL.sub(replace, css)
+
+    def _resolve(self, url: str, base_url: str) -> str:
+        url = url.strip()
+        if url.startswith('data:'):
+            return url
+        return urljoin(base_url, url) if base_url else url
+
+    def _asset_urls(self, base_url: str, html: str, css: str) -> List[str]:
+        urls = []
+        soup = BeautifulSoup(html, 'html.parser')
+        for element in soup.find_all(['img', 'source', 'video', 'audio', 'link']):
+            if element.name == 'link':
+                rel = ' '.join(element.get('rel', []))
+                if 'icon' in rel and element.get('href'):
+                    urls.append(element['href'])
+                continue
+            for attr in ('src', 'poster'):
+                if element.get(attr):
+                    urls.append(element[attr])
+            if element.get('srcset'):
+                urls.extend(candidate.strip().split(' ')[0] for candidate in element['srcset'].split(','))
+        style_text = css + '\n' + '\n'.join(el['style'] for el in soup.find_all(style=True))
+        urls.extend(match.group(2) for match in _CSS_URL.finditer(style_text))
+
+        resolved = []
+        for url in urls:
+            absolute = self._resolve(url, base_url)
+            if urlparse(absolute).scheme in ('http', 'https') and absolute not in resolved:
+                resolved.append(absolute)
+        return resolved[:self.max_assets]
+
+    async def _download_assets(self, directory: Path, base_url: str, html: str, css: str) -> Dict[str, str]:
+        """Download referenced assets; returns {absolute url: local relative path}"""
+        urls = self._asset_urls(base_url, html, css)
+        if not urls:
+            return {}
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.download_concurrency * 2)
+            )
+        semaphore = asyncio.Semaphore(self.download_concurrency)
+
+        async def fetch(url: str) -> Optional[str]:
+            async with semaphore:
+                return await self._download(directory, url)
+
+        names = await asyncio.gather(*[fetch(url) for url in urls])
+        return {url: f"assets/{name}" for url, name in zip(urls, names) if name}
+
+    async def _download(self, directory: Path, url: str) -> Optional[str]:
+        """Stream one asset to disk under a content-hashed name"""
+        tmp_path = directory / f".{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with self._client.stream('GET', url) as response:
+                if response.status_code != 200:
+                    return None
+                content_type = response.headers.get('content-type', '').split(';')[0].strip()
+                with open(tmp_path, 'wb') as output:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_asset_bytes:
+                            logger.info(f"Skipping asset over {self.max_asset_bytes} bytes: {url}")
+                            return None
+                        digest.update(chunk)
+                        output.write(chunk)
+
+            suffix = PurePosixPath(urlparse(url).path).suffix.lower()
+            if not suffix or len(suffix) > 6:
+                suffix = mimetypes.guess_extension(content_type) or ''
+            name = f"{digest.hexdigest()[:16]}{suffix}"
+            tmp_path.replace(directory / name)
+            return name
+        except Exception as e:
+            logger.warning(f"Failed to download asset {url}: {e}")
+            return None
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
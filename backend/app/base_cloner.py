@@ -0,0 +1,584 @@
+import os
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+
+from .llm_clients import LLMClientRegistry
+from .generation_cache import GenerationCache
+from .context_packer import ContextPacker, estimate_tokens
+from .sectioned_generation import SectionedGenerator
+from .output_splitter import OutputSplitter
+from .component_dedup import format_component_lines, expand_repeated_components
+from .deadline import Deadline, DeadlineExceeded
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+CONTINUATION_PROMPT = """Your previous response was cut off by the output limit. Continue EXACTLY where it stopped.
+Output only the remaining part of the document: do not repeat anything already written, do not restart the document, no explanations."""
+
+# A continuation isn't worth starting with less time than this left (seconds)
+CONTINUATION_MIN_SECONDS = 15.0
+
+# Shortest repeat of the previous piece a continuation is deduplicated against; shorter
+# matches are usually real output (a continuation opening with the '}' or '</div>' that
+# closes an enclosing block) rather than the model restating what it already wrote
+MIN_CONTINUATION_OVERLAP = 32
+
+class BaseLLMCloner(ABC):
+    """Shared website clone pipeline for LLM providers.
+    
+    Subclasses set the provider name, endpoint and model and translate chat
+    messages to and from their API format in _build_request/_parse_response;
+    context packing, caching, continuation and post-processing live here.
+    """
+    
+    provider = ""
+    model = ""
+    base_url = ""
+    default_temperature = 0.7
+
+    def __init__(
+        self,
+        api_key: str,
+        clients: Optional[LLMClientRegistry] = None,
+        cache: Optional[GenerationCache] = None,
+        deterministic: Optional[bool] = None
+    ):
+        self.api_key = api_key
+        self.clients = clients or LLMClientRegistry()
+        self.cache = cache
+        self.base_url = os.getenv(f"{self.provider.upper()}_API_URL", self.base_url)
+        
+        # Deterministic mode pins temperature to 0 so cached completions are
+        # what a fresh call would have produced
+        if deterministic is None:
+            deterministic = os.getenv("LLM_DETERMINISTIC", "false").lower() == "true"
+        self.deterministic = deterministic
+        self.temperature = 0.0 if deterministic else self.default_temperature
+        self.max_tokens = 8192
+        self.max_continuations = int(os.getenv("LLM_MAX_CONTINUATIONS", "3"))
+        
+    async def clone_website(
+        self,
+        scraping_data: Dict[str, Any],
+        mode: str = "single",
+        previous: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Generate a comprehensive website clone.
+        
+        mode="sectioned" generates a shared stylesheet and then each page
+        section concurrently, falling back to a single completion when the
+        page has fewer than two sections. mode="incremental" does the same but
+        reuses the fragments in `previous` for sections that did not change.
+        Every request is bounded by what is left of `deadline`.
+        """
+        try:
+            # Prepare context with enhanced data
+            with tracing.span("llm.prompt_build", {'gen_ai.system': self.provider}) as span:
+                context, packing = self._prepare_enhanced_context(scraping_data)
+                if span.recording:
+                    span.set_attribute('llm.prompt.estimated_tokens', estimate_tokens(context))
+            
+            # Generate HTML with embedded CSS and JS
+            if mode in ("sectioned", "incremental") and SectionedGenerator.can_split(scraping_data):
+                generation = await SectionedGenerator(self, deadline=deadline).generate(
+                    scraping_data, context, previous if mode == "incremental" else None
+                )
+            else:
+                mode = "single"
+                generation = await self._generate_complete_html(context, deadline)
+            html_content = generation['content']
+            
+            with tracing.span("llm.postprocess", {'llm.output.chars': len(html_content)}):
+                # Extract components in a single pass
+                parts = OutputSplitter.split(html_content)
+                
+                # Fill in the repeated components the model rendered once
+                repeated = scraping_data.get('content', {}).get('repeated_components', [])
+                parts['html'], expansion = expand_repeated_components(parts['html'], repeated)
+            
+            return {
+                'html': parts['html'],
+                'css': parts['css'],
+                'javascript': parts['javascript'],
+                'metadata': {
+                    'original_url': scraping_data.get('url'),
+                    'title': scraping_data.get('title'),
+                    'provider': self.provider,
+                    'generated_with': self.model,
+                    'has_animations': len(scraping_data.get('animations', {}).get('css_animations', [])) > 0,
+                    'has_scripts': len(scraping_data.get('scripts', {}).get('inline_scripts', [])) > 0,
+                    'responsive_design': scraping_data.get('responsive', {}).get('viewport_meta') is not None,
+                    'cache_hit': generation['cached'],
+                    'deterministic': self.deterministic,
+                    'usage': generation['usage'],
+                    'context_packing': packing,
+                    'generation_mode': mode,
+                    'sectioned': generation.get('stats'),
+                    'incremental': generation.get('incremental'),
+                    'repeated_components': expansion,
+                    'continuations': generation.get('continuations', 0),
+                    'continuation_ms': generation.get('continuation_ms', 0),
+                    'truncated_by_deadline': generation.get('truncated_by_deadline', False)
+                },
+                # Section hashes and fragments for the next incremental run (not part of the response)
+                'sections_state': generation.get('state')
+            }
+            
+        except DeadlineExceeded as e:
+            # Lets the pipeline fall back to a degraded clone even with some of the budget left
+            return {'error': str(e), 'out_of_time': True}
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _prepare_enhanced_context(self, scraping_data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Prepare comprehensive context, packed to the model's token budget"""
+        
+        url = scraping_data.get('url', '')
+        title = scraping_data.get('title', '')
+        content = scraping_data.get('content', {})
+        styles = scraping_data.get('styles', {})
+        scripts = scraping_data.get('scripts', {})
+        animations = scraping_data.get('animations', {})
+        responsive = scraping_data.get('responsive', {})
+        
+        packer = ContextPacker.for_model(self.model)
+        self._pack_content(packer, content)
+        self._pack_styles(packer, styles)
+        self._pack_animations(packer, animations)
+        self._pack_responsive(packer, responsive)
+        self._pack_scripts(packer, scripts)
+        packing = packer.pack()
+        
+        context = f"""WEBSITE TO CLONE:
+URL: {url}
+Title: {title}
+
+CONTENT:
+{packer.render('content') or "No content found"}
+
+STYLING:
+{packer.render('styles') or "No styles detected"}
+
+ANIMATIONS:
+{packer.render('animations') or "No animations detected"}
+
+RESPONSIVE DESIGN:
+{packer.render('responsive') or "No responsive features detected"}
+
+JAVASCRIPT:
+{packer.render('scripts') or "No JavaScript detected"}
+"""
+        return context, packing
+
+    def _pack_content(self, packer: ContextPacker, content: dict):
+        """Register content items with the packer"""
+        # Headings
+        headings = content.get('headings', [])
+        packer.add('content', "HEADINGS:", [f"  H{h['level']}: {h['text']}" for h in headings], 'headings')
+        
+        # Hero text: the opening paragraphs carry the page's main message
+        paragraphs = content.get('paragraphs', [])
+        hero, rest = paragraphs[:2], paragraphs[2:]
+        packer.add('content', "\nHERO TEXT (FULL TEXT):", [f"  {p}" for p in hero], 'hero')
+        
+        # Remaining paragraphs - FULL TEXT
+        packer.add('content', "\nPARAGRAPHS (FULL TEXT):", [f"  {i+1}. {p}" for i, p in enumerate(rest)], 'paragraphs')
+        
+        # Images
+        images = content.get('images', [])
+        packer.add(
+            'content',
+            f"\nIMAGES: {len(images)} images found",
+            [f"  - Alt: '{img.get('alt', 'No alt')}' Src: {img.get('src', '')}" for img in images],
+            'images'
+        )
+        
+        # Links
+        links = content.get('links', [])
+        packer.add('content', "\nLINKS:", [f"  - Text: '{link['text']}' Href: {link['href']}" for link in links], 'navigation')
+        
+        # Semantic elements
+        semantic = content.get('semantic_elements', {})
+        if semantic:
+            packer.add('content', None, [f"\nHTML STRUCTURE: {', '.join(semantic.keys())}"], 'sections')
+        
+        # Sections with more detail
+        sections = content.get('sections', [])
+        packer.add(
+            'content',
+            "\nSECTIONS:",
+            [f"  - {section.get('tag', 'div')}: {section.get('text', '')[:200]}..." for section in sections],
+            'sections'
+        )
+        
+        # Repeated components: one exemplar each, the varying values as a data table
+        for group in content.get('repeated_components', []):
+            exemplar, rows = format_component_lines(group)
+            packer.add('content', "\nREPEATED COMPONENT:", exemplar, 'components')
+            packer.add('content', f"    ROWS ({group['id']}):", rows, 'component_data')
+
+    def _pack_styles(self, packer: ContextPacker, styles: dict):
+        """Register styling items with the packer"""
+        # Colors
+        colors = styles.get('colors', [])
+        if colors:
+            packer.add('styles', None, [f"COLORS: {', '.join(colors)}"], 'styles')
+        
+        # Element-specific fonts
+        element_fonts = styles.get('element_fonts', {})
+        font_lines = []
+        for element, font_info in element_fonts.items():
+            font_details = []
+            for key, value in font_info.items():
+                if value and value != 'normal' and value != 'auto':
+                    font_details.append(f"{key}: {value}")
+            if font_details:
+                font_lines.append(f"  {element}: {', '.join(font_details)}")
+        packer.add('styles', "\nFONT SPECIFICATIONS:", font_lines, 'styles')
+        
+        # General fonts
+        fonts = styles.get('fonts', [])
+        if fonts:
+            packer.add('styles', None, [f"\nFONT FAMILIES: {', '.join(fonts)}"], 'styles')
+        
+        # Body styles
+        body = styles.get('body', {})
+        packer.add(
+            'styles',
+            "\nBODY STYLES:",
+            [f"  {key}: {value}" for key, value in body.items() if value and value != 'normal' and value != 'auto'],
+            'styles'
+        )
+
+    def _pack_animations(self, packer: ContextPacker, animations: dict):
+        """Register animation items with the packer"""
+        lines = []
+        
+        css_anims = animations.get('css_animations', [])
+        if css_anims:
+            lines.append(f"CSS ANIMATIONS: {len(css_anims)} found")
+        
+        transitions = animations.get('css_transitions', [])
+        if transitions:
+            lines.append(f"TRANSITIONS: {len(transitions)} found")
+        
+        keyframes = animations.get('keyframes', [])
+        if keyframes:
+            lines.append(f"KEYFRAMES: {', '.join([kf.get('name', '') for kf in keyframes])}")
+        
+        packer.add('animations', None, lines, 'animations')
+
+    def _pack_responsive(self, packer: ContextPacker, responsive: dict):
+        """Register responsive design items with the packer"""
+        lines = []
+        
+        viewport = responsive.get('viewport_meta')
+        if viewport:
+            lines.append(f"VIEWPORT: {viewport}")
+        
+        flex_elements = responsive.get('flex_elements', [])
+        if flex_elements:
+            lines.append(f"FLEX LAYOUTS: {len(flex_elements)} found")
+        
+        grid_elements = responsive.get('grid_elements', [])
+        if grid_elements:
+            lines.append(f"GRID LAYOUTS: {len(grid_elements)} found")
+        
+        packer.add('responsive', None, lines, 'responsive')
+
+    def _pack_scripts(self, packer: ContextPacker, scripts: dict):
+        """Register JavaScript items with the packer"""
+        lines = []
+        
+        external = scripts.get('external_scripts', [])
+        if external:
+            lines.append(f"EXTERNAL SCRIPTS: {len(external)} found")
+        
+        inline = scripts.get('inline_scripts', [])
+        if inline:
+            lines.append(f"INLINE SCRIPTS: {len(inline)} found")
+        
+        globals_found = scripts.get('global_variables', [])
+        if globals_found:
+            lines.append(f"LIBRARIES: {', '.join(globals_found)}")
+        
+        packer.add('scripts', None, lines, 'scripts')
+
+    async def _generate_complete_html(self, context: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Generate complete HTML with embedded CSS and JS"""
+        
+        system_prompt = """You are an expert web developer. Create a complete, functional website clone that recreates the original design precisely.
+
+CRITICAL REQUIREMENTS:
+1. Generate a complete HTML5 document with embedded CSS and JavaScript
+2. Use ALL provided content EXACTLY - every word, every paragraph, every link text MUST be included completely
+3. DO NOT truncate, modify, or shorten any text content provided
+4. Recreate the exact layout structure, colors, fonts, and styling
+5. Implement all animations, transitions, and interactive effects
+6. Build responsive design using detected flex/grid layouts
+7. Include JavaScript functionality for interactivity
+8. Ensure cross-browser compatibility and accessibility
+
+CONTENT HANDLING:
+- Include EVERY paragraph with COMPLETE text (no truncation)
+- Include ALL headings exactly as provided
+- Include ALL links with exact text and URLs
+- Include ALL images with proper alt text and sources
+- Use the exact structure and semantic elements detected
+- Render each REPEATED COMPONENT exactly ONCE (row 1) with its data-repeat-id attribute; the remaining rows are added automatically
+
+STYLING:
+- Use exact color palette (backgrounds, text, borders)
+- Implement exact fonts and typography
+- Apply all CSS rules from stylesheets
+- Match computed styles for key elements
+- Recreate inline styles where detected
+- Use CSS custom properties for consistency
+
+LAYOUT:
+- Use semantic HTML5 elements (header, nav, main, section, article, aside, footer)
+- Recreate exact container patterns and layout type
+- Implement navigation patterns with correct positioning
+- Structure content areas according to detected layout patterns
+
+INTERACTIVITY:
+- Recreate all CSS animations with exact timing
+- Implement transitions for interactive elements
+- Apply transform properties as detected
+- Include hover effects and interactive states
+- Add JavaScript for navigation, scrolling, forms
+
+RESPONSIVE:
+- Include viewport meta tag
+- Use flex layouts with correct properties
+- Implement grid layouts with template columns/rows
+- Include media queries for different screen sizes
+
+OUTPUT: Return ONLY the complete HTML document with embedded CSS and JavaScript. No explanations. Ensure ALL content is included completely."""
+
+        user_prompt = f"""Create a complete website clone based on this analysis:
+
+{context}
+
+IMPORTANT: Use ALL the content provided above EXACTLY as written. Do not truncate, modify, or shorten any text. Every paragraph, heading, and link must be included with complete text.
+
+Generate a full HTML document that recreates this website exactly with:
+- ALL content included completely (no truncation)
+- All detected styling and layout
+- Responsive design with flex/grid layouts  
+- Interactive features and animations
+- Clean, modern code structure
+
+Return the complete HTML with embedded CSS and JavaScript."""
+
+        return await self._complete(system_prompt, user_prompt, deadline=deadline)
+
+    async def _complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Call the provider with the provided messages, serving identical requests from the cache
+        and continuing completions that stop at the token limit (while the deadline allows)"""
+        max_tokens = max_tokens or self.max_tokens
+        cache_key = None
+        if self.cache:
+            cache_key = GenerationCache.make_key(
+                self.provider, self.model, system_prompt, user_prompt,
+                {**self._sampling_params(), 'max_tokens': max_tokens}
+            )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Serving {self.provider} completion from generation cache")
+                tracing.current_span().add_event('generation_cache.hit', {'gen_ai.system': self.provider})
+                return {**cached, 'cached': True, 'continuations': 0, 'continuation_ms': 0}
+        
+        messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ]
+        completion = await self._request_completion(messages, max_tokens, deadline)
+        finish_reason = completion['finish_reason']
+        content = self._clean_response(completion['content'], truncated=finish_reason == 'length')
+        usage = dict(completion['usage'])
+        
+        # Resume truncated output from a safe boundary until it finishes or the cap is hit
+        continuations = 0
+        continuation_started = time.monotonic()
+        truncated_by_deadline = False
+        while finish_reason == 'length' and continuations < self.max_continuations:
+            if deadline and not deadline.allows(CONTINUATION_MIN_SECONDS):
+                logger.warning(f"Not enough time left for continuation {continuations + 1}, keeping truncated output")
+                truncated_by_deadline = True
+                break
+            continuations += 1
+            content = self._trim_to_safe_boundary(content)
+            logger.info(f"Response truncated at {len(content)} chars, requesting continuation {continuations}/{self.max_continuations}")
+            try:
+                completion = await self._request_completion(
+                    messages + [
+                        {
+                            "role": "assistant",
+                            "content": content
+                        },
+                        {
+                            "role": "user",
+                            "content": CONTINUATION_PROMPT
+                        }
+                    ],
+                    max_tokens,
+                    deadline
+                )
+            except DeadlineExceeded as e:
+                # Keep what has been generated so far rather than losing it to the deadline
+                logger.warning(f"Continuation {continuations} ran out of time, keeping truncated output: {e}")
+                truncated_by_deadline = True
+                break
+            finish_reason = completion['finish_reason']
+            content = self._merge_continuation(
+                content, self._clean_response(completion['content'], continued=True, truncated=finish_reason == 'length')
+            )
+            for key, value in completion['usage'].items():
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+        continuation_ms = int((time.monotonic() - continuation_started) * 1000) if continuations else 0
+        
+        if finish_reason == 'length' and not truncated_by_deadline:
+            logger.warning(f"Warning: Response still truncated after {continuations} continuations")
+        
+        generation = {
+            'content': content,
+            'finish_reason': finish_reason,
+            'usage': usage
+        }
+        # Output cut short by this job's deadline isn't what the same request would normally produce
+        if cache_key and not truncated_by_deadline:
+            await self.cache.set(cache_key, generation)
+        return {
+            **generation,
+            'cached': False,
+            'continuations': continuations,
+            'continuation_ms': continuation_ms,
+            'truncated_by_deadline': truncated_by_deadline
+        }
+
+    async def _request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Send one completion request through the provider's scheduler; returns content,
+        normalized finish_reason and usage"""
+        with tracing.span(
+            "llm.request",
+            {'gen_ai.system': self.provider, 'gen_ai.request.model': self.model, 'gen_ai.request.max_tokens': max_tokens},
+            kind=tracing.CLIENT
+        ) as span:
+            try:
+                url, headers, payload = self._build_request(messages, max_tokens)
+                # Lets a provider (or the mock LLM) that understands W3C trace context join this trace
+                headers = tracing.inject(dict(headers))
+                client = self.clients.get(self.provider)
+                scheduler = self.clients.scheduler(self.provider)
+                estimated_tokens = sum(estimate_tokens(m['content']) for m in messages) + max_tokens
+                timeout = self.clients.total_timeout(self.provider)
+                
+                async def send():
+                    # Each attempt (including retries) gets only what is left of the job's budget
+                    if deadline is None:
+                        return await asyncio.wait_for(client.post(url, headers=headers, json=payload), timeout=timeout)
+                    deadline.check(f"{self.provider} request")
+                    try:
+                        return await asyncio.wait_for(client.post(url, headers=headers, json=payload), timeout=deadline.timeout(timeout))
+                    except asyncio.TimeoutError:
+                        # Out of budget rather than a slow attempt: not worth a retry
+                        if not deadline.allows(1.0):
+                            raise DeadlineExceeded(f"{self.provider} request ran out of time")
+                        raise
+                
+                response = await scheduler.run(send, estimated_tokens, deadline)
+                span.set_attribute('http.response.status_code', response.status_code)
+                
+                if response.status_code != 200:
+                    raise Exception(f"{self.provider} API request failed: {response.status_code} - {response.text}")
+                
+                completion = self._parse_response(response.json())
+                if completion is None:
+                    raise Exception(f"No valid response from {self.provider} API")
+                
+                usage = completion['usage']
+                scheduler.record_usage(estimated_tokens, usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0))
+                span.set_attributes({
+                    'gen_ai.usage.input_tokens': usage.get('prompt_tokens'),
+                    'gen_ai.usage.output_tokens': usage.get('completion_tokens'),
+                    'gen_ai.response.finish_reasons': completion['finish_reason'],
+                })
+                return completion
+                
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                raise Exception(f"{self.provider} API error: {str(e)}")
+
+    def _sampling_params(self) -> Dict[str, Any]:
+        """Sampling parameters sent with every request (part of the cache key)"""
+        return {'temperature': self.temperature}
+
+    @abstractmethod
+    def _build_request(self, messages: List[Dict[str, str]], max_tokens: int) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Translate chat messages into the provider's (url, headers, json) request"""
+
+    @abstractmethod
+    def _parse_response(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extract content, finish_reason ('length' when truncated) and usage from a response"""
+
+    def _trim_to_safe_boundary(self, content: str) -> str:
+        """Cut a truncated completion back to the last closing tag or CSS rule end"""
+        boundary = max(content.rfind('>'), content.rfind('}'))
+        # Only trim a short dangling tail; never throw away most of the output
+        if boundary >= len(content) // 2:
+            return content[:boundary + 1]
+        return content
+
+    def _merge_continuation(self, content: str, continuation: str) -> str:
+        """Append a continuation, dropping a long run of text it repeats from the end of the previous piece"""
+        max_overlap = min(len(content), len(continuation), 2000)
+        for size in range(max_overlap, MIN_CONTINUATION_OVERLAP - 1, -1):
+            if content.endswith(continuation[:size]):
+                continuation = continuation[size:]
+                break
+        return content + continuation
+
+    def _clean_response(self, content: str, continued: bool = False, truncated: bool = False) -> str:
+        """Strip the markdown code fence wrapping an API response.
+        
+        Whitespace is kept where the piece joins another: at the start of a
+        continuation (`continued`) and at the end of output cut off by the
+        output limit (`truncated`).
+        """
+        head = content.lstrip()
+        if head.startswith('```'):
+            newline = head.find('\n')
+            content = head[newline + 1:] if newline != -1 else ''
+        tail = content.rstrip()
+        if tail.endswith('```'):
+            content = tail[:-3]
+        if not continued:
+            content = content.lstrip()
+        if not truncated:
+            content = content.rstrip()
+        return content
@@ -0,0 +1,79 @@
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, AsyncIterator
+
+
+def normalize_url(url: str) -> str:
+    """Key used to dedupe URLs within a batch"""
+    return url.strip().rstrip('/')
+
+
+class CloneBatch:
+    """A group of clone jobs submitted together.
+
+    Each distinct URL becomes one clone job; repeated URLs point at the job
+    of their first occurrence. Completion records are appended as jobs
+    finish so any number of followers can stream them in completion order,
+    starting from the beginning.
+    """
+
+    def __init__(self, batch_id: str, urls: List[str], concurrency: int):
+        self.batch_id = batch_id
+        self.concurrency = concurrency
+        self.created_at = datetime.now().isoformat()
+        self.completed_at: Optional[str] = None
+        # One entry per submitted URL, in request order
+        self.items: List[Dict[str, Any]] = []
+        # Distinct jobs: {url, clone_id}
+        self.jobs: List[Dict[str, str]] = []
+        self._records: List[Dict[str, Any]] = []
+        self._forgotten: Set[str] = set()
+        self._changed = asyncio.Condition()
+
+        seen: Dict[str, str] = {}
+        for url in urls:
+            key = normalize_url(url)
+            if key in seen:
+                self.items.append({'url': url, 'clone_id': seen[key], 'duplicate': True})
+                continue
+            clone_id = str(uuid.uuid4())
+            seen[key] = clone_id
+            self.jobs.append({'url': url, 'clone_id': clone_id})
+            self.items.append({'url': url, 'clone_id': clone_id, 'duplicate': False})
+
+    @property
+    def done(self) -> bool:
+        return self.completed_at is not None
+
+    def forget(self, clone_id: str):
+        """Drop a deleted clone's items, jobs and completion records from the batch"""
+        self._forgotten.add(clone_id)
+        self.items = [item for item in self.items if item['clone_id'] != clone_id]
+        self.jobs = [job for job in self.jobs if job['clone_id'] != clone_id]
+
+    async def record(self, record: Dict[str, Any]):
+        """Publish a finished job to followers"""
+        async with self._changed:
+            self._records.append(record)
+            self._changed.notify_all()
+
+    async def finish(self):
+        async with self._changed:
+            self.completed_at = datetime.now().isoformat()
+            self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """Every completion record so far, then each new one as it arrives, until the batch finishes"""
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: position < len(self._records) or self.done)
+                records = self._records[position:]
+                finished = self.done
+            for record in records:
+                if record['clone_id'] not in self._forgotten:
+                    yield record
+            position += len(records)
+            if finished and position >= len(self._records):
+                return
@@ -0,0 +1,99 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-setuid-sandbox']
+
+
+class BrowserPool:
+    """One shared headless Chromium for every clone job, with a fixed number of slots.
+
+    Each scrape gets its own isolated browser context (cookies, cache and
+    storage are not shared) instead of launching its own browser, and at
+    most `size` contexts are open at once; further jobs wait for a slot.
+    The browser is launched on first use and relaunched if it crashes.
+    """
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self._slots = asyncio.Semaphore(size)
+        self._launch_lock = asyncio.Lock()
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self.in_use = 0
+        self.waiting = 0
+        self.launches = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["BrowserPool"]:
+        """Build the pool from environment settings, or None to give each scrape its own browser"""
+        if os.getenv("BROWSER_POOL_ENABLED", "true").lower() != "true":
+            return None
+        return cls(size=max(1, int(os.getenv("BROWSER_POOL_SIZE", "4"))))
+
+    async def acquire(self, **context_options) -> BrowserContext:
+        """Wait for a free slot and open a fresh context in the shared browser"""
+        with tracing.span("browser.acquire", {'browser_pool.in_use': self.in_use, 'browser_pool.waiting': self.waiting}) as span:
+            self.waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+
+            launches = self.launches
+            try:
+                browser = await self._ensure_browser()
+                context = await browser.new_context(**context_options)
+            except BaseException:
+                self._slots.release()
+                raise
+            span.set_attribute('browser_pool.launched', self.launches > launches)
+            self.in_use += 1
+            return context
+
+    async def release(self, context: BrowserContext):
+        """Close a context from acquire() and free its slot"""
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser context: {e}")
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+
+    async def aclose(self):
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': self.size,
+            'in_use': self.in_use,
+            'waiting': self.waiting,
+            'browser_running': bool(self._browser and self._browser.is_connected()),
+            'launches': self.launches,
+        }
+
+    async def _ensure_browser(self) -> Browser:
+        async with self._launch_lock:
+            if self._browser and self._browser.is_connected():
+                return self._browser
+            if self._browser:
+                logger.warning("Shared browser disconnected, relaunching")
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+            self.launches += 1
+            logger.info(f"Launched shared browser ({self.size} slots)")
+            return self._browser
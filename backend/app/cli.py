@@ -0,0 +1,234 @@
+"""Offline bulk cloning without the web server.
+
+Run from the backend directory:
+    python -m app.cli clone --input urls.txt --out clones/ --concurrency 4
+
+Each finished clone is written to <out>/<id>/ (index.html, styles.css,
+script.js, assets/) and recorded in <out>/results.jsonl. Re-running with
+the same --out skips URLs already recorded as completed, so an interrupted
+backfill resumes where it stopped.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from .llm_clients import LLMClientRegistry
+from .generation_cache import GenerationCache
+from .clone_history import CloneHistory
+from .artifacts import ArtifactStore
+from .browser_pool import BrowserPool
+from .batches import normalize_url
+from .pipeline import ClonePipeline, build_router
+from .stats import percentile
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FILE = 'results.jsonl'
+
+
+def read_urls(path: str) -> List[str]:
+    """URLs from a file, one per line; blank lines and # comments are skipped, duplicates dropped"""
+    urls, seen = [], set()
+    for line in Path(path).read_text(encoding='utf-8').splitlines():
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        if '://' not in url:
+            url = f"https://{url}"
+        if normalize_url(url) not in seen:
+            seen.add(normalize_url(url))
+            urls.append(url)
+    return urls
+
+
+def clone_dir_name(url: str) -> str:
+    """Readable, collision-free directory name for a URL"""
+    parsed = urlparse(url)
+    slug = f"{parsed.netloc}{parsed.path}".strip('/').replace('/', '_') or 'page'
+    slug = ''.join(ch if ch.isalnum() or ch in '._-' else '-' for ch in slug)[:80]
+    return f"{slug}-{hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()[:8]}"
+
+
+def completed_urls(results_path: Path) -> set:
+    """Normalized URLs whose latest record in results.jsonl is completed"""
+    latest: Dict[str, str] = {}
+    if not results_path.exists():
+        return set()
+    for line in results_path.read_text(encoding='utf-8').splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # A line cut short by an interrupted run
+            continue
+        latest[normalize_url(record['url'])] = record.get('status')
+    return {url for url, status in latest.items() if status == 'completed'}
+
+
+class BulkCloner:
+    """Clone a list of URLs with bounded concurrency, writing each result to disk as it finishes"""
+
+    def __init__(self, pipeline: ClonePipeline, store: ArtifactStore, out_dir: Path, generation_mode: str, mode: str):
+        self.pipeline = pipeline
+        self.store = store
+        self.results_path = out_dir / RESULTS_FILE
+        self.generation_mode = generation_mode
+        self.mode = mode
+        self._write_lock = asyncio.Lock()
+        self.durations: List[float] = []
+        self.counts = {'completed': 0, 'error': 0}
+
+    async def run(self, urls: List[str], concurrency: int):
+        slots = asyncio.Semaphore(concurrency)
+        total = len(urls)
+
+        async def run_one(url: str):
+            async with slots:
+                record = await self.clone(url)
+            await self._append(record)
+            self.counts[record['status']] += 1
+            done = sum(self.counts.values())
+            outcome = record['status'] if record['status'] == 'completed' else f"error: {record['error']}"
+            print(f"[{done}/{total}] {url} {outcome} ({record['elapsed_s']}s)", flush=True)
+
+        await asyncio.gather(*(run_one(url) for url in urls))
+
+    async def clone(self, url: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        clone_id = clone_dir_name(url)
+        record: Dict[str, Any] = {'url': url, 'id': clone_id}
+        # A parent process can tie this run into its own trace through TRACEPARENT
+        parent = tracing.parse_traceparent(os.getenv("TRACEPARENT"))
+        with tracing.span("cli.clone", {'clone.id': clone_id, 'clone.url': url, 'clone.mode': self.mode}, parent=parent) as span:
+            if span.recording:
+                record['trace_id'] = span.context.trace_id
+            try:
+                if self.mode == "snapshot":
+                    clone_result = await self.pipeline.snapshot(url)
+                else:
+                    clone_result, _ = await self.pipeline.generate(url, self.generation_mode)
+                manifest = await self.store.write(clone_id, clone_result)
+                record.update(status='completed', files=len(manifest['files']), metadata=clone_result.get('metadata', {}))
+            except Exception as e:
+                logger.error(f"Error cloning {url}: {str(e)}")
+                span.record_exception(e)
+                record.update(status='error', error=str(e))
+        elapsed = time.monotonic() - started
+        if record['status'] == 'completed':
+            self.durations.append(elapsed)
+        record.update(elapsed_s=round(elapsed, 2), finished_at=datetime.now().isoformat())
+        return record
+
+    async def _append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        async with self._write_lock:
+            await asyncio.to_thread(self._write_line, line)
+
+    def _write_line(self, line: str):
+        with self.results_path.open('a', encoding='utf-8') as results:
+            results.write(line)
+            results.flush()
+            os.fsync(results.fileno())
+
+
+async def clone_command(args: argparse.Namespace) -> int:
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    urls = read_urls(args.input)
+    done = set() if args.force else completed_urls(out_dir / RESULTS_FILE)
+    pending = [url for url in urls if normalize_url(url) not in done]
+    skipped = len(urls) - len(pending)
+    print(f"{len(urls)} URLs, {skipped} already completed, {len(pending)} to clone", flush=True)
+    if not pending:
+        return 0
+
+    grok_api_key = os.getenv("GROK_API_KEY")
+    if args.mode == "llm" and not grok_api_key:
+        print("GROK_API_KEY environment variable is required for --mode llm", file=sys.stderr)
+        return 2
+
+    llm_clients = LLMClientRegistry()
+    generation_cache = GenerationCache.from_env()
+    router = build_router(grok_api_key, os.getenv("GEMINI_API_KEY"), llm_clients, generation_cache) if args.mode == "llm" else None
+    # One browser for the whole run, with a page slot per concurrent clone
+    browser_pool = BrowserPool(size=args.concurrency)
+    store = ArtifactStore(
+        str(out_dir),
+        download_assets=os.getenv("ARTIFACT_DOWNLOAD_ASSETS", "true").lower() == "true",
+        max_assets=int(os.getenv("ARTIFACT_MAX_ASSETS", "100")),
+        max_asset_bytes=int(float(os.getenv("ARTIFACT_MAX_ASSET_MB", "5")) * 1024 * 1024),
+    )
+    pipeline = ClonePipeline(router, CloneHistory.from_env(), browser_pool)
+    bulk = BulkCloner(pipeline, store, out_dir, args.generation_mode, args.mode)
+
+    started = time.monotonic()
+    try:
+        await bulk.run(pending, args.concurrency)
+    finally:
+        await browser_pool.aclose()
+        await store.aclose()
+        await llm_clients.aclose()
+    elapsed = time.monotonic() - started
+
+    print_summary(bulk, skipped, elapsed, browser_pool.launches)
+    return 0 if bulk.counts['error'] == 0 else 1
+
+
+def print_summary(bulk: BulkCloner, skipped: int, elapsed: float, browser_launches: int):
+    attempted = sum(bulk.counts.values())
+    print()
+    print(f"Cloned {bulk.counts['completed']}/{attempted} URLs ({bulk.counts['error']} failed, {skipped} skipped) in {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput: {bulk.counts['completed'] / elapsed * 60:.1f} clones/min")
+    if bulk.durations:
+        print(
+            f"Per clone: p50 {percentile(bulk.durations, 0.5):.1f}s, "
+            f"p95 {percentile(bulk.durations, 0.95):.1f}s, max {max(bulk.durations):.1f}s"
+        )
+    print(f"Browser launches: {browser_launches}")
+    print(f"Results: {bulk.results_path}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Website cloner command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    clone = commands.add_parser("clone", help="Clone every URL in a file straight to disk")
+    clone.add_argument("--input", required=True, help="File with one URL per line")
+    clone.add_argument("--out", required=True, help="Output directory (also holds results.jsonl for resuming)")
+    clone.add_argument("--concurrency", type=int, default=4, help="Clones in flight at once (default 4)")
+    clone.add_argument("--generation-mode", choices=["single", "sectioned", "incremental"], default="single")
+    clone.add_argument("--mode", choices=["llm", "snapshot"], default="llm")
+    clone.add_argument("--force", action="store_true", help="Re-clone URLs already completed in --out")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    tracing.install_log_correlation()
+    logging.basicConfig(
+        level=getattr(logging, os.getenv("LOG_LEVEL", "WARNING").upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s%(trace)s"
+    )
+    tracer = tracing.configure(tracing.Tracer.from_env())
+    try:
+        return asyncio.run(clone_command(args))
+    finally:
+        tracer.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(value: Any) -> str:
+    """Stable content hash of scraped data"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def section_fingerprint(section: Dict[str, Any], components: Dict[str, Dict[str, Any]]) -> str:
+    """Hash of everything a section's generation depends on, including its repeated component data"""
+    return fingerprint({
+        'section': section,
+        'components': [components.get(component_id) for component_id in section.get('repeated_components', [])],
+    })
+
+
+def section_key(tag: str, element_id: str, heading: str, classes: str, used: Dict[str, int]) -> str:
+    """Key that identifies a page section across scrapes.
+
+    Built from the section's id, else its first heading, else its first class,
+    so inserting or removing a section elsewhere on the page leaves it alone.
+    Position only breaks ties between sections that would otherwise share a
+    key; `used` counts the keys handed out so far for the page.
+    """
+    label = ''
+    for candidate in (element_id, heading, classes.split()[0] if classes.split() else ''):
+        label = re.sub(r'[^a-z0-9]+', '-', candidate.lower()).strip('-')[:40].strip('-')
+        if label:
+            break
+    base = f"{tag}-{label}" if label else tag
+    used[base] = used.get(base, 0) + 1
+    if label:
+        return base if used[base] == 1 else f"{base}-{used[base]}"
+    return f"{base}-{used[base]}"
+
+
+def diff_sections(previous: List[Dict[str, Any]], current: Dict[str, str]) -> Dict[str, List[str]]:
+    """Compare stored section hashes with the current scrape's {key: hash}"""
+    before = {section['key']: section.get('hash') for section in previous}
+    return {
+        'unchanged': [key for key, value in current.items() if key in before and before[key] == value],
+        'changed': [key for key, value in current.items() if key in before and before[key] != value],
+        'added': [key for key in current if key not in before],
+        'removed': [key for key in before if key not in current],
+    }
+
+
+class CloneHistory:
+    """Last sectioned generation per URL, kept on disk for incremental re-clones.
+
+    Each record holds the shared skeleton stylesheet, a hash of the page
+    styles it was generated from, and every section's content hash with its
+    generated fragment, so a later run can reuse the fragments of sections
+    whose content did not change.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    @classmethod
+    def from_env(cls) -> Optional["CloneHistory"]:
+        """Build the history store from environment settings, or None when disabled"""
+        if os.getenv("CLONE_HISTORY_ENABLED", "true").lower() != "true":
+            return None
+        return cls(os.getenv("CLONE_HISTORY_DIR", ".cache/history"))
+
+    async def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """The stored generation state for a URL, if any"""
+        return await asyncio.to_thread(self._read, url)
+
+    async def save(self, url: str, state: Dict[str, Any]):
+        """Replace the stored generation state for a URL"""
+        try:
+            await asyncio.to_thread(self._write, url, {**state, 'url': url, 'updated_at': datetime.now().isoformat()})
+        except Exception as e:
+            logger.error(f"Error saving clone history for {url}: {e}")
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(url.rstrip('/').encode('utf-8')).hexdigest()
+        return self.directory / f"{key}.json"
+
+    def _read(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._path(url).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, url: str, state: Dict[str, Any]):
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(state, ensure_ascii=False), encoding='utf-8')
+        tmp_path.replace(path)
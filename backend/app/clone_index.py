@@ -0,0 +1,145 @@
+import base64
+import binascii
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# (created_at, clone_id): ISO timestamps sort chronologically as strings, the id breaks ties
+Key = Tuple[str, str]
+
+
+def encode_cursor(key: Key) -> str:
+    return base64.urlsafe_b64encode(f"{key[0]}|{key[1]}".encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Key:
+    """Parse an opaque cursor; raises ValueError when it is malformed"""
+    try:
+        created_at, separator, clone_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').partition('|')
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not separator or not created_at or not clone_id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, clone_id
+
+
+class CloneIndex:
+    """Sorted indexes over clone jobs, maintained as jobs are created, finish and are deleted.
+
+    Pages are returned newest first. A listing walks one sorted index from
+    the cursor position: all jobs, the jobs in one status, or the jobs under
+    a URL prefix when that prefix matches few enough of them. Filters the
+    chosen index can't answer are checked per entry, and a page stops after
+    max_scan entries so its cost is bounded no matter how many jobs exist;
+    a short page with a next_cursor just means "keep going".
+    """
+
+    def __init__(self, max_scan: int = 1000):
+        self.max_scan = max_scan
+        self._entries: Dict[str, Tuple[str, str, str]] = {}
+        self._by_created: List[Key] = []
+        self._by_status: Dict[str, List[Key]] = {}
+        self._by_url: List[Tuple[str, str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, clone_id: str, url: str, created_at: str, status: str):
+        """Index a new job"""
+        if clone_id in self._entries:
+            self.remove(clone_id)
+        key = (created_at, clone_id)
+        self._entries[clone_id] = (created_at, url, status)
+        # New jobs are usually the newest, so these inserts are mostly appends
+        insort(self._by_created, key)
+        insort(self._by_status.setdefault(status, []), key)
+        insort(self._by_url, (url, created_at, clone_id))
+
+    def set_status(self, clone_id: str, status: str):
+        """Move a job to another status index"""
+        entry = self._entries.get(clone_id)
+        if entry is None or entry[2] == status:
+            return
+        created_at, url, previous = entry
+        key = (created_at, clone_id)
+        self._discard(self._by_status[previous], key)
+        insort(self._by_status.setdefault(status, []), key)
+        self._entries[clone_id] = (created_at, url, status)
+
+    def remove(self, clone_id: str):
+        """Drop a job from every index"""
+        entry = self._entries.pop(clone_id, None)
+        if entry is None:
+            return
+        created_at, url, status = entry
+        key = (created_at, clone_id)
+        self._discard(self._by_created, key)
+        self._discard(self._by_status[status], key)
+        self._discard(self._by_url, (url, created_at, clone_id))
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        url_prefix: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None
+    ) -> Tuple[List[str], Optional[str]]:
+        """One page of clone ids, newest first, and the cursor for the next page (None at the end)"""
+        keys = self._by_status.get(status, []) if status else self._by_created
+
+        # Newest-first walk over the keys in [low, high)
+        low = (created_after,) if created_after else None
+        high = (created_before,) if created_before else None
+        if cursor:
+            after_cursor = decode_cursor(cursor)
+            high = min(high, after_cursor) if high else after_cursor
+
+        if url_prefix:
+            candidates = self._url_candidates(url_prefix, status, low, high)
+            if candidates is not None:
+                keys, url_prefix = candidates, None
+
+        lower = bisect_left(keys, low) if low else 0
+        upper = bisect_left(keys, high) if high else len(keys)
+
+        ids: List[str] = []
+        position = upper
+        while position > lower and len(ids) < limit and upper - position < self.max_scan:
+            position -= 1
+            clone_id = keys[position][1]
+            if url_prefix and not self._entries[clone_id][1].startswith(url_prefix):
+                continue
+            ids.append(clone_id)
+
+        next_cursor = encode_cursor(keys[position]) if position > lower else None
+        return ids, next_cursor
+
+    def _url_candidates(
+        self,
+        url_prefix: str,
+        status: Optional[str],
+        low: Optional[tuple],
+        high: Optional[tuple]
+    ) -> Optional[List[Key]]:
+        """Time-ordered keys under a URL prefix, or None when the prefix matches too many jobs to sort per page"""
+        start = bisect_left(self._by_url, (url_prefix,))
+        end = bisect_left(self._by_url, (url_prefix + '\U0010ffff',), lo=start)
+        if end - start > self.max_scan:
+            return None
+        candidates = []
+        for url, created_at, clone_id in self._by_url[start:end]:
+            key = (created_at, clone_id)
+            if status and self._entries[clone_id][2] != status:
+                continue
+            if (low and key < low) or (high and key >= high):
+                continue
+            candidates.append(key)
+        candidates.sort()
+        return candidates
+
+    @staticmethod
+    def _discard(keys: list, key: tuple):
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
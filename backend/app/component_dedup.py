@@ -0,0 +1,254 @@
+import os
+import copy
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import Comment
+
+logger = logging.getLogger(__name__)
+
+REPEAT_ATTRIBUTE = 'data-repeat-id'
+
+# Attributes kept on the exemplar shown to the model; the rest is noise for the prompt
+EXEMPLAR_ATTRIBUTES = {'class', 'id', 'href', 'src', 'alt', 'type', 'role', 'aria-label'}
+
+# Attributes whose values vary per instance and are recorded as data fields
+FIELD_ATTRIBUTES = {'img': ['src', 'alt'], 'a': ['href']}
+
+
+class RepeatedComponentDetector:
+    """Find repeated sibling subtrees (cards, product tiles, pricing rows) by structural hash.
+
+    Each element is hashed bottom-up from its tag and its children's hashes
+    (text nodes count as a marker, their content does not), so instances of the
+    same component hash equal regardless of the data they show. Siblings that
+    share a hash at least `min_repeats` times become a group: the first
+    instance is kept as the exemplar and marked with data-repeat-id, the others
+    are removed from the soup, and their varying text, image and link values
+    are kept as rows of a data table.
+    """
+
+    def __init__(self, min_repeats: int = 3, min_nodes: int = 4, max_groups: int = 8, max_exemplar_chars: int = 2000):
+        self.min_repeats = min_repeats
+        self.min_nodes = min_nodes
+        self.max_groups = max_groups
+        self.max_exemplar_chars = max_exemplar_chars
+
+    @classmethod
+    def from_env(cls) -> Optional["RepeatedComponentDetector"]:
+        """Detector configured from the environment, or None when disabled"""
+        if os.getenv("REPEATED_COMPONENTS_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            min_repeats=int(os.getenv("REPEATED_COMPONENTS_MIN_REPEATS", "3")),
+            max_groups=int(os.getenv("REPEATED_COMPONENTS_MAX_GROUPS", "8")),
+        )
+
+    def collapse(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        """Detect repeated components, collapse them to their exemplar in place and return the groups"""
+        root = soup.body or soup
+        signatures: Dict[int, Tuple[str, int]] = {}
+        self._signature(root, signatures)
+
+        candidates = []
+        for parent in [root] + root.find_all(True):
+            by_signature: Dict[str, List[Tag]] = {}
+            for child in parent.find_all(True, recursive=False):
+                signature, nodes = signatures[id(child)]
+                if nodes >= self.min_nodes:
+                    by_signature.setdefault(signature, []).append(child)
+            for instances in by_signature.values():
+                if len(instances) >= self.min_repeats:
+                    nodes = signatures[id(instances[0])][1]
+                    candidates.append(((len(instances) - 1) * nodes, instances))
+
+        # Largest savings first; skip groups nested inside (or around) one already taken
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        covered = set()
+        groups = []
+        for _, instances in candidates:
+            if len(groups) >= self.max_groups:
+                break
+            if any(id(el) in covered or any(id(p) in covered for p in el.parents) for el in instances):
+                continue
+            if any(id(d) in covered for el in instances for d in el.find_all(True)):
+                continue
+            group = self._build_group(f"rc-{len(groups) + 1}", instances)
+            if group is None:
+                continue
+            groups.append(group)
+            for el in instances:
+                covered.add(id(el))
+
+        for group, instances in groups:
+            instances[0][REPEAT_ATTRIBUTE] = group['id']
+            for el in instances[1:]:
+                el.decompose()
+
+        if groups:
+            logger.info(f"Collapsed {sum(g['count'] - 1 for g, _ in groups)} repeated component instances into {len(groups)} exemplars")
+        return [group for group, _ in groups]
+
+    def _signature(self, element: Tag, signatures: Dict[int, Tuple[str, int]]) -> Tuple[str, int]:
+        parts = [element.name]
+        nodes = 1
+        for child in element.children:
+            if isinstance(child, Tag):
+                signature, child_nodes = self._signature(child, signatures)
+                parts.append(signature)
+                nodes += child_nodes
+            elif isinstance(child, NavigableString) and not isinstance(child, Comment) and child.strip():
+                parts.append('#')
+                nodes += 1
+        signature = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+        signatures[id(element)] = (signature, nodes)
+        return signature, nodes
+
+    def _slots(self, element: Tag) -> List[Tuple[str, str]]:
+        """(field name, value) for every text node and data attribute, in document order"""
+        slots = []
+        counts: Dict[str, int] = {}
+        for slot in _field_slots(element):
+            kind = slot[0]
+            counts[kind] = counts.get(kind, 0) + 1
+            slots.append((f"{kind}{counts[kind]}", _slot_value(slot)))
+        return slots
+
+    def _build_group(self, group_id: str, instances: List[Tag]) -> Optional[Tuple[Dict[str, Any], List[Tag]]]:
+        slot_rows = [self._slots(el) for el in instances]
+        if any(len(row) != len(slot_rows[0]) for row in slot_rows):
+            return None
+
+        # Only fields that differ between instances go in the data table
+        varying = [
+            i for i in range(len(slot_rows[0]))
+            if len({row[i][1] for row in slot_rows}) > 1
+        ]
+        if not varying:
+            return None
+
+        exemplar = copy.copy(instances[0])
+        for el in [exemplar] + exemplar.find_all(True):
+            el.attrs = {k: v for k, v in el.attrs.items() if k in EXEMPLAR_ATTRIBUTES}
+        exemplar_html = str(exemplar)
+        if len(exemplar_html) > self.max_exemplar_chars:
+            exemplar_html = exemplar_html[:self.max_exemplar_chars] + '...'
+
+        return {
+            'id': group_id,
+            'tag': instances[0].name,
+            'class': ' '.join(instances[0].get('class', [])),
+            'count': len(instances),
+            'exemplar': exemplar_html,
+            'fields': [slot_rows[0][i][0] for i in varying],
+            'rows': [[row[i][1] for i in varying] for row in slot_rows],
+        }, instances
+
+
+def format_component_lines(group: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Prompt lines for a group: (exemplar instructions, data table rows)"""
+    root = f"<{group['tag']} class=\"{group['class']}\">" if group['class'] else f"<{group['tag']}>"
+    exemplar = [
+        f"  {group['id']}: {root} repeated {group['count']} times",
+        f"    Render it ONCE with {REPEAT_ATTRIBUTE}=\"{group['id']}\" on its root element, using the values of row 1; the other rows are filled in automatically.",
+        f"    EXEMPLAR: {group['exemplar']}",
+        f"    FIELDS: {' | '.join(group['fields'])}",
+    ]
+    rows = [f"    {i + 1}. {' | '.join(row)}" for i, row in enumerate(group['rows'])]
+    return exemplar, rows
+
+
+def expand_repeated_components(html: str, groups: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """Clone each marked exemplar in generated HTML once per data row; returns (html, stats)"""
+    stats = {'groups': len(groups), 'expanded_instances': 0, 'missing': []}
+    if not groups or not html:
+        return html, stats
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for group in groups:
+        exemplar = soup.find(attrs={REPEAT_ATTRIBUTE: group['id']}) or _find_unmarked(soup, group)
+        if exemplar is None:
+            logger.warning(f"Generated HTML has no exemplar for repeated component {group['id']}")
+            stats['missing'].append(group['id'])
+            continue
+
+        if exemplar.has_attr(REPEAT_ATTRIBUTE):
+            del exemplar[REPEAT_ATTRIBUTE]
+        positions = _align_fields(exemplar, group['fields'], group['rows'][0])
+        anchor = exemplar
+        for row in group['rows'][1:]:
+            instance = copy.copy(exemplar)
+            _apply_row(instance, positions, row)
+            anchor.insert_after(instance)
+            anchor = instance
+            stats['expanded_instances'] += 1
+    return str(soup), stats
+
+
+def _find_unmarked(soup: BeautifulSoup, group: Dict[str, Any]) -> Optional[Tag]:
+    """Locate an exemplar the model forgot to mark: the element of the group's tag holding row 1's first text"""
+    first_text = next((value for field, value in zip(group['fields'], group['rows'][0]) if field.startswith('text')), None)
+    if not first_text:
+        return None
+    node = soup.find(string=lambda s: s and s.strip() == first_text)
+    element = node.parent if node else None
+    while element is not None and element.name != group['tag']:
+        element = element.parent
+    return element
+
+
+def _field_slots(element: Tag) -> List[Tuple[str, Any, Optional[str]]]:
+    """(field kind, node, attribute) for every text node and data attribute, in document order"""
+    slots = []
+    for node in element.descendants:
+        if isinstance(node, Tag):
+            for attr in FIELD_ATTRIBUTES.get(node.name, []):
+                slots.append((f"{node.name}.{attr}", node, attr))
+        elif isinstance(node, NavigableString) and not isinstance(node, Comment) and node.strip():
+            slots.append(('text', node, None))
+    return slots
+
+
+def _align_fields(element: Tag, fields: List[str], values: List[str]) -> List[Optional[int]]:
+    """Slot index in the generated exemplar for each field, or None where it can't be found.
+
+    Fields are matched in document order to the next slot of the same kind
+    holding row 1's value, so fields that share a value (a plan named "Free"
+    with the price "Free") still land on different slots.
+    """
+    slots = _field_slots(element)
+    positions: List[Optional[int]] = []
+    cursor = 0
+    for field, value in zip(fields, values):
+        kind = field.rstrip('0123456789')
+        position = next(
+            (
+                i for i in range(cursor, len(slots))
+                if slots[i][0] == kind and _slot_value(slots[i]) == value
+            ),
+            None
+        )
+        positions.append(position)
+        if position is not None:
+            cursor = position + 1
+    return positions
+
+
+def _slot_value(slot: Tuple[str, Any, Optional[str]]) -> str:
+    _, node, attr = slot
+    return (node.get(attr) or '') if attr else node.strip()
+
+
+def _apply_row(element: Tag, positions: List[Optional[int]], row: List[str]):
+    """Write a row's values into the aligned slots of a cloned exemplar"""
+    slots = _field_slots(element)
+    for position, value in zip(positions, row):
+        if position is None:
+            continue
+        _, node, attr = slots[position]
+        if attr:
+            node[attr] = value
+        else:
+            node.replace_with(str(node).replace(node.strip(), value))
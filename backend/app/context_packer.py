@@ -0,0 +1,118 @@
+import os
+import re
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default context budgets (tokens) for the scraped-site portion of the prompt
+MODEL_CONTEXT_BUDGETS = {
+    'grok-2-1212': 6000,
+    'gemini-2.0-flash': 8000,
+}
+DEFAULT_CONTEXT_BUDGET = 6000
+
+# Lower index = packed first when the budget is tight
+PRIORITIES = [
+    'headings',
+    'hero',
+    'navigation',
+    'sections',
+    'components',
+    'styles',
+    'paragraphs',
+    'images',
+    'component_data',
+    'animations',
+    'responsive',
+    'scripts',
+]
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate a BPE tokenizer: one token per punctuation mark, ~4 characters per word piece"""
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 4 for piece in _TOKEN_PATTERN.findall(text)) + text.count('\n')
+
+
+class ContextPacker:
+    """Fill a token budget with prompt items by priority instead of fixed slices.
+
+    Items are registered in groups (a header plus lines) under a named block;
+    packing selects lines by priority, and rendering keeps the original
+    registration order so the prompt reads the same regardless of what was
+    dropped.
+    """
+
+    def __init__(self, budget_tokens: int):
+        self.budget_tokens = budget_tokens
+        self._groups: List[Dict[str, Any]] = []
+        self._packed = False
+        self.stats: Dict[str, Any] = {}
+
+    @classmethod
+    def for_model(cls, model: str) -> "ContextPacker":
+        """Create a packer with the budget configured for a model"""
+        budget = os.getenv("CONTEXT_TOKEN_BUDGET")
+        if budget:
+            return cls(int(budget))
+        return cls(MODEL_CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET))
+
+    def add(self, block: str, header: Optional[str], lines: List[str], priority: str):
+        """Register a group of lines under a block with a priority from PRIORITIES"""
+        if lines:
+            self._groups.append({
+                'block': block,
+                'header': header,
+                'lines': [(line, estimate_tokens(line)) for line in lines],
+                'priority': PRIORITIES.index(priority),
+                'selected': [],
+            })
+
+    def pack(self) -> Dict[str, Any]:
+        """Select lines greedily by priority until the budget is spent"""
+        remaining = self.budget_tokens
+        packed_items = dropped_items = 0
+        packed_tokens = dropped_tokens = 0
+
+        for group in sorted(self._groups, key=lambda g: g['priority']):
+            header_tokens = estimate_tokens(group['header'] or '')
+            for index, (line, tokens) in enumerate(group['lines']):
+                cost = tokens + (header_tokens if not group['selected'] else 0)
+                if cost <= remaining:
+                    group['selected'].append(index)
+                    remaining -= cost
+                    packed_tokens += cost
+                    packed_items += 1
+                else:
+                    dropped_tokens += tokens
+                    dropped_items += 1
+
+        self._packed = True
+        self.stats = {
+            'budget_tokens': self.budget_tokens,
+            'packed_tokens': packed_tokens,
+            'dropped_tokens': dropped_tokens,
+            'packed_items': packed_items,
+            'dropped_items': dropped_items,
+        }
+        if dropped_items:
+            logger.info(f"Context packer dropped {dropped_items} items ({dropped_tokens} tokens) to fit {self.budget_tokens} token budget")
+        return self.stats
+
+    def render(self, block: str) -> Optional[str]:
+        """Render the packed groups of a block, or None if nothing survived"""
+        if not self._packed:
+            self.pack()
+
+        rendered = []
+        for group in self._groups:
+            if group['block'] != block or not group['selected']:
+                continue
+            if group['header']:
+                rendered.append(group['header'])
+            rendered.extend(group['lines'][i][0] for i in group['selected'])
+        return '\n'.join(rendered) if rendered else None
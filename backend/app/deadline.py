@@ -0,0 +1,51 @@
+import time
+import math
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage can't start because the job's time budget is spent"""
+
+
+class Deadline:
+    """A job's overall time budget, handed from stage to stage.
+
+    Stages ask for what is left (optionally capped by their own default
+    timeout) instead of each applying a fixed timeout, and can carve out a
+    tighter deadline that keeps time in reserve for the stages after them.
+    """
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> "Deadline":
+        """A deadline `seconds` from now; None means no limit"""
+        return cls(math.inf if seconds is None else time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """Whether at least `seconds` are left"""
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: float) -> float:
+        """Seconds a stage may take: its usual timeout, or less if the budget is nearly spent"""
+        return min(cap, self.remaining())
+
+    def timeout_ms(self, cap_ms: float) -> float:
+        """timeout() in milliseconds, for Playwright; never 0, which Playwright reads as "no timeout\""""
+        return max(1.0, min(cap_ms, self.remaining() * 1000))
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """A tighter deadline that leaves `seconds` of this one for later stages"""
+        return Deadline(self.expires_at - seconds)
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if there is no time left to start `stage`"""
+        if self.expired():
+            raise DeadlineExceeded(f"No time left for {stage}")
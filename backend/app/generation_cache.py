@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    """Two-tier (memory + disk) cache of LLM completions keyed by a content hash.
+
+    Entries are dicts holding the cleaned completion and its token usage. The
+    memory tier is an LRU bounded by bytes; the disk tier is a directory of
+    JSON files bounded by total size and evicted oldest-first.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        ttl: float = 86400.0,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        prompt_cost_per_1k: float = 0.002,
+        completion_cost_per_1k: float = 0.01,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+
+        self._memory: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None
+        # Disk writes run in worker threads; this keeps replace-and-count atomic
+        self._disk_lock = threading.Lock()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.cost_saved = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["GenerationCache"]:
+        """Build the cache from environment settings, or None when disabled"""
+        if os.getenv("GENERATION_CACHE_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            directory=os.getenv("GENERATION_CACHE_DIR", ".cache/generations") or None,
+            ttl=float(os.getenv("GENERATION_CACHE_TTL", "86400")),
+            max_memory_bytes=int(float(os.getenv("GENERATION_CACHE_MEMORY_MB", "64")) * 1024 * 1024),
+            max_disk_bytes=int(float(os.getenv("GENERATION_CACHE_DISK_MB", "512")) * 1024 * 1024),
+            prompt_cost_per_1k=float(os.getenv("LLM_PROMPT_COST_PER_1K", "0.002")),
+            completion_cost_per_1k=float(os.getenv("LLM_COMPLETION_COST_PER_1K", "0.01")),
+        )
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, user_prompt: str, params: Dict[str, Any]) -> str:
+        """Hash everything that determines a completion into a stable cache key"""
+        payload = json.dumps(
+            {
+                'provider': provider,
+                'model': model,
+                'system': system_prompt,
+                'user': user_prompt,
+                'params': params,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a completion, checking memory before disk"""
+        entry = self._get_memory(key)
+        if entry is not None:
+            self.memory_hits += 1
+            return self._record_hit(entry)
+
+        if self.directory:
+            stored = await asyncio.to_thread(self._read_disk, key)
+            if stored is not None:
+                expires_at, entry = stored
+                self._put_memory(key, entry, expires_at)
+                self.disk_hits += 1
+                return self._record_hit(entry)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, entry: Dict[str, Any]):
+        """Store a completion in both tiers"""
+        expires_at = time.time() + self.ttl
+        self._put_memory(key, entry, expires_at)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write_disk, key, entry, expires_at)
+            except Exception as e:
+                logger.error(f"Error writing generation cache entry: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate and savings metrics"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_bytes,
+            'disk_bytes': self._disk_bytes or 0,
+            'tokens_saved': self.tokens_saved,
+            'cost_saved_usd': round(self.cost_saved, 4),
+        }
+
+    def _record_hit(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        self.hits += 1
+        usage = entry.get('usage') or {}
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+        self.tokens_saved += prompt_tokens + completion_tokens
+        self.cost_saved += (
+            prompt_tokens / 1000 * self.prompt_cost_per_1k
+            + completion_tokens / 1000 * self.completion_cost_per_1k
+        )
+        return entry
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        expires_at, size, entry = item
+        if expires_at < time.time():
+            del self._memory[key]
+            self._memory_bytes -= size
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key: str, entry: Dict[str, Any], expires_at: float):
+        size = len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (expires_at, size, entry)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, (_, evicted_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            stored = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if stored.get('expires_at', 0) < time.time():
+            self._remove_disk(path)
+            return None
+        return stored['expires_at'], stored['entry']
+
+    def _write_disk(self, key: str, entry: Dict[str, Any], expires_at: float):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({'expires_at': expires_at, 'entry': entry}, ensure_ascii=False).encode('utf-8')
+
+        # Unique per writer so concurrent sets of one key never share a temp file
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            with self._disk_lock:
+                try:
+                    previous = path.stat().st_size
+                except OSError:
+                    previous = 0
+                tmp_path.replace(path)
+                self._disk_bytes = self._scan_disk_bytes() if self._disk_bytes is None else self._disk_bytes + len(data) - previous
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _remove_disk(self, path: Path):
+        with self._disk_lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                if self._disk_bytes is not None:
+                    self._disk_bytes -= size
+            except OSError:
+                pass
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob('*/*.json'))
+
+    def _evict_disk(self):
+        """Evict the least recently written entries until well under the size bound (caller holds the disk lock)"""
+        files = sorted(self.directory.glob('*/*.json'), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.max_disk_bytes * 0.9:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+        self._disk_bytes = total
+        logger.info(f"Evicted generation cache entries, disk usage now {total} bytes")
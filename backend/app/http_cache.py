@@ -0,0 +1,97 @@
+import gzip
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli for br variants
+    brotli = None
+
+# For content-hashed URLs: the bytes behind the name never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Preferred first when the client accepts several
+ENCODING_PREFERENCE = ['br', 'gzip']
+
+# Below this, compression overhead outweighs the savings
+MIN_COMPRESS_BYTES = 256
+
+
+def precompress(data: bytes, gzip_level: int = 6, brotli_quality: int = 5) -> Dict[str, bytes]:
+    """Compressed variants of a body by content-coding, keeping only those that save bytes"""
+    variants = {'gzip': gzip.compress(data, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=brotli_quality)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into an inclusive (start, end).
+
+    Returns None when there is no usable Range header (serve the full body;
+    malformed and multi-range headers are ignored, as RFC 9110 allows) and
+    raises ValueError when the range can't be satisfied (respond 416).
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start_text, _, end_text = header[len('bytes='):].strip().partition('-')
+    if not start_text and not end_text:
+        return None
+    if (start_text and not start_text.isdigit()) or (end_text and not end_text.isdigit()):
+        return None
+
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0 or size == 0:
+            raise ValueError(f"range {header} not satisfiable for {size} bytes")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size:
+        raise ValueError(f"range {header} not satisfiable for {size} bytes")
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def choose_encoding(accept_encoding: Optional[str], available: List[str]) -> Optional[str]:
+    """Pick the best precompressed variant the client accepts, or None for identity"""
+    if not accept_encoding or not available:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    candidates = []
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            candidates.append((quality, -ENCODING_PREFERENCE.index(encoding), encoding))
+    return max(candidates)[2] if candidates else None
@@ -0,0 +1,143 @@
+import os
+import logging
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+import httpx
+
+from .rate_limiter import ProviderScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _env(provider: str, name: str, default: str) -> str:
+    """Read a provider-specific setting (GROK_X) falling back to the shared one (LLM_X)"""
+    return os.getenv(f"{provider.upper()}_{name}", os.getenv(f"LLM_{name}", default))
+
+
+@dataclass
+class LLMClientConfig:
+    """Connection pool and timeout settings for one provider"""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    total_timeout: float = 180.0
+    http2: bool = True
+    max_concurrency: int = 4
+    requests_per_minute: float = 60.0
+    tokens_per_minute: float = 200000.0
+    max_retries: int = 4
+
+    @classmethod
+    def from_env(cls, provider: str) -> "LLMClientConfig":
+        return cls(
+            max_connections=int(_env(provider, "HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(_env(provider, "HTTP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(_env(provider, "HTTP_KEEPALIVE_EXPIRY", "60")),
+            connect_timeout=float(_env(provider, "CONNECT_TIMEOUT", "10")),
+            read_timeout=float(_env(provider, "READ_TIMEOUT", "120")),
+            write_timeout=float(_env(provider, "WRITE_TIMEOUT", "30")),
+            pool_timeout=float(_env(provider, "POOL_TIMEOUT", "10")),
+            total_timeout=float(_env(provider, "TOTAL_TIMEOUT", "180")),
+            http2=_env(provider, "HTTP2", "true").lower() == "true",
+            max_concurrency=int(_env(provider, "MAX_CONCURRENCY", "4")),
+            requests_per_minute=float(_env(provider, "REQUESTS_PER_MINUTE", "60")),
+            tokens_per_minute=float(_env(provider, "TOKENS_PER_MINUTE", "200000")),
+            max_retries=int(_env(provider, "MAX_RETRIES", "4")),
+        )
+
+
+class LLMClientRegistry:
+    """Process-wide registry of pooled, keep-alive HTTP clients, one per LLM provider.
+
+    Owned by the app lifespan so DNS, TCP and TLS setup are paid once per
+    connection instead of once per generation.
+    """
+
+    def __init__(
+        self,
+        configs: Optional[Dict[str, LLMClientConfig]] = None,
+        transports: Optional[Dict[str, httpx.AsyncBaseTransport]] = None
+    ):
+        self._configs: Dict[str, LLMClientConfig] = dict(configs or {})
+        # Custom transports (e.g. httpx.ASGITransport around the mock provider) for tests and benchmarks
+        self._transports: Dict[str, httpx.AsyncBaseTransport] = dict(transports or {})
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._schedulers: Dict[str, ProviderScheduler] = {}
+
+    def config(self, provider: str) -> LLMClientConfig:
+        """Get the settings used for a provider's pool"""
+        if provider not in self._configs:
+            self._configs[provider] = LLMClientConfig.from_env(provider)
+        return self._configs[provider]
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        """Get (or lazily create) the shared client for a provider"""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self._clients[provider] = client
+        return client
+
+    def scheduler(self, provider: str) -> ProviderScheduler:
+        """Rate limits, adaptive concurrency and retries shared by every request to a provider"""
+        if provider not in self._schedulers:
+            config = self.config(provider)
+            self._schedulers[provider] = ProviderScheduler(
+                provider,
+                requests_per_minute=config.requests_per_minute,
+                tokens_per_minute=config.tokens_per_minute,
+                max_concurrency=config.max_concurrency,
+                max_retries=config.max_retries,
+            )
+        return self._schedulers[provider]
+
+    def schedulers(self) -> Dict[str, Dict[str, Any]]:
+        """Scheduler state per provider for monitoring"""
+        return {provider: scheduler.snapshot() for provider, scheduler in self._schedulers.items()}
+
+    def total_timeout(self, provider: str) -> float:
+        """Overall budget for one request, on top of httpx's per-phase timeouts"""
+        return self.config(provider).total_timeout
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        config = self.config(provider)
+
+        http2 = config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(f"h2 package not installed, falling back to HTTP/1.1 for {provider}")
+            http2 = False
+
+        logger.info(
+            f"Creating {provider} HTTP client (http2={http2}, "
+            f"max_connections={config.max_connections}, keepalive={config.max_keepalive_connections})"
+        )
+        return httpx.AsyncClient(
+            http2=http2,
+            transport=self._transports.get(provider),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.write_timeout,
+                pool=config.pool_timeout,
+            ),
+        )
+
+    async def aclose(self):
+        """Close every pooled client; called from the app lifespan on shutdown"""
+        for provider, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing {provider} HTTP client: {e}")
+        self._clients.clear()
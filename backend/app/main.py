@@ -1,32 +1,87 @@
 import os
+import json
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+from pydantic import BaseModel, HttpUrl, Field
+from typing import Optional, Dict, Any, List, Literal
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager, nullcontext
 import uuid
+import hashlib
+import mimetypes
 from dotenv import load_dotenv
 
-from .simple_scraper import SimpleWebScraper
-from .grok_cloner import GrokLLMCloner
+from .llm_clients import LLMClientRegistry
+from .generation_cache import GenerationCache
+from .clone_history import CloneHistory
+from .refiner import CloneRefiner
+from .artifacts import ArtifactStore, iter_zip, slice_chunks
+from .http_cache import etag_matches, parse_range, choose_encoding, IMMUTABLE_CACHE_CONTROL
+from .result_payloads import ResultPayloads, RESULT_FIELDS, parse_fields
+from .clone_index import CloneIndex
+from .browser_pool import BrowserPool
+from .batches import CloneBatch
+from .pipeline import ClonePipeline, build_router
+from .deadline import Deadline
+from .admission import AdmissionController, Overloaded
+from .runtime_monitor import RuntimeMonitor
+from . import tracing
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging
+# Configure logging; lines written inside a sampled trace end with its trace id
+tracing.install_log_correlation()
 logging.basicConfig(
     level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s%(trace)s"
 )
 logger = logging.getLogger(__name__)
 
+tracer = tracing.configure(tracing.Tracer.from_env())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own process-wide resources shared by every clone job"""
+    app.state.llm_clients = LLMClientRegistry()
+    app.state.generation_cache = GenerationCache.from_env()
+    app.state.clone_history = CloneHistory.from_env()
+    app.state.artifacts = ArtifactStore.from_env()
+    app.state.browser_pool = BrowserPool.from_env()
+    app.state.router = build_router(GROK_API_KEY, GEMINI_API_KEY, app.state.llm_clients, app.state.generation_cache)
+    app.state.pipeline = ClonePipeline(app.state.router, app.state.clone_history, app.state.browser_pool)
+    app.state.admission = AdmissionController.from_env(
+        app.state.pipeline,
+        app.state.browser_pool.size if app.state.browser_pool else int(os.getenv("BROWSER_POOL_SIZE", "4")),
+        lambda: sum(app.state.llm_clients.scheduler(provider).limit for provider in app.state.router.cloners)
+    )
+    app.state.runtime_monitor = RuntimeMonitor.from_env()
+    if app.state.runtime_monitor:
+        app.state.runtime_monitor.start()
+    try:
+        yield
+    finally:
+        if app.state.runtime_monitor:
+            await app.state.runtime_monitor.aclose()
+        # Stop running jobs first so they release their pages and connections cleanly
+        await cancel_tasks(list(clone_tasks.values()) + list(batch_tasks.values()))
+        await app.state.llm_clients.aclose()
+        if app.state.artifacts:
+            await app.state.artifacts.aclose()
+        if app.state.browser_pool:
+            await app.state.browser_pool.aclose()
+        await asyncio.to_thread(tracer.shutdown)
+
 app = FastAPI(
     title="AI Website Cloner",
     description="Production AI-powered website cloning service using Grok",
     version="2.1.0",
     docs_url="/docs" if os.getenv("DEBUG", "false").lower() == "true" else None,
-    redoc_url="/redoc" if os.getenv("DEBUG", "false").lower() == "true" else None
+    redoc_url="/redoc" if os.getenv("DEBUG", "false").lower() == "true" else None,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -39,19 +94,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if tracer.enabled:
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        """One server span per API request, continuing the caller's trace if it sent a traceparent header"""
+        with tracing.span(
+            f"{request.method} {request.url.path}",
+            {'http.request.method': request.method, 'url.path': request.url.path},
+            kind=tracing.SERVER,
+            parent=tracing.extract(request.headers)
+        ) as span:
+            response = await call_next(request)
+            # Name the span after the route template rather than the concrete path
+            route = request.scope.get("route")
+            if route is not None:
+                span.update_name(f"{request.method} {route.path}")
+                span.set_attribute('http.route', route.path)
+            span.set_attribute('http.response.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.set_error(f"HTTP {response.status_code}")
+            return response
+
 # In-memory storage for clone results (in production, consider using Redis or a database)
 clone_results: Dict[str, "CloneResult"] = {}
 
+# Sorted indexes over clone_results for paginated listing; updated on every create, status change and delete
+clone_index = CloneIndex(max_scan=int(os.getenv("CLONE_LIST_MAX_SCAN", "1000")))
+
+# Scrape data per finished LLM clone, kept so refinements don't re-scrape
+clone_contexts: Dict[str, Dict[str, Any]] = {}
+refine_locks: Dict[str, asyncio.Lock] = {}
+
+# Running job tasks, so a delete (or shutdown) can cancel them
+clone_tasks: Dict[str, asyncio.Task] = {}
+CLONE_JOB_TIMEOUT = float(os.getenv("CLONE_JOB_TIMEOUT", "600"))
+# Stages wind down on their own at the deadline; the job is only cancelled if that overruns by this much
+DEADLINE_GRACE_SECONDS = float(os.getenv("DEADLINE_GRACE_SECONDS", "15"))
+CANCEL_GRACE_SECONDS = 5
+
+# Batches by id; their jobs live in clone_results like any other clone
+clone_batches: Dict[str, CloneBatch] = {}
+batch_tasks: Dict[str, asyncio.Task] = {}
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "500"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+# Finished batches are kept this long (seconds), and only the newest this many of them
+BATCH_RETENTION = float(os.getenv("BATCH_RETENTION", "86400"))
+BATCH_MAX_FINISHED = int(os.getenv("BATCH_MAX_FINISHED", "100"))
+
+# Encoded (and precompressed) result bodies per completed clone, replaced on every new version
+result_payloads: Dict[str, ResultPayloads] = {}
+
 # Environment configuration
 GROK_API_KEY = os.getenv("GROK_API_KEY")
 if not GROK_API_KEY:
     logger.error("GROK_API_KEY environment variable is not set")
     raise ValueError("GROK_API_KEY environment variable is required")
 
+# Optional second provider for latency-based routing and hedging
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
 # Pydantic models
 class CloneRequest(BaseModel):
     url: HttpUrl
     enhanced: bool = True
+    generation_mode: Literal["single", "sectioned", "incremental"] = "single"
+    mode: Literal["llm", "snapshot"] = "llm"
+    priority: Literal["interactive", "bulk"] = "interactive"
+
+class BatchCloneRequest(BaseModel):
+    urls: List[HttpUrl] = Field(..., min_length=1)
+    generation_mode: Literal["single", "sectioned", "incremental"] = "single"
+    mode: Literal["llm", "snapshot"] = "llm"
+    concurrency: Optional[int] = Field(None, ge=1)
 
 class CloneResponse(BaseModel):
     clone_id: str
@@ -59,6 +173,9 @@ class CloneResponse(BaseModel):
     message: str
     url: str
     created_at: str
+    queue_position: Optional[int] = None
+    estimated_start_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None
 
 class CloneResult(BaseModel):
     clone_id: str
@@ -71,6 +188,11 @@ class CloneResult(BaseModel):
     javascript: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    mode: str = "llm"
+
+class RefineRequest(BaseModel):
+    selector: str
+    instruction: str
 
 class CloneStatus(BaseModel):
     clone_id: str
@@ -79,6 +201,9 @@ class CloneStatus(BaseModel):
     created_at: str
     completed_at: Optional[str] = None
     has_result: bool
+    queue_position: Optional[int] = None
+    estimated_start_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None
 
 class CloneListItem(BaseModel):
     clone_id: str
@@ -87,6 +212,10 @@ class CloneListItem(BaseModel):
     created_at: str
     completed_at: Optional[str] = None
 
+class CloneListPage(BaseModel):
+    items: List[CloneListItem]
+    next_cursor: Optional[str] = None
+
 @app.get("/")
 def read_root():
     """Root endpoint with API information"""
@@ -98,6 +227,10 @@ def read_root():
             "clone": "/clone",
             "status": "/clone/{clone_id}/status",
             "result": "/clone/{clone_id}/result",
+            "result_field": "/clone/{clone_id}/result/{field}",
+            "refine": "/clone/{clone_id}/refine",
+            "archive": "/clone/{clone_id}/archive",
+            "preview": "/preview/{clone_id}/",
             "health": "/health"
         }
     }
@@ -109,39 +242,52 @@ def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "version": "2.1.0",
-        "active_clones": len([r for r in clone_results.values() if r.status == "processing"])
+        "active_clones": len([r for r in clone_results.values() if r.status == "processing"]),
+        "generation_cache": app.state.generation_cache.stats() if app.state.generation_cache else None,
+        "providers": app.state.router.snapshot(),
+        "schedulers": app.state.llm_clients.schedulers(),
+        "browser_pool": app.state.browser_pool.stats() if app.state.browser_pool else None,
+        "admission": app.state.admission.stats() if app.state.admission else None,
+        "runtime": app.state.runtime_monitor.stats() if app.state.runtime_monitor else None
     }
 
 @app.post("/clone", response_model=CloneResponse)
-async def clone_website(request: CloneRequest, background_tasks: BackgroundTasks):
+async def clone_website(request: CloneRequest, http_request: Request):
     """Start website cloning process"""
+    admission = app.state.admission
+    client = client_id(http_request)
+    if admission:
+        check_admission(admission, 1, request.mode, client)
+    
     try:
         clone_id = str(uuid.uuid4())
         url_str = str(request.url)
+        status = "queued" if admission else "processing"
         
         logger.info(f"Starting clone process for URL: {url_str}, Clone ID: {clone_id}")
         
         # Initialize clone result
         clone_results[clone_id] = CloneResult(
             clone_id=clone_id,
-            status="processing",
+            status=status,
             url=url_str,
-            created_at=datetime.now().isoformat()
+            created_at=datetime.now().isoformat(),
+            mode=request.mode
         )
+        clone_index.add(clone_id, url_str, clone_results[clone_id].created_at, status)
         
-        # Start background task
-        background_tasks.add_task(
-            process_clone, 
-            clone_id, 
-            url_str
-        )
+        # Start the job as a tracked task so it can be cancelled; it waits its turn in the admission queue
+        if admission:
+            admission.enqueue(clone_id, client, request.priority, request.mode)
+        start_clone(clone_id, url_str, request.generation_mode, request.mode)
         
         return CloneResponse(
             clone_id=clone_id,
-            status="processing",
+            status=status,
             message="Website cloning started. Use the clone_id to check status.",
             url=url_str,
-            created_at=clone_results[clone_id].created_at
+            created_at=clone_results[clone_id].created_at,
+            **queue_estimate(clone_id)
         )
         
     except Exception as e:
@@ -161,42 +307,80 @@ async def get_clone_status(clone_id: str):
         url=result.url,
         created_at=result.created_at,
         completed_at=result.completed_at,
-        has_result=result.html is not None
+        has_result=result.html is not None,
+        **queue_estimate(clone_id)
     )
 
+def client_id(request: Request) -> str:
+    """Who a request comes from, for fair scheduling: its API key (hashed), else its Origin, else its address"""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return f"key:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+    origin = request.headers.get("origin")
+    if origin:
+        return f"origin:{origin}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def check_admission(admission: AdmissionController, jobs: int, mode: str, client: str):
+    """Refuse new work with 429 and Retry-After when over capacity"""
+    try:
+        admission.check(jobs, mode, client)
+    except Overloaded as e:
+        logger.warning(f"Rejecting {jobs} clone job(s) from {client}: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def queue_estimate(clone_id: str) -> Dict[str, Any]:
+    """Live queue position and ETA for an unfinished clone"""
+    admission = app.state.admission
+    result = clone_results[clone_id]
+    if not admission or result.status not in ("queued", "processing"):
+        return {}
+    position = admission.position(clone_id)
+    if position is None and result.status == "queued":
+        # Waiting on its batch rather than in the admission queue
+        return {}
+    return admission.estimate(position, result.mode, admission.started_at(clone_id))
+
 @app.get("/clone/{clone_id}/result")
-async def get_clone_result(clone_id: str):
-    """Get the complete result of a cloning process"""
+async def get_clone_result(clone_id: str, request: Request, fields: Optional[str] = None):
+    """Get the result of a cloning process, optionally only some fields (?fields=html,css)"""
     if clone_id not in clone_results:
         raise HTTPException(status_code=404, detail="Clone not found")
     
     result = clone_results[clone_id]
     
-    if result.status == "processing":
+    if result.status == "error":
         return {
             "clone_id": result.clone_id,
-            "status": "processing",
-            "message": "Clone is still being processed"
+            "status": "error",
+            "error": result.error
         }
     
-    if result.status == "error":
+    # Queued and running jobs have no output yet: don't build (and cache) payloads for them
+    if result.status != "completed":
         return {
             "clone_id": result.clone_id,
-            "status": "error",
-            "error": result.error
+            "status": result.status,
+            "message": "Clone is still being processed"
         }
     
-    return {
-        "clone_id": result.clone_id,
-        "status": result.status,
-        "url": result.url,
-        "created_at": result.created_at,
-        "completed_at": result.completed_at,
-        "html": result.html,
-        "css": result.css,
-        "javascript": result.javascript,
-        "metadata": result.metadata
-    }
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return get_result_payloads(clone_id).json(selected).response(request)
+
+@app.get("/clone/{clone_id}/result/{field}")
+async def get_clone_result_field(clone_id: str, field: str, request: Request):
+    """Get one field of a completed clone as its own document (e.g. the HTML as text/html)"""
+    if clone_id not in clone_results:
+        raise HTTPException(status_code=404, detail="Clone not found")
+    if field not in RESULT_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown result field: {field}")
+    if clone_results[clone_id].status != "completed":
+        raise HTTPException(status_code=409, detail="Clone is not completed")
+    
+    return get_result_payloads(clone_id).raw(field).response(request)
 
 @app.delete("/clone/{clone_id}")
 async def delete_clone_result(clone_id: str):
@@ -205,63 +389,436 @@ async def delete_clone_result(clone_id: str):
         raise HTTPException(status_code=404, detail="Clone not found")
     
     logger.info(f"Deleting clone result: {clone_id}")
+    task = clone_tasks.get(clone_id)
+    if task:
+        # Wait for the job to unwind so its browser slot and connections are free when we return
+        logger.info(f"Cancelling running clone {clone_id}")
+        await cancel_tasks([task])
     del clone_results[clone_id]
+    clone_index.remove(clone_id)
+    clone_contexts.pop(clone_id, None)
+    refine_locks.pop(clone_id, None)
+    result_payloads.pop(clone_id, None)
+    if app.state.artifacts:
+        await app.state.artifacts.remove(clone_id)
+    for batch in clone_batches.values():
+        batch.forget(clone_id)
+    prune_batches()
     return {"message": "Clone result deleted successfully"}
 
-@app.get("/clones", response_model=List[CloneListItem])
-async def list_clones():
-    """List all clone results"""
-    return [
-        CloneListItem(
+@app.post("/clone/{clone_id}/refine")
+async def refine_clone(clone_id: str, request: RefineRequest):
+    """Regenerate one element of a finished clone from an instruction"""
+    if clone_id not in clone_results:
+        raise HTTPException(status_code=404, detail="Clone not found")
+    if clone_results[clone_id].status != "completed":
+        raise HTTPException(status_code=409, detail="Clone is not completed")
+    
+    # Serialize refinements of the same clone so concurrent patches don't overwrite each other
+    async with refine_locks.setdefault(clone_id, asyncio.Lock()):
+        result = clone_results[clone_id]
+        logger.info(f"Refining {request.selector} of clone {clone_id}")
+        refined = await CloneRefiner(app.state.router).refine(
+            {'html': result.html, 'css': result.css, 'javascript': result.javascript},
+            clone_contexts.get(clone_id, {}),
+            request.selector,
+            request.instruction
+        )
+        if clone_id not in clone_results:
+            raise HTTPException(status_code=404, detail="Clone was deleted during refinement")
+        if 'error' in refined:
+            logger.error(f"Refinement failed for clone {clone_id}: {refined['error']}")
+            status_code = 404 if refined['error'].startswith("Selector") else 502
+            raise HTTPException(status_code=status_code, detail=refined['error'])
+        
+        metadata = dict(result.metadata or {})
+        metadata['refinements'] = metadata.get('refinements', []) + [refined['refinement']]
+        store_clone_result(clone_id, {**refined, 'metadata': metadata})
+        await warm_result_payloads(clone_id)
+        await write_artifacts(clone_id)
+    
+    return {
+        "clone_id": clone_id,
+        "status": "completed",
+        "selector": request.selector,
+        "fragment": refined['fragment'],
+        "refinement": refined['refinement']
+    }
+
+@app.get("/clone/{clone_id}/archive")
+async def get_clone_archive(clone_id: str, request: Request):
+    """Stream a ZIP of the clone's files (index.html, styles.css, script.js, assets/)"""
+    if clone_id not in clone_results:
+        raise HTTPException(status_code=404, detail="Clone not found")
+    if clone_results[clone_id].status != "completed":
+        raise HTTPException(status_code=409, detail="Clone is not completed")
+    store = app.state.artifacts
+    if store is None:
+        raise HTTPException(status_code=404, detail="Artifacts are disabled")
+    
+    manifest = await store.manifest(clone_id)
+    if manifest is None:
+        manifest = await store.write(clone_id, clone_results[clone_id].model_dump())
+    
+    etag = manifest['etag']
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    size = await store.archive_size(clone_id, manifest)
+    files = store.files(clone_id, manifest)
+    headers["Content-Disposition"] = f'attachment; filename="clone-{clone_id}.zip"'
+    
+    # Ranges only apply to the version the client already has part of
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        return StreamingResponse(
+            iter_zip(files),
+            media_type="application/zip",
+            headers={**headers, "Content-Length": str(size)}
+        )
+    
+    start, end = byte_range
+    return StreamingResponse(
+        slice_chunks(iter_zip(files), start, end),
+        status_code=206,
+        media_type="application/zip",
+        headers={**headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"}
+    )
+
+@app.get("/preview/{clone_id}")
+async def preview_root(clone_id: str):
+    """Redirect to the preview directory so relative asset URLs resolve"""
+    return RedirectResponse(f"/preview/{clone_id}/", status_code=308)
+
+@app.get("/preview/{clone_id}/{path:path}")
+async def preview_clone(clone_id: str, path: str, request: Request):
+    """Serve a clone's files for previewing, with strong ETags and precompressed variants"""
+    store = app.state.artifacts
+    if clone_id not in clone_results or store is None:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    manifest = await store.manifest(clone_id)
+    path = path or "index.html"
+    # Only files listed in the manifest are served, which also rules out path traversal
+    if manifest is None or path not in manifest['files']:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    
+    variants = manifest.get('variants', {}).get(path, {})
+    encoding = choose_encoding(request.headers.get("accept-encoding"), list(variants))
+    digest = manifest['files'][path][:32]
+    etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+    
+    headers = {
+        "ETag": etag,
+        # Assets have content-hashed names; the entry files keep their names and must revalidate
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if path.startswith("assets/") else "no-cache",
+    }
+    if variants:
+        headers["Vary"] = "Accept-Encoding"
+    if path.endswith(".html"):
+        # Generated markup runs in an opaque origin, away from the API's
+        headers["Content-Security-Policy"] = "sandbox allow-scripts allow-forms allow-popups"
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    file_path = store.path(clone_id) / (variants[encoding] if encoding else path)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return FileResponse(file_path, media_type=media_type, headers=headers)
+
+@app.get("/clones", response_model=CloneListPage)
+async def list_clones(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[Literal["queued", "processing", "completed", "error"]] = None,
+    url_prefix: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+):
+    """List clone results newest first, one page at a time; pass next_cursor back as cursor for the next page"""
+    try:
+        ids, next_cursor = clone_index.page(
+            limit,
+            cursor=cursor,
+            status=status,
+            url_prefix=url_prefix,
+            created_after=index_timestamp(created_after),
+            created_before=index_timestamp(created_before)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    items = []
+    for clone_id in ids:
+        result = clone_results[clone_id]
+        items.append(CloneListItem(
             clone_id=result.clone_id,
             status=result.status,
             url=result.url,
             created_at=result.created_at,
             completed_at=result.completed_at
+        ))
+    return CloneListPage(items=items, next_cursor=next_cursor)
+
+def index_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Match created_at's format (local time, no offset) so index comparisons line up"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat()
+
+@app.post("/clones/batch")
+async def create_batch(request: BatchCloneRequest, http_request: Request):
+    """Clone many URLs as one batch: duplicates are cloned once, at most `concurrency` jobs run at a time"""
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {BATCH_MAX_URLS} URLs")
+    
+    # Never run more jobs than the browser pool has slots; extra jobs would only queue on it
+    limit = app.state.browser_pool.size if app.state.browser_pool else BATCH_MAX_CONCURRENCY
+    concurrency = min(request.concurrency or limit, limit, BATCH_MAX_CONCURRENCY)
+    # Up to `concurrency` of the batch's jobs wait in the admission queue at a time
+    client = client_id(http_request)
+    if app.state.admission:
+        check_admission(app.state.admission, concurrency, request.mode, client)
+    batch = CloneBatch(str(uuid.uuid4()), [str(url) for url in request.urls], concurrency)
+    prune_batches()
+    clone_batches[batch.batch_id] = batch
+    
+    for job in batch.jobs:
+        clone_results[job['clone_id']] = CloneResult(
+            clone_id=job['clone_id'],
+            status="queued",
+            url=job['url'],
+            created_at=batch.created_at,
+            mode=request.mode
         )
-        for result in clone_results.values()
-    ]
+        clone_index.add(job['clone_id'], job['url'], batch.created_at, "queued")
+    
+    logger.info(f"Starting batch {batch.batch_id}: {len(batch.jobs)} clones ({len(batch.items)} URLs), concurrency {concurrency}")
+    batch_tasks[batch.batch_id] = asyncio.create_task(
+        run_batch(batch, request.generation_mode, request.mode, client)
+    )
+    batch_tasks[batch.batch_id].add_done_callback(lambda _: batch_tasks.pop(batch.batch_id, None))
+    return batch_summary(batch)
+
+@app.get("/clones/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    """Aggregate progress and per-item status of a batch"""
+    if batch_id not in clone_batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch_summary(clone_batches[batch_id])
+
+@app.get("/clones/batch/{batch_id}/results")
+async def stream_batch_results(batch_id: str, include_result: bool = False):
+    """NDJSON feed with one line per clone as it finishes (finished ones first); ends when the batch does"""
+    if batch_id not in clone_batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch = clone_batches[batch_id]
+    
+    async def lines():
+        async for record in batch.follow():
+            line = dict(record)
+            result = clone_results.get(record['clone_id'])
+            if include_result and result and result.status == "completed":
+                line.update(html=result.html, css=result.css, javascript=result.javascript, metadata=result.metadata)
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def batch_summary(batch: CloneBatch) -> Dict[str, Any]:
+    """Batch progress built from the current status of each of its clones"""
+    statuses = {}
+    for job in batch.jobs:
+        result = clone_results.get(job['clone_id'])
+        statuses[job['clone_id']] = result.status if result else "deleted"
+    
+    counts: Dict[str, int] = {}
+    for status in statuses.values():
+        counts[status] = counts.get(status, 0) + 1
+    finished = sum(counts.get(status, 0) for status in ("completed", "error", "deleted"))
+    
+    items = []
+    for item in batch.items:
+        result = clone_results.get(item['clone_id'])
+        items.append({
+            **item,
+            "status": statuses[item['clone_id']],
+            "error": result.error if result else None
+        })
+    return {
+        "batch_id": batch.batch_id,
+        "status": "completed" if batch.done else "processing",
+        "created_at": batch.created_at,
+        "completed_at": batch.completed_at,
+        "concurrency": batch.concurrency,
+        "total": len(batch.jobs),
+        "duplicates": len(batch.items) - len(batch.jobs),
+        "counts": counts,
+        # Every member may have been deleted
+        "progress": round(finished / len(batch.jobs), 3) if batch.jobs else 1.0,
+        "items": items
+    }
 
-async def process_clone(clone_id: str, url: str):
+async def run_batch(batch: CloneBatch, generation_mode: str, mode: str, client: str):
+    """Run a batch's clones with bounded concurrency, publishing each one as it finishes"""
+    slots = asyncio.Semaphore(batch.concurrency)
+    
+    async def run(job: Dict[str, str]):
+        clone_id = job['clone_id']
+        try:
+            async with slots:
+                # Deleted while queued
+                if clone_id in clone_results:
+                    # Scheduled against other clients' work as the batch's client; batches are always
+                    # bulk, so a large batch can't take the run slots reserved for interactive clones
+                    if app.state.admission:
+                        app.state.admission.enqueue(clone_id, client, "bulk", mode)
+                    # asyncio.wait doesn't raise if a delete cancels the job
+                    await asyncio.wait({start_clone(clone_id, job['url'], generation_mode, mode)})
+        finally:
+            result = clone_results.get(clone_id)
+            await batch.record({
+                "clone_id": clone_id,
+                "url": job['url'],
+                "status": result.status if result else "deleted",
+                "error": result.error if result else None,
+                "completed_at": result.completed_at if result else None
+            })
+    
+    try:
+        await asyncio.gather(*(run(job) for job in batch.jobs), return_exceptions=True)
+    finally:
+        await batch.finish()
+        logger.info(f"Batch {batch.batch_id} finished")
+        prune_batches()
+
+def prune_batches():
+    """Forget finished batches past BATCH_RETENTION, beyond the newest BATCH_MAX_FINISHED, or left empty by deletes.
+
+    Only the batch records go; their clones stay until deleted themselves.
+    """
+    cutoff = (datetime.now() - timedelta(seconds=BATCH_RETENTION)).isoformat()
+    finished = sorted((b for b in clone_batches.values() if b.done), key=lambda b: b.completed_at, reverse=True)
+    for position, batch in enumerate(finished):
+        if position >= BATCH_MAX_FINISHED or batch.completed_at < cutoff or not batch.jobs:
+            del clone_batches[batch.batch_id]
+            logger.info(f"Pruned finished batch {batch.batch_id}")
+
+def start_clone(clone_id: str, url: str, generation_mode: str, mode: str) -> asyncio.Task:
+    """Run a clone job as a tracked task"""
+    task = asyncio.create_task(process_clone(clone_id, url, generation_mode, mode))
+    clone_tasks[clone_id] = task
+    
+    def forget(_):
+        if clone_tasks.get(clone_id) is task:
+            del clone_tasks[clone_id]
+    task.add_done_callback(forget)
+    return task
+
+async def cancel_tasks(tasks: List[asyncio.Task]):
+    """Cancel tasks and give them a moment to run their cleanup (closing pages, releasing slots)"""
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.wait(tasks, timeout=CANCEL_GRACE_SECONDS)
+
+async def process_clone(clone_id: str, url: str, generation_mode: str = "single", mode: str = "llm"):
     """Background task for website cloning"""
+    with tracing.span(
+        "clone.job",
+        {'clone.id': clone_id, 'clone.url': url, 'clone.mode': mode, 'clone.generation_mode': generation_mode}
+    ) as job_span:
+        queue_wait = tracing.span(
+            "clone.queue_wait",
+            {'admission.queue_position': app.state.admission.position(clone_id) if app.state.admission else None}
+        )
+        try:
+            logger.info(f"Processing clone for URL: {url}, Clone ID: {clone_id}")
+            
+            # Wait for a run slot first, so time spent queued doesn't count against the deadline
+            async with (app.state.admission.slot(clone_id) if app.state.admission else nullcontext()):
+                queue_wait.end()
+                clone_results[clone_id].status = "processing"
+                clone_index.set_status(clone_id, "processing")
+                
+                # Each stage gets what is left of the deadline and degrades instead of failing when it runs short;
+                # the hard timeout only fires if that overruns, and cancels the pipeline (closing its page, aborting LLM requests)
+                deadline = Deadline.after(CLONE_JOB_TIMEOUT)
+                async with asyncio.timeout(CLONE_JOB_TIMEOUT + DEADLINE_GRACE_SECONDS):
+                    if mode == "snapshot":
+                        clone_result = await app.state.pipeline.snapshot(url, deadline)
+                    else:
+                        clone_result, scraping_data = await app.state.pipeline.generate(url, generation_mode, deadline)
+                        # The screenshot is only needed for generation
+                        clone_contexts[clone_id] = {k: v for k, v in scraping_data.items() if k != 'screenshot'}
+            
+            store_clone_result(clone_id, clone_result)
+            await warm_result_payloads(clone_id)
+            await write_artifacts(clone_id)
+            
+            logger.info(f"Clone process completed successfully for {url}")
+            
+        except TimeoutError:
+            logger.error(f"Clone process for {url} timed out after {CLONE_JOB_TIMEOUT:g}s")
+            job_span.set_error(f"timed out after {CLONE_JOB_TIMEOUT:g}s")
+            mark_clone_failed(clone_id, f"Clone timed out after {CLONE_JOB_TIMEOUT:g}s")
+        except Exception as e:
+            logger.error(f"Error in clone process for {url}: {str(e)}")
+            job_span.record_exception(e)
+            mark_clone_failed(clone_id, str(e))
+        finally:
+            # Covers jobs cancelled or rejected while still queued
+            queue_wait.end()
+
+def mark_clone_failed(clone_id: str, error: str):
+    """Record a failed clone"""
+    clone_results[clone_id].status = "error"
+    clone_results[clone_id].error = error
+    clone_results[clone_id].completed_at = datetime.now().isoformat()
+    clone_index.set_status(clone_id, "error")
+
+def store_clone_result(clone_id: str, clone_result: Dict[str, Any]):
+    """Record generated output on a clone and mark it completed"""
+    clone_results[clone_id].status = "completed"
+    clone_results[clone_id].completed_at = datetime.now().isoformat()
+    clone_index.set_status(clone_id, "completed")
+    clone_results[clone_id].html = clone_result.get('html', '')
+    clone_results[clone_id].css = clone_result.get('css', '')
+    clone_results[clone_id].javascript = clone_result.get('javascript', '')
+    clone_results[clone_id].metadata = clone_result.get('metadata', {})
+    result_payloads[clone_id] = ResultPayloads(clone_results[clone_id].model_dump())
+
+def get_result_payloads(clone_id: str) -> ResultPayloads:
+    """Encoded bodies for a completed clone, built lazily if warming hasn't run yet"""
+    if clone_id not in result_payloads:
+        result_payloads[clone_id] = ResultPayloads(clone_results[clone_id].model_dump())
+    return result_payloads[clone_id]
+
+async def warm_result_payloads(clone_id: str):
+    """Serialize and compress the common result bodies once, off the event loop"""
     try:
-        logger.info(f"Processing clone for URL: {url}, Clone ID: {clone_id}")
-        
-        # Step 1: Scrape website
-        logger.info(f"Starting scraping for {url}")
-        async with SimpleWebScraper() as scraper:
-            scraping_data = await scraper.scrape_website(url)
-        
-        if 'error' in scraping_data:
-            raise Exception(f"Scraping failed: {scraping_data['error']}")
-        
-        logger.info(f"Scraping completed for {url}")
-        
-        # Step 2: Generate clone
-        logger.info(f"Starting clone generation for {url}")
-        cloner = GrokLLMCloner(GROK_API_KEY)
-        clone_result = await cloner.clone_website(scraping_data)
-        
-        if 'error' in clone_result:
-            raise Exception(f"Clone generation failed: {clone_result['error']}")
-        
-        logger.info(f"Clone generation completed for {url}")
-        
-        # Update result
-        clone_results[clone_id].status = "completed"
-        clone_results[clone_id].completed_at = datetime.now().isoformat()
-        clone_results[clone_id].html = clone_result.get('html', '')
-        clone_results[clone_id].css = clone_result.get('css', '')
-        clone_results[clone_id].javascript = clone_result.get('javascript', '')
-        clone_results[clone_id].metadata = clone_result.get('metadata', {})
-        
-        logger.info(f"Clone process completed successfully for {url}")
-        
+        await asyncio.to_thread(get_result_payloads(clone_id).warm)
+    except Exception as e:
+        logger.error(f"Failed to precompress result for clone {clone_id}: {str(e)}")
+
+async def write_artifacts(clone_id: str):
+    """Write a completed clone's files for export; failures only cost the export, not the clone"""
+    if not app.state.artifacts:
+        return
+    try:
+        await app.state.artifacts.write(clone_id, clone_results[clone_id].model_dump())
     except Exception as e:
-        logger.error(f"Error in clone process for {url}: {str(e)}")
-        clone_results[clone_id].status = "error"
-        clone_results[clone_id].error = str(e)
-        clone_results[clone_id].completed_at = datetime.now().isoformat()
+        logger.error(f"Failed to write artifacts for clone {clone_id}: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
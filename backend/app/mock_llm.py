@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import random
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .context_packer import estimate_tokens
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+MOCK_DOCUMENT = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Mock Clone</title>
+<style>
+:root { --primary: #1a73e8; --text: #202124; }
+body { margin: 0; font-family: Arial, sans-serif; color: var(--text); }
+header, footer { padding: 16px 32px; background: var(--primary); color: #fff; }
+section { padding: 32px; }
+</style>
+</head>
+<body>
+<header><nav><a href="/">Home</a></nav></header>
+<main>
+{sections}
+</main>
+<footer><p>Generated by the mock LLM provider</p></footer>
+<script>
+document.querySelectorAll('a').forEach(a => a.addEventListener('click', () => {}));
+</script>
+</body>
+</html>"""
+
+
+class MockLLMProvider:
+    """Local OpenAI-compatible chat completions server for tests and benchmarks.
+
+    Simulates latency (time to first token plus a token generation rate),
+    truncation at max_tokens, and throttling: every Nth request, or any request
+    beyond a per-minute limit, gets a 429 with Retry-After. Use `app` with
+    httpx.ASGITransport in-process, or run `python -m app.mock_llm` as a server.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        tokens_per_second: float = 2000.0,
+        completion_tokens: int = 1500,
+        rate_limit_every: int = 0,
+        requests_per_minute: int = 0,
+        retry_after: float = 1.0,
+        error_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.rate_limit_every = rate_limit_every
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._window: list = []
+
+        self.app = FastAPI(title="Mock LLM Provider")
+        self.app.post("/v1/chat/completions")(self.chat_completions)
+        self.app.get("/stats")(self.stats)
+
+    @classmethod
+    def from_env(cls) -> "MockLLMProvider":
+        return cls(
+            latency=float(os.getenv("MOCK_LLM_LATENCY", "0.2")),
+            tokens_per_second=float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "2000")),
+            completion_tokens=int(os.getenv("MOCK_LLM_COMPLETION_TOKENS", "1500")),
+            rate_limit_every=int(os.getenv("MOCK_LLM_RATE_LIMIT_EVERY", "0")),
+            requests_per_minute=int(os.getenv("MOCK_LLM_REQUESTS_PER_MINUTE", "0")),
+            retry_after=float(os.getenv("MOCK_LLM_RETRY_AFTER", "1")),
+            error_rate=float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+        )
+
+    async def chat_completions(self, request: Request):
+        # Joins the caller's trace when the process was started with tracing enabled
+        with tracing.span("mock_llm.chat_completions", kind=tracing.SERVER, parent=tracing.extract(request.headers)):
+            return await self._chat_completions(request)
+
+    async def _chat_completions(self, request: Request):
+        body: Dict[str, Any] = await request.json()
+        self.requests += 1
+
+        throttle = self._should_throttle()
+        if throttle:
+            self.throttled += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"Retry-After": f"{self.retry_after:g}"}
+            )
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return JSONResponse({"error": {"message": "Service unavailable"}}, status_code=503)
+
+        messages = body.get("messages", [])
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        max_tokens = int(body.get("max_tokens") or self.completion_tokens)
+        completion_tokens = min(self.completion_tokens, max_tokens)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency + completion_tokens / self.tokens_per_second)
+        finally:
+            self.in_flight -= 1
+
+        content = self._render(self.completion_tokens)
+        finish_reason = "stop"
+        if completion_tokens < self.completion_tokens:
+            # Cut the document proportionally, like a real model hitting max_tokens
+            content = content[:int(len(content) * completion_tokens / self.completion_tokens)]
+            finish_reason = "length"
+
+        return {
+            "id": f"mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    async def stats(self):
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "errors": self.errors,
+            "max_in_flight": self.max_in_flight,
+        }
+
+    def _should_throttle(self) -> bool:
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            return True
+        if self.requests_per_minute:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 60]
+            if len(self._window) >= self.requests_per_minute:
+                return True
+            self._window.append(now)
+        return False
+
+    def _render(self, tokens: int) -> str:
+        """A valid document padded with sections to roughly `tokens` tokens"""
+        section = "<section><h2>Mock section</h2><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></section>"
+        base = estimate_tokens(MOCK_DOCUMENT)
+        count = max(1, (tokens - base) // max(1, estimate_tokens(section)))
+        return MOCK_DOCUMENT.replace("{sections}", "\n".join([section] * count))
+
+
+def create_app(provider: Optional[MockLLMProvider] = None) -> FastAPI:
+    return (provider or MockLLMProvider.from_env()).app
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the mock OpenAI-compatible LLM provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    tracer = tracing.configure(tracing.Tracer.from_env())
+    try:
+        uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+    finally:
+        tracer.shutdown()
@@ -0,0 +1,170 @@
+import re
+from typing import Dict, List
+
+# Script types that hold executable JavaScript (anything else, e.g. JSON-LD, stays in the HTML)
+JS_SCRIPT_TYPES = {'', 'text/javascript', 'application/javascript', 'module', 'text/ecmascript'}
+
+# Longest token that may straddle two chunks ("</script" plus slack); held back until more input arrives
+_HOLDBACK = 9
+
+# Everything the text state reacts to. Literal alternatives only, so the scan never backtracks.
+_TEXT_EVENTS = re.compile(r'<(?:style|script)(?=[\s>/])|<!--|^```', re.IGNORECASE | re.MULTILINE)
+_ATTR = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*(?:=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+TEXT, STYLE, SCRIPT, RAW_SCRIPT, COMMENT = 'text', 'style', 'script', 'raw_script', 'comment'
+_CLOSING = {STYLE: '</style', SCRIPT: '</script', RAW_SCRIPT: '</script'}
+
+
+class OutputSplitter:
+    """Split LLM output into html, css and javascript buckets in one linear pass.
+
+    Feed chunks as they stream in; only a few trailing characters (or an
+    unfinished tag) are held back between chunks. Markdown code fence lines
+    are dropped, every <style> block goes to css, every inline executable
+    <script> goes to javascript, and everything else (including <script src>
+    tags, JSON-LD and HTML comments) stays in the html.
+    """
+
+    def __init__(self):
+        self._carry = ''
+        self._at_line_start = True
+        self._state = TEXT
+        self._html: List[str] = []
+        self._css: List[List[str]] = []
+        self._js: List[List[str]] = []
+
+    @classmethod
+    def split(cls, content: str) -> Dict[str, str]:
+        """Split a complete document"""
+        splitter = cls()
+        splitter.feed(content)
+        return splitter.close()
+
+    def feed(self, chunk: str):
+        """Consume a chunk of streamed output"""
+        self._consume(self._carry + chunk, final=False)
+
+    def close(self) -> Dict[str, str]:
+        """Flush held-back input and return the buckets"""
+        carry, self._carry = self._carry, ''
+        self._consume(carry, final=True)
+        return {
+            'html': ''.join(self._html).strip(),
+            'css': self._join_blocks(self._css),
+            'javascript': self._join_blocks(self._js),
+        }
+
+    def _consume(self, data: str, final: bool):
+        pos = 0
+        end = len(data)
+        lower = None
+
+        while pos < end:
+            if self._state == TEXT:
+                match = _TEXT_EVENTS.search(data, pos)
+                if match and match.start() == 0 and match.group(0) == '```' and not self._at_line_start:
+                    # Position 0 is only a line start if the held-back text began one
+                    match = _TEXT_EVENTS.search(data, 1)
+                if match is None:
+                    keep = 0 if final else min(_HOLDBACK, end - pos)
+                    self._html.append(data[pos:end - keep])
+                    pos = end - keep
+                    break
+
+                start = match.start()
+                self._html.append(data[pos:start])
+                token = match.group(0)
+                if token == '```':
+                    # Code fences (```html, ```) are only markup from the chat format
+                    newline = data.find('\n', start)
+                    if newline == -1:
+                        pos = end if final else start
+                        break
+                    pos = newline + 1
+                elif token == '<!--':
+                    self._html.append(token)
+                    self._state = COMMENT
+                    pos = match.end()
+                else:
+                    gt = data.find('>', match.end())
+                    if gt == -1:
+                        if final:
+                            self._html.append(data[start:])
+                            pos = end
+                        else:
+                            # Unfinished tag: wait for the rest of it
+                            pos = start
+                        break
+                    self._open_tag(token[1:].lower(), data[start:gt + 1], data[match.end():gt])
+                    pos = gt + 1
+
+            elif self._state == COMMENT:
+                close = data.find('-->', pos)
+                if close == -1:
+                    keep = 0 if final else min(2, end - pos)
+                    self._html.append(data[pos:end - keep])
+                    pos = end - keep
+                    break
+                self._html.append(data[pos:close + 3])
+                self._state = TEXT
+                pos = close + 3
+
+            else:
+                if lower is None:
+                    lower = data.lower()
+                close = lower.find(_CLOSING[self._state], pos)
+                if close == -1:
+                    keep = 0 if final else min(_HOLDBACK, end - pos)
+                    self._append_body(data[pos:end - keep])
+                    pos = end - keep
+                    break
+                gt = data.find('>', close)
+                if gt == -1:
+                    if not final:
+                        self._append_body(data[pos:close])
+                        pos = close
+                        break
+                    gt = end - 1
+                if self._state == RAW_SCRIPT:
+                    self._html.append(data[pos:gt + 1])
+                else:
+                    self._append_body(data[pos:close])
+                self._state = TEXT
+                pos = gt + 1
+
+        if pos:
+            self._at_line_start = data[pos - 1] == '\n'
+        self._carry = data[pos:]
+
+    def _open_tag(self, name: str, tag: str, attributes: str):
+        if name == 'style':
+            self._css.append([])
+            self._state = STYLE
+            return
+
+        attrs = self._attributes(attributes)
+        if 'src' in attrs or attrs.get('type', '').lower() not in JS_SCRIPT_TYPES:
+            # External or non-JS scripts stay in the document as written
+            self._html.append(tag)
+            self._state = RAW_SCRIPT
+        else:
+            self._js.append([])
+            self._state = SCRIPT
+
+    def _append_body(self, text: str):
+        if self._state == STYLE:
+            self._css[-1].append(text)
+        elif self._state == SCRIPT:
+            self._js[-1].append(text)
+        else:
+            self._html.append(text)
+
+    def _attributes(self, text: str) -> Dict[str, str]:
+        attrs = {}
+        for match in _ATTR.finditer(text):
+            attrs[match.group(1).lower()] = match.group(2) or match.group(3) or match.group(4) or ''
+        return attrs
+
+    def _join_blocks(self, blocks: List[List[str]]) -> str:
+        texts = (''.join(block).strip() for block in blocks)
+        return '\n\n'.join(text for text in texts if text)
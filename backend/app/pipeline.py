@@ -0,0 +1,153 @@
+import os
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+from .simple_scraper import SimpleWebScraper
+from .grok_cloner import GrokLLMCloner
+from .gemini_cloner import GeminiLLMCloner
+from .provider_router import ProviderRouter
+from .llm_clients import LLMClientRegistry
+from .generation_cache import GenerationCache
+from .clone_history import CloneHistory
+from .browser_pool import BrowserPool
+from .deadline import Deadline
+from .output_splitter import OutputSplitter
+from .sectioned_generation import SectionedGenerator
+from .stats import percentile
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+# Budget kept back for generation while scraping (the scrape always gets at least half of what is left)
+GENERATION_RESERVE = float(os.getenv("DEADLINE_GENERATION_RESERVE", "90"))
+
+
+def build_router(
+    grok_api_key: str,
+    gemini_api_key: Optional[str],
+    llm_clients: LLMClientRegistry,
+    generation_cache: Optional[GenerationCache]
+) -> ProviderRouter:
+    """Grok, plus Gemini when a key is configured, behind the latency-aware router"""
+    cloners = [GrokLLMCloner(grok_api_key, llm_clients, generation_cache)]
+    if gemini_api_key:
+        cloners.append(GeminiLLMCloner(gemini_api_key, llm_clients, generation_cache))
+    return ProviderRouter.from_env(cloners)
+
+
+class ClonePipeline:
+    """Scrape a URL and turn it into a clone; shared by the API server and the CLI"""
+
+    def __init__(
+        self,
+        router: Optional[ProviderRouter],
+        clone_history: Optional[CloneHistory] = None,
+        browser_pool: Optional[BrowserPool] = None,
+        latency_window: Optional[int] = 50
+    ):
+        self.router = router
+        self.clone_history = clone_history
+        self.browser_pool = browser_pool
+        # Recent durations of successful stages, for queue ETAs (None keeps every sample, for benchmarks)
+        self.stage_latencies: Dict[str, deque] = {
+            stage: deque(maxlen=latency_window) for stage in ('scrape', 'generate', 'snapshot')
+        }
+
+    def latency(self, stage: str) -> Optional[float]:
+        """Median recent duration of a stage in seconds, or None before any has completed"""
+        return percentile(self.stage_latencies[stage], 0.5)
+
+    async def snapshot(self, url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Static copy of the rendered page: no LLM call, no provider queueing"""
+        started = time.monotonic()
+        with tracing.span("pipeline.snapshot", {'url.full': url}) as span:
+            async with SimpleWebScraper(self.browser_pool) as scraper:
+                clone_result = await scraper.snapshot_website(url, deadline)
+            if 'error' in clone_result:
+                span.set_error(clone_result['error'])
+                raise Exception(f"Snapshot failed: {clone_result['error']}")
+        self.stage_latencies['snapshot'].append(time.monotonic() - started)
+        return clone_result
+
+    async def generate(
+        self,
+        url: str,
+        generation_mode: str,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Scrape a website and generate its clone with the LLM providers; returns (clone result, scrape data).
+
+        With a deadline, each stage gets what is left of it; if generation
+        runs out of time the scraped content is returned as a plain degraded
+        clone rather than an error.
+        """
+        deadline = deadline or Deadline.after(None)
+        
+        # Step 1: Scrape website, leaving time for generation
+        logger.info(f"Starting scraping for {url}")
+        scrape_deadline = deadline.reserve(min(GENERATION_RESERVE, deadline.remaining() / 2))
+        started = time.monotonic()
+        with tracing.span("pipeline.scrape", {'url.full': url}) as span:
+            async with SimpleWebScraper(self.browser_pool) as scraper:
+                scraping_data = await scraper.scrape_website(url, scrape_deadline)
+            if 'error' in scraping_data:
+                span.set_error(scraping_data['error'])
+                raise Exception(f"Scraping failed: {scraping_data['error']}")
+            if scraping_data.get('degraded'):
+                span.set_attributes({
+                    f"scrape.{reason}": ','.join(names) for reason, names in scraping_data['degraded'].items() if names
+                })
+
+        self.stage_latencies['scrape'].append(time.monotonic() - started)
+        logger.info(f"Scraping completed for {url}")
+
+        # Step 2: Generate clone, reusing unchanged sections from the last run in incremental mode
+        history = self.clone_history
+        previous = None
+        if generation_mode == "incremental" and history:
+            previous = await history.load(url)
+            if previous is None:
+                logger.info(f"No previous clone of {url}, generating all sections")
+
+        logger.info(f"Starting clone generation for {url}")
+        started = time.monotonic()
+        with tracing.span("pipeline.generate", {'clone.generation_mode': generation_mode}) as span:
+            clone_result = await self.router.clone_website(scraping_data, mode=generation_mode, previous=previous, deadline=deadline)
+            if 'error' in clone_result:
+                span.set_error(clone_result['error'])
+
+        if 'error' in clone_result:
+            if deadline.allows(1.0) and not clone_result.get('out_of_time'):
+                raise Exception(f"Clone generation failed: {clone_result['error']}")
+            logger.warning(f"Generation for {url} ran out of time, returning a degraded clone: {clone_result['error']}")
+            clone_result = self.degraded_clone(scraping_data, clone_result['error'])
+        else:
+            self.stage_latencies['generate'].append(time.monotonic() - started)
+
+        if scraping_data.get('degraded'):
+            clone_result['metadata'].setdefault('degraded', {}).update(scraping_data['degraded'])
+
+        sections_state = clone_result.pop('sections_state', None)
+        if sections_state and history:
+            await history.save(url, sections_state)
+
+        logger.info(f"Clone generation completed for {url}")
+        return clone_result, scraping_data
+
+    def degraded_clone(self, scraping_data: Dict[str, Any], error: str) -> Dict[str, Any]:
+        """The scraped content rendered without the model"""
+        # SectionedGenerator's fallback rendering makes no model calls, so it needs no cloner
+        parts = OutputSplitter.split(SectionedGenerator(None).fallback_document(scraping_data))
+        return {
+            'html': parts['html'],
+            'css': parts['css'],
+            'javascript': parts['javascript'],
+            'metadata': {
+                'original_url': scraping_data.get('url'),
+                'title': scraping_data.get('title'),
+                'generation_mode': 'fallback',
+                'degraded': {'generation': error},
+            }
+        }
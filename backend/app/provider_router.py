@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from .base_cloner import BaseLLMCloner
+from .deadline import Deadline
+from .stats import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """Rolling latency and error-rate window for one provider"""
+
+    def __init__(self, window: int = 50):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.last_failure = 0.0
+
+    def record(self, latency: float, success: bool):
+        if success:
+            self.latencies.append(latency)
+        else:
+            self.last_failure = time.monotonic()
+        self.outcomes.append(success)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        return percentile(self.latencies, pct)
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            'samples': len(self.outcomes),
+            'error_rate': round(self.error_rate, 3),
+            'p50_ms': int(p50 * 1000) if p50 is not None else None,
+            'p95_ms': int(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class ProviderRouter:
+    """Route clone generation to the fastest healthy provider, optionally hedging.
+
+    Providers are ranked by rolling median latency among those whose recent
+    error rate is acceptable. With hedging enabled, if the primary has not
+    finished within its own latency percentile, the same job is started on the
+    next provider; the first success wins and the other request is cancelled.
+    """
+
+    def __init__(
+        self,
+        cloners: List[BaseLLMCloner],
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        min_hedge_samples: int = 5,
+        max_error_rate: float = 0.5,
+        unhealthy_cooldown: float = 60.0,
+    ):
+        if not cloners:
+            raise ValueError("ProviderRouter needs at least one cloner")
+        self.cloners = {cloner.provider: cloner for cloner in cloners}
+        self.stats = {cloner.provider: ProviderStats() for cloner in cloners}
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_samples = min_hedge_samples
+        self.max_error_rate = max_error_rate
+        self.unhealthy_cooldown = unhealthy_cooldown
+
+    @classmethod
+    def from_env(cls, cloners: List[BaseLLMCloner]) -> "ProviderRouter":
+        return cls(
+            cloners,
+            hedge=os.getenv("LLM_HEDGE", "false").lower() == "true",
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+        )
+
+    def is_healthy(self, provider: str) -> bool:
+        stats = self.stats[provider]
+        if stats.error_rate <= self.max_error_rate:
+            return True
+        # Let an unhealthy provider take traffic again once it has cooled down
+        return time.monotonic() - stats.last_failure > self.unhealthy_cooldown
+
+    def ranked(self) -> List[str]:
+        """Providers in preference order: healthy first, then by median latency"""
+        def sort_key(provider: str):
+            p50 = self.stats[provider].percentile(0.5)
+            # Providers without samples sort first so they get measured
+            return (not self.is_healthy(provider), p50 if p50 is not None else 0.0)
+        return sorted(self.cloners, key=sort_key)
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """How long to wait on the primary before hedging, or None to not hedge"""
+        stats = self.stats[provider]
+        if not self.hedge or len(self.cloners) < 2 or len(stats.latencies) < self.min_hedge_samples:
+            return None
+        return stats.percentile(self.hedge_percentile)
+
+    async def clone_website(
+        self,
+        scraping_data: Dict[str, Any],
+        mode: str = "single",
+        previous: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Generate a clone on the best provider, hedging and failing over as needed"""
+        order = self.ranked()
+        errors = []
+
+        while order:
+            primary = order.pop(0)
+            if deadline and deadline.expired():
+                errors.append({'provider': primary, 'error': "No time left for generation", 'out_of_time': True})
+                break
+            primary_task = self._start(primary, scraping_data, mode, previous, deadline)
+            tasks = {primary_task: primary}
+            started = {primary_task: time.monotonic()}
+            hedged = False
+
+            try:
+                delay = self.hedge_delay(primary)
+                if delay is not None and order:
+                    done, _ = await asyncio.wait({primary_task}, timeout=delay)
+                    if not done:
+                        backup = order.pop(0)
+                        logger.info(f"{primary} exceeded {delay:.1f}s hedge deadline, hedging with {backup}")
+                        backup_task = self._start(backup, scraping_data, mode, previous, deadline)
+                        tasks[backup_task] = backup
+                        started[backup_task] = time.monotonic()
+                        hedged = True
+
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result = task.result()
+                        if 'error' not in result:
+                            for other, provider in tasks.items():
+                                if not other.done():
+                                    self._record_hedge_loss(provider, time.monotonic() - started[other])
+                            result.setdefault('metadata', {})['router'] = {
+                                'provider': tasks[task],
+                                'hedged': hedged,
+                                'failed_providers': [e['provider'] for e in errors],
+                            }
+                            return result
+                        errors.append({'provider': tasks[task], 'error': result['error'], 'out_of_time': result.get('out_of_time', False)})
+            finally:
+                # Cancel the hedge loser (or everything, if we were cancelled ourselves)
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+        return {
+            'error': '; '.join(f"{e['provider']}: {e['error']}" for e in errors),
+            'out_of_time': any(e.get('out_of_time') for e in errors)
+        }
+
+    async def complete(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Run a single completion on the best provider, failing over on errors (no hedging)"""
+        errors = []
+        for provider in self.ranked():
+            started = time.monotonic()
+            try:
+                generation = await self.cloners[provider]._complete(system_prompt, user_prompt, max_tokens)
+            except Exception as e:
+                self.stats[provider].record(time.monotonic() - started, False)
+                errors.append(f"{provider}: {e}")
+                continue
+            if not generation['cached']:
+                self.stats[provider].record(time.monotonic() - started, True)
+            return {**generation, 'provider': provider}
+        raise Exception('; '.join(errors))
+
+    def _start(
+        self,
+        provider: str,
+        scraping_data: Dict[str, Any],
+        mode: str,
+        previous: Optional[Dict[str, Any]],
+        deadline: Optional[Deadline]
+    ) -> asyncio.Task:
+        return asyncio.create_task(self._run(provider, scraping_data, mode, previous, deadline))
+
+    async def _run(
+        self,
+        provider: str,
+        scraping_data: Dict[str, Any],
+        mode: str,
+        previous: Optional[Dict[str, Any]],
+        deadline: Optional[Deadline]
+    ) -> Dict[str, Any]:
+        started = time.monotonic()
+        # Cancelled runs record nothing here: a hedge loss is recorded by clone_website, and a job
+        # cancelled by DELETE or its timeout says nothing about the provider
+        result = await self.cloners[provider].clone_website(scraping_data, mode=mode, previous=previous, deadline=deadline)
+        # Cache hits say nothing about the provider's latency, and running out of the job's time isn't the provider's fault
+        out_of_time = 'error' in result and (result.get('out_of_time') or (deadline is not None and not deadline.allows(1.0)))
+        if not result.get('metadata', {}).get('cache_hit') and not out_of_time:
+            self.stats[provider].record(time.monotonic() - started, 'error' not in result)
+        return result
+
+    def _record_hedge_loss(self, provider: str, elapsed: float):
+        """Record a request cancelled because the other one won.
+
+        It took at least `elapsed`, so it is recorded as no faster than the
+        provider's current hedge percentile; a cut-short sample would pull the
+        percentiles down and make hedging fire ever earlier. Without samples to
+        compare against, nothing is recorded.
+        """
+        stats = self.stats[provider]
+        current = stats.percentile(self.hedge_percentile)
+        if current is not None:
+            stats.latencies.append(max(elapsed, current))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-provider health and latency for monitoring"""
+        return {
+            provider: {**stats.snapshot(), 'healthy': self.is_healthy(provider)}
+            for provider, stats in self.stats.items()
+        }
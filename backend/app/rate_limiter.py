@@ -0,0 +1,232 @@
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+import httpx
+
+from .deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: throttling and transient upstream failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Continuously refilling token bucket, sized to one minute of budget"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0, deadline: Optional[Deadline] = None):
+        """Wait until `amount` tokens are available and take them.
+
+        Raises DeadlineExceeded instead of waiting past `deadline`.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+                if deadline is not None and wait > deadline.remaining():
+                    raise DeadlineExceeded(f"Rate limit wait of {wait:.1f}s exceeds the time left")
+                await asyncio.sleep(wait)
+
+    def credit(self, amount: float):
+        """Give back (or, if negative, take more) tokens after the real cost is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds: float):
+        """Drain the bucket so the next single-token acquire waits `seconds` (e.g. Retry-After)"""
+        self._refill()
+        self.tokens = min(self.tokens, min(1.0, self.capacity) - seconds * self.rate)
+
+
+class ProviderScheduler:
+    """Per-provider admission for LLM requests.
+
+    Requests pass a requests-per-minute and a tokens-per-minute bucket, then an
+    adaptive concurrency limit: additive increase on fast successes,
+    multiplicative decrease on 429s or when latency climbs well above the best
+    observed. Throttled and transient failures are retried with full-jitter
+    exponential backoff, honoring Retry-After when the provider sends it.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 200000,
+        max_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_retries: int = 4,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        latency_tolerance: float = 3.0,
+    ):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.latency_tolerance = latency_tolerance
+
+        self.in_flight = 0
+        self._slots = asyncio.Condition()
+        self._latency_ewma: Optional[float] = None
+        self._best_latency: Optional[float] = None
+
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    async def run(
+        self,
+        send: Callable[[], Awaitable[httpx.Response]],
+        estimated_tokens: int = 0,
+        deadline: Optional[Deadline] = None
+    ) -> httpx.Response:
+        """Send a request under the provider's limits, retrying throttled and transient failures.
+
+        Returns the final response (possibly still an error status once retries
+        are exhausted); re-raises the last transport error if every attempt failed.
+        The caller reconciles the token estimate of a 200 response with record_usage().
+        Raises DeadlineExceeded rather than wait (for the buckets or before a retry)
+        longer than is left of `deadline`.
+        """
+        # Tokens are charged once per logical request, not per attempt; record_usage settles the
+        # estimate against real usage, and it is handed back if no completion comes back at all
+        await self.tokens.acquire(estimated_tokens, deadline)
+        completed = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self.requests.acquire(1, deadline)
+
+                await self._acquire_slot()
+                started = time.monotonic()
+                try:
+                    response = await send()
+                except (httpx.TransportError, asyncio.TimeoutError) as e:
+                    self.failures += 1
+                    self._decrease()
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    self._check_retry(delay, deadline)
+                    logger.warning(f"{self.provider} request failed ({e!r}), retrying in {delay:.1f}s")
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                    continue
+                finally:
+                    await self._release_slot()
+
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    self._on_success(time.monotonic() - started)
+                    completed = response.status_code == 200
+                    return response
+
+                if response.status_code == 429:
+                    self.throttled += 1
+                else:
+                    self.failures += 1
+                self._decrease()
+
+                if attempt == self.max_retries:
+                    return response
+
+                retry_after = self._retry_after(response)
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                self._check_retry(delay, deadline)
+                if retry_after is not None:
+                    # Everyone sharing this provider should wait, not just this request
+                    self.requests.pause(retry_after)
+                logger.warning(f"{self.provider} returned {response.status_code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+            raise RuntimeError("unreachable")
+        finally:
+            if not completed:
+                self.tokens.credit(estimated_tokens)
+
+    def _check_retry(self, delay: float, deadline: Optional[Deadline]):
+        """Give up rather than sleep past the job's deadline before retrying"""
+        if deadline is not None and delay > deadline.remaining():
+            raise DeadlineExceeded(f"{self.provider} retry in {delay:.1f}s would overrun the deadline")
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Reconcile the token bucket once the response reports real usage"""
+        if actual_tokens:
+            self.tokens.credit(estimated_tokens - actual_tokens)
+
+    async def _acquire_slot(self):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < max(self.min_concurrency, int(self.limit)))
+            self.in_flight += 1
+
+    async def _release_slot(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    def _on_success(self, latency: float):
+        self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+        self._best_latency = self._latency_ewma if self._best_latency is None else min(self._best_latency, self._latency_ewma)
+
+        if self._latency_ewma > self._best_latency * self.latency_tolerance:
+            # Provider is queueing our requests; back off gently
+            self.limit = max(self.min_concurrency, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / max(self.limit, 1))
+
+    def _decrease(self):
+        self.limit = max(self.min_concurrency, self.limit / 2)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        value = response.headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return min(self.max_backoff, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return min(self.max_backoff, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+        except (TypeError, ValueError):
+            return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limits and counters for monitoring"""
+        return {
+            'concurrency_limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'latency_ewma_ms': int(self._latency_ewma * 1000) if self._latency_ewma is not None else None,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'failures': self.failures,
+        }
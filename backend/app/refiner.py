@@ -0,0 +1,167 @@
+import re
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from bs4 import BeautifulSoup, Tag
+
+from .output_splitter import OutputSplitter
+
+logger = logging.getLogger(__name__)
+
+REFINE_SYSTEM_PROMPT = """You are an expert web developer refining ONE element of an existing website clone.
+
+CRITICAL REQUIREMENTS:
+1. Return ONLY the replacement HTML for the given element: a single root element, followed optionally by one <style> and one <script> block
+2. Keep the root element's tag and its id, class and data-* attributes so the rest of the page still applies to it
+3. Apply the instruction; keep all existing text content unless the instruction says otherwise
+4. Reuse the provided design tokens (CSS custom properties); scope any new CSS rules to this element
+5. No <html>, <head> or <body>, no explanations"""
+
+_CSS_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_ROOT_BLOCK = re.compile(r':root\s*\{([^}]*)\}')
+
+
+class CloneRefiner:
+    """Regenerate a single element of a finished clone from an instruction.
+
+    Only the target fragment, the CSS rules that mention it, the page's design
+    tokens and (when available) the scraped content of the matching section
+    are sent, so a refinement is one small completion instead of a re-scrape
+    and full regeneration.
+    """
+
+    def __init__(self, router, max_tokens: int = 4096):
+        self.router = router
+        self.max_tokens = max_tokens
+
+    @staticmethod
+    def locate(soup: BeautifulSoup, selector: str) -> Optional[Tag]:
+        """Find the target by CSS selector, or by section key (e.g. "section-2")"""
+        try:
+            element = soup.select_one(selector)
+        except Exception:
+            element = None
+        return element or soup.find(attrs={'data-clone-section': selector})
+
+    async def refine(
+        self,
+        result: Dict[str, Any],
+        scraping_data: Dict[str, Any],
+        selector: str,
+        instruction: str
+    ) -> Dict[str, Any]:
+        """Patch one element of a clone result; returns the new html/css/javascript and refinement details"""
+        started = time.monotonic()
+        try:
+            soup = BeautifulSoup(result.get('html') or '', 'html.parser')
+            element = self.locate(soup, selector)
+            if element is None:
+                return {'error': f"Selector '{selector}' matched nothing in the clone"}
+
+            css = result.get('css') or ''
+            user_prompt = self._build_prompt(element, css, scraping_data, instruction)
+            generation = await self.router.complete(REFINE_SYSTEM_PROMPT, user_prompt, self.max_tokens)
+            parts = OutputSplitter.split(generation['content'])
+
+            replacement = BeautifulSoup(parts['html'], 'html.parser')
+            if replacement.find(True) is None:
+                return {'error': "Model returned no HTML for the element"}
+            element.replace_with(replacement)
+
+            if parts['css']:
+                css = f"{css}\n\n/* Refinement: {selector} */\n{parts['css']}".strip()
+            javascript = result.get('javascript') or ''
+            if parts['javascript']:
+                javascript = f"{javascript}\n\n{parts['javascript']}".strip()
+
+            return {
+                'html': str(soup),
+                'css': css,
+                'javascript': javascript,
+                'fragment': parts['html'],
+                'refinement': {
+                    'selector': selector,
+                    'instruction': instruction,
+                    'provider': generation['provider'],
+                    'usage': generation['usage'],
+                    'cache_hit': generation['cached'],
+                    'elapsed_ms': int((time.monotonic() - started) * 1000),
+                    'refined_at': datetime.now().isoformat(),
+                }
+            }
+
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _build_prompt(self, element: Tag, css: str, scraping_data: Dict[str, Any], instruction: str) -> str:
+        sections = [f"INSTRUCTION:\n{instruction}", f"CURRENT ELEMENT:\n{element}"]
+
+        tokens = self._design_tokens(css, scraping_data.get('styles', {}))
+        if tokens:
+            sections.append("DESIGN TOKENS:\n" + '\n'.join(tokens))
+
+        rules = self._related_rules(element, css)
+        if rules:
+            sections.append("CURRENT CSS FOR THIS ELEMENT:\n" + '\n'.join(rules))
+
+        original = self._original_section(element, scraping_data)
+        if original:
+            sections.append(f"ORIGINAL SITE CONTENT FOR THIS SECTION:\n{original}")
+
+        sections.append("Return the replacement element, then its optional <style> and <script> blocks.")
+        return '\n\n'.join(sections)
+
+    def _design_tokens(self, css: str, styles: Dict[str, Any]) -> List[str]:
+        tokens = []
+        for block in _ROOT_BLOCK.findall(css):
+            tokens.extend(f"  {declaration.strip()};" for declaration in block.split(';') if declaration.strip())
+        if styles.get('colors'):
+            tokens.append(f"  Original colors: {', '.join(styles['colors'][:12])}")
+        if styles.get('fonts'):
+            tokens.append(f"  Original fonts: {', '.join(styles['fonts'][:6])}")
+        return tokens
+
+    def _related_rules(self, element: Tag, css: str, limit: int = 40) -> List[str]:
+        """CSS rules whose selectors mention the element's (or its descendants') classes, ids or section key"""
+        names = set()
+        for el in [element] + element.find_all(True):
+            names.update(f".{cls}" for cls in el.get('class', []))
+            if el.get('id'):
+                names.add(f"#{el['id']}")
+        if element.get('data-clone-section'):
+            names.add(element['data-clone-section'])
+
+        rules = []
+        for match in _CSS_RULE.finditer(css):
+            selector = match.group(1).strip()
+            if any(self._mentions(selector, name) for name in names):
+                rules.append(f"{selector} {{{match.group(2).strip()}}}")
+                if len(rules) >= limit:
+                    break
+        return rules
+
+    def _mentions(self, selector: str, name: str) -> bool:
+        index = selector.find(name)
+        while index != -1:
+            end = index + len(name)
+            # ".btn" must not match ".btn-primary"
+            if end == len(selector) or not (selector[end].isalnum() or selector[end] in '-_'):
+                return True
+            index = selector.find(name, end)
+        return False
+
+    def _original_section(self, element: Tag, scraping_data: Dict[str, Any]) -> Optional[str]:
+        key = element.get('data-clone-section')
+        if not key:
+            parent = element.find_parent(attrs={'data-clone-section': True})
+            key = parent['data-clone-section'] if parent else None
+        for section in scraping_data.get('content', {}).get('page_sections', []):
+            if section['key'] == key:
+                lines = [f"  H{h['level']}: {h['text']}" for h in section.get('headings', [])]
+                if section.get('text'):
+                    lines.append(f"  TEXT: {section['text']}")
+                lines.extend(f"  LINK: '{link['text']}' -> {link['href']}" for link in section.get('links', []))
+                return '\n'.join(lines)
+        return None
@@ -0,0 +1,117 @@
+import json
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
+
+from fastapi import Request, Response
+
+from .http_cache import precompress, choose_encoding, etag_matches, MIN_COMPRESS_BYTES
+
+# Fields a client can select from a completed result
+RESULT_FIELDS = ('html', 'css', 'javascript', 'metadata')
+
+# Summary fields present in every result response
+SUMMARY_FIELDS = ('clone_id', 'status', 'url', 'created_at', 'completed_at')
+
+FIELD_MEDIA_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'css': 'text/css; charset=utf-8',
+    'javascript': 'application/javascript; charset=utf-8',
+    'metadata': 'application/json',
+}
+
+
+@dataclass
+class EncodedPayload:
+    """A response body with its strong ETag and precompressed variants"""
+    body: bytes
+    media_type: str
+    etag: str
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str) -> "EncodedPayload":
+        return cls(
+            body=body,
+            media_type=media_type,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            variants=precompress(body) if len(body) >= MIN_COMPRESS_BYTES else {},
+        )
+
+    @classmethod
+    def from_json(cls, value: Any) -> "EncodedPayload":
+        return cls.build(json.dumps(value, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def response(self, request: Request, cache_control: str = "no-cache") -> Response:
+        """Serve the best variant for the request, or 304 if the client's copy is current"""
+        encoding = choose_encoding(request.headers.get("accept-encoding"), list(self.variants))
+        etag = f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class ResultPayloads:
+    """Encoded response bodies for one version of a completed clone result.
+
+    The full JSON result and each raw field are encoded and compressed once
+    (warm() runs when the clone completes); field selections are built on
+    first request and kept for the life of this version.
+    """
+
+    def __init__(self, result: Dict[str, Any]):
+        self.result = result
+        self._payloads: Dict[Tuple[str, ...], EncodedPayload] = {}
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Encode the payloads clients ask for most"""
+        self.json(RESULT_FIELDS)
+        for name in RESULT_FIELDS:
+            self.raw(name)
+
+    def json(self, fields: Tuple[str, ...]) -> EncodedPayload:
+        """The JSON result with the summary plus the selected fields"""
+        key = tuple(name for name in RESULT_FIELDS if name in fields)
+        return self._get(key, lambda: EncodedPayload.from_json({
+            **{name: self.result.get(name) for name in SUMMARY_FIELDS},
+            **{name: self.result.get(name) for name in key},
+        }))
+
+    def raw(self, name: str) -> EncodedPayload:
+        """A single field as its own document (text/html, text/css, ...)"""
+        def build():
+            value = self.result.get(name)
+            if name == 'metadata':
+                return EncodedPayload.from_json(value or {})
+            return EncodedPayload.build((value or '').encode('utf-8'), FIELD_MEDIA_TYPES[name])
+        return self._get(('raw', name), build)
+
+    def _get(self, key: Tuple[str, ...], build) -> EncodedPayload:
+        # warm() runs in a worker thread while requests may read on the loop
+        with self._lock:
+            payload = self._payloads.get(key)
+        if payload is None:
+            payload = build()
+            with self._lock:
+                payload = self._payloads.setdefault(key, payload)
+        return payload
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Validate a ?fields= list; raises ValueError naming unknown fields"""
+    if not fields:
+        return RESULT_FIELDS
+    requested = tuple(name.strip() for name in fields.split(',') if name.strip())
+    unknown = [name for name in requested if name not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (expected {', '.join(RESULT_FIELDS)})")
+    return requested
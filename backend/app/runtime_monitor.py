@@ -0,0 +1,77 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+from .stats import percentile
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, or None where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class RuntimeMonitor:
+    """Event loop lag and memory of the running server.
+
+    A background task sleeps for `interval` and records how late it woke up:
+    anything blocking the event loop (CPU-heavy parsing, synchronous I/O)
+    shows up as lag, and every request and clone job waits that long too.
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 600, warn_after: float = 0.5):
+        self.interval = interval
+        self.warn_after = warn_after
+        self.lags: deque = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["RuntimeMonitor"]:
+        """Build the monitor from environment settings, or None when disabled"""
+        if os.getenv("RUNTIME_MONITOR_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            interval=float(os.getenv("RUNTIME_MONITOR_INTERVAL", "0.1")),
+            warn_after=float(os.getenv("RUNTIME_MONITOR_WARN_LAG", "0.5")),
+        )
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.warn_after:
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag percentiles over the recent window (about a minute at the default interval), in milliseconds"""
+        rss = rss_bytes()
+
+        def ms(fraction: float) -> Optional[float]:
+            lag = percentile(self.lags, fraction)
+            return round(lag * 1000, 1) if lag is not None else None
+
+        return {
+            'loop_lag_ms': {'p50': ms(0.5), 'p99': ms(0.99), 'max': ms(1.0)},
+            'max_loop_lag_ms': round(self.max_lag * 1000, 1),
+            'rss_mb': round(rss / 2**20, 1) if rss is not None else None,
+        }
@@ -0,0 +1,279 @@
+import re
+import time
+import html
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+from .output_splitter import OutputSplitter
+from .component_dedup import format_component_lines
+from .clone_history import fingerprint, section_fingerprint, diff_sections
+from .deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+SKELETON_SYSTEM_PROMPT = """You are an expert web developer building the shared design system for a website clone.
+
+Return ONLY CSS (no <style> tags, no explanations) containing:
+1. A :root block of CSS custom properties (design tokens) for the exact colors, font families, font sizes, spacing and radii provided
+2. A modern CSS reset and base typography for body, headings, paragraphs and links
+3. Shared layout helpers (.container, flex and grid utilities) matching the detected layout
+4. Shared component classes (.btn, .card, .nav-link) that sections can reuse
+
+Every value must come from the design tokens so sections generated separately look consistent."""
+
+SECTION_SYSTEM_PROMPT = """You are an expert web developer recreating ONE section of a website clone.
+The page's shared stylesheet (design tokens and shared classes) is already written and provided to you.
+
+CRITICAL REQUIREMENTS:
+1. Return ONLY the HTML for this section: a single root element, followed optionally by one <style> and one <script> block
+2. The root element must keep the given tag and carry the given data-clone-section attribute
+3. Use ALL provided content EXACTLY - every word, heading and link text, no truncation
+4. Reuse the shared CSS custom properties and classes; put section-specific rules in the <style> block, each selector prefixed with the section's [data-clone-section] attribute selector
+5. Render each REPEATED COMPONENT exactly ONCE (row 1) with its data-repeat-id attribute; the remaining rows are added automatically
+6. Do NOT output <html>, <head>, <body> or a doctype, and no explanations"""
+
+
+class SectionedGenerator:
+    """Generate a page section by section and stitch the fragments into one document.
+
+    A shared design-token stylesheet is generated first, then every section is
+    generated concurrently (bounded by the provider scheduler's concurrency limit), so
+    wall-clock time tracks the slowest section instead of the sum and no single
+    completion has to fit the whole page under the output token cap.
+    """
+
+    def __init__(self, cloner, section_max_tokens: int = 4096, deadline: Optional[Deadline] = None):
+        self.cloner = cloner
+        self.section_max_tokens = section_max_tokens
+        self.deadline = deadline
+
+    @staticmethod
+    def can_split(scraping_data: Dict[str, Any]) -> bool:
+        """Sectioned generation needs at least two distinct page regions"""
+        return len(scraping_data.get('content', {}).get('page_sections', [])) >= 2
+
+    async def generate(self, scraping_data: Dict[str, Any], context: str, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate and stitch a full document; returns the html plus timing stats.
+
+        With `previous` (a stored generation state for the same URL), sections
+        whose content hash is unchanged reuse their stored fragment and only
+        changed or new sections are sent to the model.
+        """
+        started = time.monotonic()
+        sections = scraping_data.get('content', {}).get('page_sections', [])
+        components = {g['id']: g for g in scraping_data.get('content', {}).get('repeated_components', [])}
+        hashes = {section['key']: section_fingerprint(section, components) for section in sections}
+        styles_hash = fingerprint(scraping_data.get('styles', {}))
+        
+        # Stored fragments were written against the stored skeleton, so both are reused or neither
+        reusable: Dict[str, str] = {}
+        incremental = None
+        if previous is not None:
+            incremental = diff_sections(previous.get('sections', []), hashes)
+            if previous.get('styles_hash') == styles_hash and previous.get('skeleton'):
+                reusable = {
+                    stored['key']: stored['content'] for stored in previous.get('sections', [])
+                    if stored['key'] in incremental['unchanged']
+                }
+            incremental['full_regeneration'] = not reusable
+        
+        if reusable:
+            skeleton = {'content': previous['skeleton'], 'cached': True, 'usage': {}}
+        else:
+            skeleton = await self._generate_skeleton(context)
+        skeleton_ms = int((time.monotonic() - started) * 1000)
+
+        generated = await asyncio.gather(
+            *[
+                self._generate_section(section, skeleton['content'], components)
+                for section in sections if section['key'] not in reusable
+            ]
+        )
+        by_key = {r['key']: r for r in generated}
+        results = [
+            by_key.get(section['key']) or {
+                'key': section['key'],
+                'content': reusable[section['key']],
+                'cached': True,
+                'usage': {},
+                'elapsed_ms': 0,
+            }
+            for section in sections
+        ]
+        if incremental is not None:
+            incremental['regenerated'] = len(generated)
+            incremental['reused'] = len(reusable)
+            logger.info(f"Incremental clone: {len(reusable)} sections reused, {len(generated)} regenerated")
+
+        document = self._stitch(scraping_data, skeleton['content'], results)
+        return {
+            'content': document,
+            'cached': skeleton['cached'] and all(r['cached'] for r in results),
+            'usage': self._sum_usage([skeleton] + results),
+            'continuations': sum(g.get('continuations', 0) for g in [skeleton] + results),
+            'continuation_ms': sum(g.get('continuation_ms', 0) for g in [skeleton] + results),
+            'truncated_by_deadline': any(g.get('truncated_by_deadline') for g in [skeleton] + results),
+            'incremental': incremental,
+            'state': {
+                'skeleton': skeleton['content'],
+                'styles_hash': styles_hash,
+                # Failed or deadline-truncated sections keep no hash so the next incremental run retries them
+                'sections': [
+                    {
+                        'key': r['key'],
+                        'hash': None if r.get('error') or r.get('truncated_by_deadline') else hashes[r['key']],
+                        'content': r['content']
+                    }
+                    for r in results
+                ],
+            },
+            'stats': {
+                'sections': len(sections),
+                'failed_sections': [r['key'] for r in results if r.get('error')],
+                'skeleton_ms': skeleton_ms,
+                'section_ms': {r['key']: r['elapsed_ms'] for r in results},
+                'sum_section_ms': sum(r['elapsed_ms'] for r in results),
+                'wall_time_ms': int((time.monotonic() - started) * 1000),
+            }
+        }
+
+    async def _generate_skeleton(self, context: str) -> Dict[str, Any]:
+        user_prompt = f"""Create the shared stylesheet for a clone of this website:
+
+{context}
+
+Return only the CSS."""
+        generation = await self.cloner._complete(SKELETON_SYSTEM_PROMPT, user_prompt, self.section_max_tokens, self.deadline)
+        generation['content'] = self._strip_style_tags(generation['content'])
+        return generation
+
+    async def _generate_section(self, section: Dict[str, Any], skeleton_css: str, components: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        started = time.monotonic()
+        user_prompt = f"""SHARED STYLESHEET (already included in the page):
+{skeleton_css}
+
+SECTION TO RECREATE:
+{self._format_section(section, components)}
+
+Return the HTML for this section as a single <{section['tag']} data-clone-section="{section['key']}"> element, followed by its optional <style> and <script> blocks."""
+        try:
+            generation = await self.cloner._complete(SECTION_SYSTEM_PROMPT, user_prompt, self.section_max_tokens, self.deadline)
+            result = {**generation, 'key': section['key']}
+        except Exception as e:
+            logger.error(f"Section {section['key']} generation failed: {e}")
+            result = {
+                'key': section['key'],
+                'content': self._fallback_section(section),
+                'cached': False,
+                'usage': {},
+                'error': str(e)
+            }
+        result['elapsed_ms'] = int((time.monotonic() - started) * 1000)
+        return result
+
+    def _format_section(self, section: Dict[str, Any], components: Dict[str, Dict[str, Any]]) -> str:
+        """Describe one section's content for its prompt"""
+        formatted = [
+            f"Key: {section['key']}",
+            f"Tag: {section['tag']}",
+        ]
+        if section.get('id'):
+            formatted.append(f"Id: {section['id']}")
+        if section.get('class'):
+            formatted.append(f"Classes: {section['class']}")
+        if section.get('headings'):
+            formatted.append("HEADINGS:")
+            formatted.extend(f"  H{h['level']}: {h['text']}" for h in section['headings'])
+        if section.get('text'):
+            formatted.append(f"TEXT (FULL):\n  {section['text']}")
+        if section.get('links'):
+            formatted.append("LINKS:")
+            formatted.extend(f"  - Text: '{link['text']}' Href: {link['href']}" for link in section['links'])
+        if section.get('images'):
+            formatted.append("IMAGES:")
+            formatted.extend(f"  - Alt: '{img.get('alt', '')}' Src: {img['src']}" for img in section['images'])
+        for component_id in section.get('repeated_components', []):
+            if component_id in components:
+                exemplar, rows = format_component_lines(components[component_id])
+                formatted.append("REPEATED COMPONENT:")
+                formatted.extend(exemplar)
+                formatted.extend(rows)
+        return '\n'.join(formatted)
+
+    def _stitch(self, scraping_data: Dict[str, Any], skeleton_css: str, results: List[Dict[str, Any]]) -> str:
+        """Combine the skeleton and section fragments into one HTML document"""
+        css_blocks = [skeleton_css]
+        js_blocks = []
+        fragments = []
+        for result in results:
+            parts = OutputSplitter.split(result['content'])
+            css_blocks.append(parts['css'])
+            js_blocks.append(parts['javascript'])
+            fragments.append(parts['html'])
+
+        title = html.escape(scraping_data.get('title') or '')
+        viewport = scraping_data.get('responsive', {}).get('viewport_meta') or 'width=device-width, initial-scale=1.0'
+        css = '\n\n'.join(block for block in css_blocks if block)
+        js = '\n\n'.join(block for block in js_blocks if block)
+        body = '\n'.join(fragments)
+        script = f"\n<script>\n{js}\n</script>" if js else ''
+
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="{html.escape(viewport)}">
+<title>{title}</title>
+<style>
+{css}
+</style>
+</head>
+<body>
+{body}{script}
+</body>
+</html>"""
+
+    def fallback_document(self, scraping_data: Dict[str, Any]) -> str:
+        """A plain, model-free rendering of the scraped content, for when generation can't finish"""
+        content = scraping_data.get('content', {})
+        sections = content.get('page_sections') or [{
+            'key': 'section-1',
+            'tag': 'main',
+            'headings': content.get('headings', [])[:20],
+            'text': ' '.join(content.get('paragraphs', [])[:20]),
+            'links': content.get('links', [])[:30],
+        }]
+        body = scraping_data.get('styles', {}).get('body', {})
+        declarations = {
+            'background-color': body.get('backgroundColor'),
+            'color': body.get('color'),
+            'font-family': body.get('fontFamily'),
+            'line-height': body.get('lineHeight'),
+        }
+        css = "body { " + ' '.join(f"{name}: {value};" for name, value in declarations.items() if value) + " }\n"
+        css += ".container { max-width: 1100px; margin: 0 auto; padding: 2rem 1rem; }"
+        results = [{'content': self._fallback_section(section)} for section in sections]
+        return self._stitch(scraping_data, css, results)
+
+    def _fallback_section(self, section: Dict[str, Any]) -> str:
+        """Plain rendering of a section's content when its generation fails"""
+        parts = [f"<h{h['level']}>{html.escape(h['text'])}</h{h['level']}>" for h in section.get('headings', [])]
+        if section.get('text'):
+            parts.append(f"<p>{html.escape(section['text'])}</p>")
+        for link in section.get('links', []):
+            parts.append(f"<a href=\"{html.escape(link['href'] or '')}\">{html.escape(link['text'])}</a>")
+        inner = '\n'.join(parts)
+        return f"<{section['tag']} data-clone-section=\"{section['key']}\" class=\"container\">\n{inner}\n</{section['tag']}>"
+
+    def _strip_style_tags(self, css: str) -> str:
+        css = re.sub(r'</?style[^>]*>', '', css, flags=re.IGNORECASE)
+        return css.strip()
+
+    def _sum_usage(self, generations: List[Dict[str, Any]]) -> Dict[str, int]:
+        usage: Dict[str, int] = {}
+        for generation in generations:
+            for key, value in (generation.get('usage') or {}).items():
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+        return usage
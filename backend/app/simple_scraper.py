@@ -1,36 +1,60 @@
 import asyncio
 import base64
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Awaitable
 from urllib.parse import urljoin
 
-from playwright.async_api import async_playwright, Page, Browser
+from playwright.async_api import async_playwright, Page, Browser, TimeoutError as PlaywrightTimeoutError
 from bs4 import BeautifulSoup
 
+from .component_dedup import RepeatedComponentDetector, REPEAT_ATTRIBUTE
+from .clone_history import section_key
+from .snapshot_cloner import SnapshotCloner
+from .browser_pool import BrowserPool, LAUNCH_ARGS
+from .deadline import Deadline
+from . import tracing
+
 logger = logging.getLogger(__name__)
 
+# Longest any single extractor may run, budget permitting
+EXTRACTOR_TIMEOUT = 20.0
+
+# Budget kept for the essential extractors while waiting for the page to settle
+ESSENTIAL_RESERVE = 8.0
+
+# Optional extractors are skipped when less than this is left (seconds)
+OPTIONAL_MIN_SECONDS = {'animations': 3.0, 'responsive': 4.0, 'screenshot': 6.0}
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
 class SimpleWebScraper:
     """Enhanced simple web scraper that captures essential elements including CSS and JS"""
     
-    def __init__(self):
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        self.browser_pool = browser_pool
         self.browser: Optional[Browser] = None
         self.context = None
         self.playwright = None
         
     async def __aenter__(self):
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=True,
-            args=['--no-sandbox', '--disable-setuid-sandbox']
-        )
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
+        if self.browser_pool:
+            # Share the pool's browser instead of launching one per scrape
+            self.context = await self.browser_pool.acquire(**CONTEXT_OPTIONS)
+        else:
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+            self.context = await self.browser.new_context(**CONTEXT_OPTIONS)
         self.context.set_default_timeout(30000)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.browser_pool:
+            if self.context:
+                await self.browser_pool.release(self.context)
+            return
         if self.context:
             await self.context.close()
         if self.browser:
@@ -38,32 +62,49 @@ class SimpleWebScraper:
         if self.playwright:
             await self.playwright.stop()
 
-    async def scrape_website(self, url: str) -> Dict[str, Any]:
-        """Enhanced website scraping that captures content, styles, and scripts"""
+    async def scrape_website(self, url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Enhanced website scraping that captures content, styles, and scripts.
+        
+        Every wait and extractor is bounded by what is left of `deadline`. When
+        time runs short the optional extractors (animations, responsive checks,
+        screenshot) are skipped and slow ones return empty results; what was
+        skipped is listed under 'degraded' instead of failing the scrape.
+        """
+        deadline = deadline or Deadline.after(None)
+        degraded = {'skipped': [], 'timed_out': []}
         page = None
         try:
             page = await self.context.new_page()
             
             # Navigate to the page
-            response = await page.goto(url, wait_until='domcontentloaded')
-            if not response or response.status >= 400:
-                raise Exception(f"Failed to load page: HTTP {response.status if response else 'No response'}")
+            await self._navigate(page, url, 'domcontentloaded', deadline)
             
-            # Wait for page to load completely
-            await page.wait_for_load_state('networkidle', timeout=15000)
-            await asyncio.sleep(2)  # Additional wait for dynamic content
+            # Wait for page to load completely, keeping time for the extractors; a page that never goes idle is still worth scraping
+            settle = deadline.reserve(ESSENTIAL_RESERVE)
+            with tracing.span("scrape.settle") as span:
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=settle.timeout_ms(15000))
+                except PlaywrightTimeoutError:
+                    logger.info(f"{url} did not reach network idle, extracting as is")
+                    degraded['timed_out'].append('networkidle')
+                    span.set_attribute('scrape.networkidle', False)
+                if settle.allows(0.1):
+                    await asyncio.sleep(settle.timeout(2))  # Additional wait for dynamic content
             
             # Extract data
             data = {
                 'url': url,
-                'title': await self._get_title(page),
-                'content': await self._extract_content(page),
-                'styles': await self._extract_comprehensive_styles(page),
-                'scripts': await self._extract_scripts(page),
-                'animations': await self._detect_animations(page),
-                'responsive': await self._check_responsive_elements(page),
-                'screenshot': await self._take_screenshot(page)
+                'title': await self._run_extractor('title', lambda: self._get_title(page), "Untitled", deadline, degraded),
+                'content': await self._run_extractor('content', lambda: self._extract_content(page), {}, deadline, degraded),
+                'styles': await self._run_extractor('styles', lambda: self._extract_comprehensive_styles(page), {}, deadline, degraded),
+                'scripts': await self._run_extractor('scripts', lambda: self._extract_scripts(page), {}, deadline, degraded),
+                'animations': await self._run_extractor('animations', lambda: self._detect_animations(page), {}, deadline, degraded, optional=True),
+                'responsive': await self._run_extractor('responsive', lambda: self._check_responsive_elements(page), {}, deadline, degraded, optional=True),
+                'screenshot': await self._run_extractor('screenshot', lambda: self._take_screenshot(page), "", deadline, degraded, optional=True)
             }
+            if degraded['skipped'] or degraded['timed_out']:
+                logger.warning(f"Degraded scrape of {url}: skipped {degraded['skipped']}, timed out {degraded['timed_out']}")
+                data['degraded'] = degraded
             
             return data
             
@@ -73,11 +114,68 @@ class SimpleWebScraper:
             if page:
                 await page.close()
 
+    async def snapshot_website(self, url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Load a page and capture a static snapshot clone without any LLM call"""
+        deadline = deadline or Deadline.after(None)
+        page = None
+        try:
+            page = await self.context.new_page()
+            
+            await self._navigate(page, url, 'load', deadline)
+            
+            # Give late requests a short window; a page that never goes idle is still worth snapshotting
+            with tracing.span("scrape.settle") as span:
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=deadline.reserve(ESSENTIAL_RESERVE).timeout_ms(5000))
+                except PlaywrightTimeoutError:
+                    logger.info(f"{url} did not reach network idle, snapshotting as is")
+                    span.set_attribute('scrape.networkidle', False)
+            
+            with tracing.span("snapshot.capture"):
+                return await SnapshotCloner.from_env().clone_page(page, url)
+            
+        except Exception as e:
+            return {'error': str(e), 'url': url}
+        finally:
+            if page:
+                await page.close()
+
+    async def _navigate(self, page: Page, url: str, wait_until: str, deadline: Deadline):
+        """Load `url` in the page, raising if it doesn't respond with a success status"""
+        with tracing.span("scrape.navigate", {'url.full': url, 'scrape.wait_until': wait_until}) as span:
+            response = await page.goto(url, wait_until=wait_until, timeout=deadline.timeout_ms(30000))
+            if response:
+                span.set_attribute('http.response.status_code', response.status)
+            if not response or response.status >= 400:
+                raise Exception(f"Failed to load page: HTTP {response.status if response else 'No response'}")
+
+    async def _run_extractor(
+        self,
+        name: str,
+        extractor: Callable[[], Awaitable[Any]],
+        fallback: Any,
+        deadline: Deadline,
+        degraded: Dict[str, list],
+        optional: bool = False
+    ) -> Any:
+        """Run one extractor within the remaining budget, returning `fallback` if it is skipped or runs out of time"""
+        with tracing.span(f"scrape.extract.{name}") as span:
+            if optional and not deadline.allows(OPTIONAL_MIN_SECONDS[name]):
+                degraded['skipped'].append(name)
+                span.set_attribute('scrape.outcome', 'skipped')
+                return fallback
+            try:
+                return await asyncio.wait_for(extractor(), timeout=deadline.timeout(EXTRACTOR_TIMEOUT))
+            except TimeoutError:
+                degraded['timed_out'].append(name)
+                span.set_attribute('scrape.outcome', 'timed_out')
+                return fallback
+
     async def _get_title(self, page: Page) -> str:
         """Get page title"""
         try:
             return await page.title()
-        except:
+        except Exception:
             return "Untitled"
 
     async def _extract_content(self, page: Page) -> Dict[str, Any]:
@@ -94,6 +192,10 @@ class SimpleWebScraper:
             for element in content_soup(['script', 'style', 'meta', 'link', 'noscript']):
                 element.decompose()
             
+            # Collapse repeated cards/tiles to one exemplar so the repeats don't crowd out other content
+            detector = RepeatedComponentDetector.from_env()
+            repeated_components = detector.collapse(content_soup) if detector else []
+            
             content = {
                 'headings': self._extract_headings(content_soup),
                 'paragraphs': self._extract_paragraphs(content_soup),
@@ -103,7 +205,9 @@ class SimpleWebScraper:
                 'layout_structure': await self._extract_layout_structure(page),
                 'html_structure': str(content_soup.body) if content_soup.body else str(content_soup),
                 'original_html': original_html[:8000],  # Increased to capture more structure
-                'semantic_elements': self._extract_semantic_elements(content_soup)
+                'semantic_elements': self._extract_semantic_elements(content_soup),
+                'page_sections': self._extract_page_sections(content_soup),
+                'repeated_components': repeated_components
             }
             
             return content
@@ -513,7 +617,7 @@ class SimpleWebScraper:
         try:
             screenshot_bytes = await page.screenshot(full_page=True)
             return base64.b64encode(screenshot_bytes).decode('utf-8')
-        except:
+        except Exception:
             return ""
 
     def _extract_semantic_elements(self, soup: BeautifulSoup) -> Dict[str, Any]:
@@ -538,6 +642,69 @@ class SimpleWebScraper:
         
         return semantic_elements
 
+    def _extract_page_sections(self, soup: BeautifulSoup) -> list:
+        """Split the page into ordered top-level regions (header, nav, main sections, footer)"""
+        region_tags = {'header', 'nav', 'section', 'article', 'aside', 'footer'}
+        regions = []
+        
+        def walk(element):
+            for child in element.find_all(True, recursive=False):
+                if len(regions) >= 12:
+                    return
+                if child.name in region_tags:
+                    regions.append(child)
+                elif child.name == 'main' and not child.find(['section', 'article']):
+                    regions.append(child)
+                elif child.find(list(region_tags | {'main'})):
+                    walk(child)
+        
+        root = soup.body or soup
+        walk(root)
+        
+        # Pages without semantic markup: fall back to substantial top-level blocks
+        if len(regions) < 2:
+            regions = [
+                child for child in root.find_all(True, recursive=False)
+                if len(child.get_text(strip=True)) > 50
+            ][:12]
+        
+        sections = []
+        used_keys: Dict[str, int] = {}
+        for element in regions:
+            tag = element.name
+            text = element.get_text(' ', strip=True)
+            headings = [
+                {'level': int(h.name[1]), 'text': h.get_text(strip=True)}
+                for h in element.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])[:10]
+                if h.get_text(strip=True)
+            ]
+            classes = ' '.join(element.get('class', []))
+            sections.append({
+                # Stable across scrapes so incremental re-clones match sections after insertions or removals
+                'key': section_key(tag, element.get('id', ''), headings[0]['text'] if headings else '', classes, used_keys),
+                'tag': tag,
+                'id': element.get('id', ''),
+                'class': classes,
+                'headings': headings,
+                'text': text[:1500] + '...' if len(text) > 1500 else text,
+                'links': [
+                    {'text': a.get_text(strip=True), 'href': a.get('href')}
+                    for a in element.find_all('a', href=True)[:15]
+                    if a.get_text(strip=True)
+                ],
+                'images': [
+                    {'src': img.get('src'), 'alt': img.get('alt', '')}
+                    for img in element.find_all('img')[:8]
+                    if img.get('src')
+                ],
+                'repeated_components': [
+                    el[REPEAT_ATTRIBUTE] for el in [element] + element.find_all(attrs={REPEAT_ATTRIBUTE: True})
+                    if el.get(REPEAT_ATTRIBUTE)
+                ]
+            })
+        
+        return sections
+
     async def _extract_layout_structure(self, page: Page) -> Dict[str, Any]:
         """Extract detailed layout structure information"""
         try:
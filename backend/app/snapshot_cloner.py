@@ -0,0 +1,192 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+# Stylesheets whose rules the page can't read (cross-origin without CORS); fetched from Python instead
+BLOCKED_SHEETS_SCRIPT = """() => {
+    const blocked = [];
+    for (const sheet of document.styleSheets) {
+        try {
+            sheet.cssRules;
+        } catch (e) {
+            if (sheet.href) blocked.push(sheet.href);
+        }
+    }
+    return blocked;
+}"""
+
+# Serialize the rendered DOM without scripts, with every URL absolute and only the CSS rules the page uses
+SNAPSHOT_SCRIPT = """(external) => {
+    const stats = {sheets: 0, sheets_unavailable: 0, rules_total: 0, rules_kept: 0};
+    const selectorCache = new Map();
+
+    const absolute = (value, base) => {
+        if (!value || /^(data:|blob:|#|mailto:|tel:)/i.test(value.trim())) return value;
+        try { return new URL(value.trim(), base).href; } catch (e) { return value; }
+    };
+    const absolutizeCss = (text, base) => text.replace(
+        /url\\(\\s*(['"]?)([^'")]+)\\1\\s*\\)/g,
+        (match, quote, value) => `url("${absolute(value, base)}")`
+    );
+
+    // A rule is used if any selector in its list matches once state pseudo-classes are removed
+    const used = (selectorText) => {
+        if (selectorCache.has(selectorText)) return selectorCache.get(selectorText);
+        const stripped = selectorText.replace(/::?[a-zA-Z-]+(\\([^()]*\\))?/g, '');
+        let result = false;
+        for (const part of stripped.split(',')) {
+            const selector = part.trim() || '*';
+            try {
+                if (document.querySelector(selector)) { result = true; break; }
+            } catch (e) {
+                result = true;
+                break;
+            }
+        }
+        selectorCache.set(selectorText, result);
+        return result;
+    };
+
+    const serialize = (rules, base) => {
+        const out = [];
+        for (const rule of rules) {
+            if (rule instanceof CSSStyleRule) {
+                stats.rules_total++;
+                if (!used(rule.selectorText)) continue;
+                stats.rules_kept++;
+                out.push(absolutizeCss(rule.cssText, base));
+            } else if (rule instanceof CSSMediaRule || rule instanceof CSSSupportsRule) {
+                const inner = serialize(rule.cssRules, base);
+                const keyword = rule instanceof CSSMediaRule ? '@media' : '@supports';
+                if (inner) out.push(`${keyword} ${rule.conditionText} {\\n${inner}\\n}`);
+            } else if (rule instanceof CSSImportRule) {
+                try {
+                    out.push(serialize(rule.styleSheet.cssRules, rule.styleSheet.href || base));
+                } catch (e) {
+                    stats.sheets_unavailable++;
+                }
+            } else {
+                out.push(absolutizeCss(rule.cssText, base));
+            }
+        }
+        return out.filter(Boolean).join('\\n');
+    };
+
+    const css = [];
+    const sheets = [...document.styleSheets, ...(document.adoptedStyleSheets || [])];
+    for (const sheet of sheets) {
+        if (sheet.disabled) continue;
+        const base = sheet.href || document.baseURI;
+        let rules = null;
+        try {
+            rules = sheet.cssRules;
+        } catch (e) {
+            if (external[sheet.href] !== undefined) {
+                const copy = new CSSStyleSheet();
+                copy.replaceSync(external[sheet.href]);
+                rules = copy.cssRules;
+            }
+        }
+        if (!rules) {
+            stats.sheets_unavailable++;
+            continue;
+        }
+        stats.sheets++;
+        let text = serialize(rules, base);
+        const media = sheet.media && sheet.media.mediaText;
+        if (text && media && media !== 'all') text = `@media ${media} {\\n${text}\\n}`;
+        if (text) css.push(text);
+    }
+
+    const root = document.documentElement.cloneNode(true);
+    root.querySelectorAll('script, noscript, style, base, link[rel~="stylesheet"], link[rel~="preload"], link[rel~="modulepreload"], link[rel~="prefetch"]')
+        .forEach(el => el.remove());
+
+    const urlAttributes = ['src', 'href', 'poster', 'action', 'data', 'background'];
+    for (const el of root.querySelectorAll('*')) {
+        for (const attr of [...el.attributes]) {
+            const name = attr.name.toLowerCase();
+            if (name.startsWith('on')) {
+                el.removeAttribute(attr.name);
+            } else if (urlAttributes.includes(name)) {
+                if (/^\\s*javascript:/i.test(attr.value)) el.setAttribute(attr.name, '#');
+                else el.setAttribute(attr.name, absolute(attr.value, document.baseURI));
+            } else if (name === 'srcset') {
+                el.setAttribute(attr.name, attr.value.split(',').map(candidate => {
+                    const [url, ...descriptor] = candidate.trim().split(/\\s+/);
+                    return [absolute(url, document.baseURI), ...descriptor].join(' ');
+                }).join(', '));
+            } else if (name === 'style') {
+                el.setAttribute(attr.name, absolutizeCss(attr.value, document.baseURI));
+            }
+        }
+        // Lazy loaders keep the real URL in data-src until a script swaps it in
+        if (el.tagName === 'IMG' && !el.getAttribute('src') && el.dataset.src) {
+            el.setAttribute('src', absolute(el.dataset.src, document.baseURI));
+        }
+    }
+
+    return {html: '<!DOCTYPE html>\\n' + root.outerHTML, css: css.join('\\n\\n'), stats};
+}"""
+
+
+class SnapshotCloner:
+    """Deterministic, no-LLM clone of a rendered page.
+
+    Serializes the live DOM with scripts and inline event handlers removed,
+    asset URLs made absolute, and the page's stylesheets inlined, keeping only
+    the rules whose selectors match something on the page. Cross-origin
+    stylesheets the page can't read are fetched through the browser context.
+    """
+
+    def __init__(self, fetch_timeout: float = 5.0):
+        self.fetch_timeout = fetch_timeout
+
+    @classmethod
+    def from_env(cls) -> "SnapshotCloner":
+        return cls(fetch_timeout=float(os.getenv("SNAPSHOT_FETCH_TIMEOUT", "5")))
+
+    async def clone_page(self, page: Page, url: str) -> Dict[str, Any]:
+        """Snapshot a loaded page into the same result shape as the LLM cloners"""
+        started = time.monotonic()
+        try:
+            blocked: List[str] = await page.evaluate(BLOCKED_SHEETS_SCRIPT)
+            fetched = await asyncio.gather(*[self._fetch_stylesheet(page, href) for href in blocked])
+            external = {href: text for href, text in zip(blocked, fetched) if text is not None}
+
+            snapshot = await page.evaluate(SNAPSHOT_SCRIPT, external)
+            snapshot_ms = int((time.monotonic() - started) * 1000)
+            logger.info(f"Snapshot of {url} captured in {snapshot_ms}ms ({snapshot['stats']['rules_kept']}/{snapshot['stats']['rules_total']} CSS rules kept)")
+
+            return {
+                'html': snapshot['html'],
+                'css': snapshot['css'],
+                'javascript': '',
+                'metadata': {
+                    'original_url': url,
+                    'title': await page.title(),
+                    'generated_with': 'snapshot',
+                    'generation_mode': 'snapshot',
+                    'cache_hit': False,
+                    'usage': {},
+                    'snapshot': {**snapshot['stats'], 'fetched_sheets': len(external), 'snapshot_ms': snapshot_ms}
+                }
+            }
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def _fetch_stylesheet(self, page: Page, href: str) -> Optional[str]:
+        try:
+            response = await page.context.request.get(href, timeout=self.fetch_timeout * 1000)
+            if response.ok:
+                return await response.text()
+            logger.warning(f"Stylesheet {href} returned HTTP {response.status}")
+        except Exception as e:
+            logger.warning(f"Failed to fetch stylesheet {href}: {e}")
+        return None
@@ -0,0 +1,9 @@
+from typing import Iterable, Optional
+
+
+def percentile(values: Iterable[float], fraction: float) -> Optional[float]:
+    """Nearest-rank value at `fraction` of `values` (0.5 for the median), or None if there are none"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
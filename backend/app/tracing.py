@@ -0,0 +1,511 @@
+"""Lightweight, OpenTelemetry-compatible tracing for clone jobs.
+
+Spans carry W3C trace context (`traceparent`) so one trace follows a job
+from the API request through queueing, scraping and every LLM call, and
+across processes: the header is read from incoming requests, sent with
+outgoing LLM requests, and taken from the TRACEPARENT environment variable
+by the CLI. Finished spans are batched on a background thread and written
+as JSON lines (console or file) or sent to an OpenTelemetry collector over
+OTLP/HTTP JSON. Sampling is decided once per trace from its id, the same
+way as OpenTelemetry's TraceIdRatioBased sampler; spans of unsampled traces
+still propagate context but record nothing.
+
+    python -m app.tracing summary .cache/traces.jsonl
+    python -m app.tracing show .cache/traces.jsonl <trace_id>
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Mapping
+
+from .stats import percentile
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+
+INTERNAL, SERVER, CLIENT = "INTERNAL", "SERVER", "CLIENT"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """The context in a W3C traceparent header, or None if it is missing or malformed"""
+    if not value:
+        return None
+    parts = value.strip().lower().split('-')
+    if len(parts) < 4 or parts[0] == 'ff' or (parts[0] == '00' and len(parts) != 4):
+        return None
+    version, trace_id, span_id, flags = parts[:4]
+    if (len(version), len(trace_id), len(span_id), len(flags)) != (2, 32, 16, 2):
+        return None
+    try:
+        sampled = bool(int(flags, 16) & 1)
+        if int(trace_id, 16) == 0 or int(span_id, 16) == 0:
+            return None
+    except ValueError:
+        return None
+    return SpanContext(trace_id, span_id, sampled)
+
+
+_current: contextvars.ContextVar[Optional["NonRecordingSpan"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class NonRecordingSpan:
+    """A span that records nothing: tracing is off or its trace wasn't sampled.
+
+    It still becomes the current span inside a `with` block so its trace
+    context (and the sampling decision) reaches child spans and outgoing
+    requests.
+    """
+
+    recording = False
+
+    def __init__(self, context: Optional[SpanContext] = None):
+        self.context = context
+        self._tokens: List[contextvars.Token] = []
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Mapping[str, Any]):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+    def update_name(self, name: str):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        if self.context is not None:
+            self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            if isinstance(exc, asyncio.CancelledError):
+                self.set_attribute('cancelled', True)
+                self.set_error("cancelled")
+            else:
+                self.record_exception(exc)
+        if self._tokens:
+            try:
+                _current.reset(self._tokens.pop())
+            except ValueError:
+                # Exited from a different context than it was entered in
+                pass
+        self.end()
+        return False
+
+
+NOOP_SPAN = NonRecordingSpan()
+
+
+class Span(NonRecordingSpan):
+    """One timed, recorded operation; use it as a context manager or call end()"""
+
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, context: SpanContext, parent_id: Optional[str], kind: str, attributes: Optional[Mapping[str, Any]]):
+        super().__init__(context)
+        self.tracer = tracer
+        self.name = name
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        if attributes:
+            self.set_attributes(attributes)
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value if isinstance(value, (str, bool, int, float)) else str(value)
+
+    def set_attributes(self, attributes: Mapping[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.events.append({'name': name, 'time_unix_nano': time.time_ns(), 'attributes': attributes or {}})
+
+    def record_exception(self, exc: BaseException):
+        self.add_event('exception', {'exception.type': type(exc).__name__, 'exception.message': str(exc)[:500]})
+        self.set_error(str(exc)[:500])
+
+    def set_error(self, message: str):
+        self.status = "ERROR"
+        self.status_message = message
+
+    def update_name(self, name: str):
+        self.name = name
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.context.trace_id,
+            'span_id': self.context.span_id,
+            'parent_span_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'events': self.events,
+            'status': {'code': self.status, 'message': self.status_message},
+            'resource': {'service.name': self.tracer.service_name, 'process.pid': os.getpid()},
+        }
+
+
+class Tracer:
+    """Creates spans and exports the finished ones in batches from a background thread"""
+
+    def __init__(
+        self,
+        exporter: Optional["SpanExporter"] = None,
+        sample_rate: float = 1.0,
+        service_name: str = "website-cloner",
+        flush_interval: float = 1.0,
+        max_queue: int = 8192,
+    ):
+        self.exporter = exporter
+        self.enabled = exporter is not None
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.service_name = service_name
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Build the tracer from environment settings; disabled (every span a no-op) unless TRACING_ENABLED=true"""
+        if os.getenv("TRACING_ENABLED", "false").lower() != "true":
+            return cls()
+        kind = os.getenv("TRACING_EXPORTER", "file").lower()
+        if kind == "console":
+            exporter: SpanExporter = ConsoleExporter()
+        elif kind == "otlp":
+            exporter = OTLPHTTPExporter(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"))
+        elif kind == "file":
+            exporter = FileExporter(os.getenv("TRACING_FILE", ".cache/traces.jsonl"))
+        else:
+            raise ValueError(f"Unknown TRACING_EXPORTER {kind!r}: use console, file or otlp")
+        return cls(
+            exporter,
+            sample_rate=float(os.getenv("TRACING_SAMPLE_RATE", "0.1")),
+            service_name=os.getenv("OTEL_SERVICE_NAME", "website-cloner"),
+        )
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Mapping[str, Any]] = None,
+        kind: str = INTERNAL,
+        parent: Optional[SpanContext] = None
+    ) -> NonRecordingSpan:
+        """A new span, child of `parent` or else of the current span; a new trace if there is neither"""
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None and _current.get() is not None:
+            parent = _current.get().context
+        if parent is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+            # Same rule as OpenTelemetry's TraceIdRatioBased: compare the id's low 64 bits
+            sampled = int(trace_id[16:], 16) < self.sample_rate * 2**64
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+        context = SpanContext(trace_id, f"{random.getrandbits(64):016x}", sampled)
+        if not sampled:
+            return NonRecordingSpan(context)
+        return Span(self, name, context, parent.span_id if parent else None, kind, attributes)
+
+    def shutdown(self):
+        """Export everything still pending and stop the worker"""
+        self._stopped = True
+        self._wake.set()
+        if self._worker:
+            self._worker.join(timeout=10)
+        self._flush()
+        if self.exporter:
+            self.exporter.shutdown()
+
+    def _finish(self, span: Span):
+        with self._lock:
+            if len(self._pending) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._pending.append(span)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._worker.start()
+        if len(self._pending) >= 512:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            self.exporter.export([span.to_dict() for span in batch])
+        except Exception as e:
+            logger.warning(f"Failed to export {len(batch)} spans: {e}")
+
+
+class SpanExporter(ABC):
+    """Destination for finished spans, called from the tracer's export thread"""
+
+    @abstractmethod
+    def export(self, spans: List[Dict[str, Any]]):
+        """Send a batch of spans (as produced by Span.to_dict)"""
+
+    def shutdown(self):
+        pass
+
+
+class ConsoleExporter(SpanExporter):
+    """One JSON line per span on stderr"""
+
+    def export(self, spans: List[Dict[str, Any]]):
+        sys.stderr.write(''.join(json.dumps(span) + '\n' for span in spans))
+        sys.stderr.flush()
+
+
+class FileExporter(SpanExporter):
+    """Appends one JSON line per span; `{pid}` in the path gives each worker process its own file"""
+
+    def __init__(self, path: str):
+        self.path = path.replace('{pid}', str(os.getpid()))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def export(self, spans: List[Dict[str, Any]]):
+        # One write per batch so processes sharing a file don't interleave lines
+        with open(self.path, 'a', encoding='utf-8') as traces:
+            traces.write(''.join(json.dumps(span) + '\n' for span in spans))
+
+
+class OTLPHTTPExporter(SpanExporter):
+    """Sends spans to an OpenTelemetry collector's OTLP/HTTP JSON endpoint"""
+
+    KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+    STATUS = {"UNSET": 0, "OK": 1, "ERROR": 2}
+
+    def __init__(self, endpoint: str):
+        import httpx
+
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.client = httpx.Client(timeout=10)
+
+    def export(self, spans: List[Dict[str, Any]]):
+        by_resource: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        resources = {}
+        for span in spans:
+            key = json.dumps(span['resource'], sort_keys=True)
+            resources[key] = span['resource']
+            by_resource[key].append(self._span(span))
+        body = {
+            'resourceSpans': [
+                {
+                    'resource': {'attributes': self._attributes(resources[key])},
+                    'scopeSpans': [{'scope': {'name': 'app.tracing'}, 'spans': otlp_spans}],
+                }
+                for key, otlp_spans in by_resource.items()
+            ]
+        }
+        self.client.post(self.url, json=body).raise_for_status()
+
+    def shutdown(self):
+        self.client.close()
+
+    def _span(self, span: Dict[str, Any]) -> Dict[str, Any]:
+        otlp = {
+            'traceId': span['trace_id'],
+            'spanId': span['span_id'],
+            'name': span['name'],
+            'kind': self.KINDS.get(span['kind'], 1),
+            'startTimeUnixNano': str(span['start_time_unix_nano']),
+            'endTimeUnixNano': str(span['end_time_unix_nano']),
+            'attributes': self._attributes(span['attributes']),
+            'events': [
+                {'timeUnixNano': str(event['time_unix_nano']), 'name': event['name'], 'attributes': self._attributes(event['attributes'])}
+                for event in span['events']
+            ],
+            'status': {'code': self.STATUS[span['status']['code']], 'message': span['status']['message'] or ''},
+        }
+        if span['parent_span_id']:
+            otlp['parentSpanId'] = span['parent_span_id']
+        return otlp
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        def value(v):
+            if isinstance(v, bool):
+                return {'boolValue': v}
+            if isinstance(v, int):
+                return {'intValue': str(v)}
+            if isinstance(v, float):
+                return {'doubleValue': v}
+            return {'stringValue': str(v)}
+        return [{'key': key, 'value': value(v)} for key, v in attributes.items()]
+
+
+_tracer = Tracer()
+
+
+def configure(tracer: Tracer) -> Tracer:
+    """Install the process-wide tracer, returning it"""
+    global _tracer
+    _tracer = tracer
+    return tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(
+    name: str,
+    attributes: Optional[Mapping[str, Any]] = None,
+    kind: str = INTERNAL,
+    parent: Optional[SpanContext] = None
+) -> NonRecordingSpan:
+    """Start a span with the process-wide tracer"""
+    return _tracer.start_span(name, attributes, kind, parent)
+
+
+def current_span() -> NonRecordingSpan:
+    return _current.get() or NOOP_SPAN
+
+
+def inject(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the current trace context to outgoing request headers"""
+    current = _current.get()
+    if current is not None and current.context is not None:
+        headers[TRACEPARENT] = current.context.traceparent()
+    return headers
+
+
+def extract(headers: Mapping[str, str]) -> Optional[SpanContext]:
+    """The caller's trace context from incoming request headers"""
+    return parse_traceparent(headers.get(TRACEPARENT))
+
+
+def install_log_correlation():
+    """Append the trace id to log lines written inside a sampled trace (as %(trace)s in the log format)"""
+    factory = logging.getLogRecordFactory()
+
+    def record_with_trace(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        current = _current.get()
+        record.trace = f" [trace_id={current.context.trace_id}]" if current is not None and current.recording else ""
+        return record
+
+    logging.setLogRecordFactory(record_with_trace)
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as traces:
+        return [json.loads(line) for line in traces if line.strip()]
+
+
+def print_summary(spans: List[Dict[str, Any]]):
+    """Count, p50, p95 and error count per span name"""
+    by_name: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for span_record in spans:
+        by_name[span_record['name']].append(span_record)
+    print(f"{len({s['trace_id'] for s in spans})} traces, {len(spans)} spans\n")
+    print(f"{'span':<40}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for name, group in sorted(by_name.items(), key=lambda item: -sum(s['duration_ms'] for s in item[1])):
+        durations = [s['duration_ms'] for s in group]
+        p50 = percentile(durations, 0.5)
+        p95 = percentile(durations, 0.95)
+        errors = sum(1 for s in group if s['status']['code'] == "ERROR")
+        print(f"{name[:39]:<40}{len(group):>7}{p50:>10.1f}{p95:>10.1f}{errors:>8}")
+
+
+def print_trace(spans: List[Dict[str, Any]], trace_id: str):
+    """One trace as an indented tree with start offsets and durations"""
+    trace = [s for s in spans if s['trace_id'] == trace_id]
+    if not trace:
+        print(f"No spans for trace {trace_id}")
+        return
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    ids = {s['span_id'] for s in trace}
+    for span_record in trace:
+        # Spans whose parent is in another file (or wasn't exported) are shown as roots
+        children[span_record['parent_span_id'] if span_record['parent_span_id'] in ids else None].append(span_record)
+    origin = min(s['start_time_unix_nano'] for s in trace)
+
+    def show(span_record: Dict[str, Any], depth: int):
+        offset = (span_record['start_time_unix_nano'] - origin) / 1e6
+        error = f"  ERROR: {span_record['status']['message']}" if span_record['status']['code'] == "ERROR" else ""
+        print(f"{offset:>10.1f}ms {'  ' * depth}{span_record['name']} ({span_record['duration_ms']:.1f}ms){error}")
+        for child in sorted(children[span_record['span_id']], key=lambda s: s['start_time_unix_nano']):
+            show(child, depth + 1)
+
+    for root in sorted(children[None], key=lambda s: s['start_time_unix_nano']):
+        show(root, 0)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m app.tracing", description="Inspect spans written by the file exporter")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="Latency per span name")
+    summary.add_argument("path")
+    show_trace = commands.add_parser("show", help="One trace as a tree")
+    show_trace.add_argument("path")
+    show_trace.add_argument("trace_id")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print_summary(load_spans(args.path))
+    else:
+        print_trace(load_spans(args.path), args.trace_id)
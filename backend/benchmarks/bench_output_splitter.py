@@ -0,0 +1,76 @@
+"""Micro-benchmark: single-pass OutputSplitter vs the previous regex post-processing.
+
+Run from the backend directory:
+    python -m benchmarks.bench_output_splitter
+"""
+import re
+import time
+import argparse
+from typing import Callable, Dict
+
+from app.output_splitter import OutputSplitter
+
+
+def legacy_split(content: str) -> Dict[str, str]:
+    """The regex path the cloners used before OutputSplitter (kept for comparison)"""
+    content = re.sub(r'^```html\s*\n', '', content, flags=re.MULTILINE)
+    content = re.sub(r'^```\s*$', '', content, flags=re.MULTILINE)
+    content = re.sub(r'^```.*\n', '', content, flags=re.MULTILINE)
+    content = content.strip()
+
+    css_match = re.search(r'<style[^>]*>(.*?)</style>', content, re.DOTALL | re.IGNORECASE)
+    css = css_match.group(1).strip() if css_match else ""
+
+    js_matches = re.findall(r'<script[^>]*>(.*?)</script>', content, re.DOTALL | re.IGNORECASE)
+    js = '\n\n'.join(m.strip() for m in js_matches if not any(k in m for k in ['cdn', 'https://', 'http://']))
+
+    html = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
+
+    def replace_script(match):
+        script = match.group(0)
+        return script if any(k in script for k in ['cdn', 'https://', 'http://']) else ''
+
+    html = re.sub(r'<script[^>]*>.*?</script>', replace_script, html, flags=re.DOTALL | re.IGNORECASE)
+    return {'html': html.strip(), 'css': css, 'javascript': js}
+
+
+def make_document(sections: int, unterminated: bool = False) -> str:
+    """A generated-looking page with many style and script blocks"""
+    parts = ["```html", "<!DOCTYPE html>", "<html><head>", "<style>", ":root { --primary: #1a73e8; }", "body { margin: 0; }", "</style>", "</head><body>"]
+    for i in range(sections):
+        parts.append(f'<section id="s{i}" class="card"><h2>Section {i}</h2><p>' + "Lorem ipsum dolor sit amet. " * 8 + "</p></section>")
+        parts.append(f"<style>#s{i} {{ padding: {i % 40}px; color: var(--primary); }}</style>")
+        if i % 5 == 0:
+            parts.append(f"<script>document.getElementById('s{i}').addEventListener('click', () => console.log({i}));</script>")
+        if unterminated and i % 3 == 0:
+            # Truncated output: opening tags that never close
+            parts.append("<style>.broken { color: red;")
+    parts += ['<script src="https://cdn.example.com/lib.js"></script>', "</body></html>", "```"]
+    return "\n".join(parts)
+
+
+def best_of(fn: Callable[[str], Dict[str, str]], content: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(content)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':<28}{'size':>10}{'regex ms':>12}{'splitter ms':>14}{'speedup':>10}")
+    for sections, unterminated in [(20, False), (200, False), (2000, False), (200, True), (1000, True)]:
+        content = make_document(sections, unterminated)
+        legacy = best_of(legacy_split, content, args.repeat)
+        single = best_of(OutputSplitter.split, content, args.repeat)
+        case = f"{sections} sections{' (truncated)' if unterminated else ''}"
+        print(f"{case:<28}{len(content):>10}{legacy * 1000:>12.2f}{single * 1000:>14.2f}{legacy / single:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""End-to-end benchmark: the real scrape and generation pipeline against local fixtures and a mock LLM.
+
+Run from the backend directory (needs Playwright's Chromium, no network or API key):
+    python -m benchmarks.bench_pipeline --repeat 5 --out benchmarks/results/after.json
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/before.json benchmarks/results/after.json
+
+Each fixture (see benchmarks/fixtures.py) is cloned `--repeat` times through
+ClonePipeline with a shared BrowserPool and GrokLLMCloner pointed at
+app.mock_llm, whose latency and token rate are fixed by the flags, so
+differences between runs come from the code rather than the network or model.
+"""
+import os
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List
+
+from app.llm_clients import LLMClientRegistry
+from app.browser_pool import BrowserPool
+from app.mock_llm import MockLLMProvider
+from app.pipeline import ClonePipeline, build_router
+
+from .fixtures import FIXTURES, FixtureServer
+from .harness import MockLLMServer, ResourceSampler, latency_stats, environment, write_results, load_results, change
+
+STAGES = ('scrape', 'generate', 'snapshot')
+
+# The mock has no quota; with the production defaults (60 RPM, 200k TPM) "generate" would time the scheduler's buckets
+MOCK_RATE_LIMITS = {
+    "GROK_REQUESTS_PER_MINUTE": "1000000",
+    "GROK_TOKENS_PER_MINUTE": "1000000000",
+}
+
+
+async def bench_fixture(
+    pipeline: ClonePipeline,
+    url: str,
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    """Clone one fixture `repeat` times, `concurrency` at a time"""
+    slots = asyncio.Semaphore(args.concurrency)
+    durations: List[float] = []
+    errors: List[str] = []
+
+    async def run_once():
+        async with slots:
+            started = time.monotonic()
+            try:
+                if args.mode == "snapshot":
+                    await pipeline.snapshot(url)
+                else:
+                    await pipeline.generate(url, args.generation_mode)
+            except Exception as e:
+                errors.append(str(e))
+                return
+            durations.append(time.monotonic() - started)
+
+    async with ResourceSampler() as sampler:
+        started = time.monotonic()
+        await asyncio.gather(*(run_once() for _ in range(args.repeat)))
+        elapsed = time.monotonic() - started
+
+    return {
+        'stages': {
+            stage: latency_stats(list(pipeline.stage_latencies[stage]))
+            for stage in STAGES if pipeline.stage_latencies[stage]
+        },
+        'total': latency_stats(durations),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_per_min': round(len(durations) / elapsed * 60, 2) if elapsed > 0 else None,
+        **sampler.summary(),
+    }
+
+
+async def run_suite(args: argparse.Namespace, fixtures: FixtureServer, llm: MockLLMServer) -> Dict[str, Any]:
+    # Read by GrokLLMCloner and its scheduler when they are built; explicit rate limits in the environment win
+    os.environ["GROK_API_URL"] = llm.chat_url
+    for name, value in MOCK_RATE_LIMITS.items():
+        os.environ.setdefault(name, value)
+    llm_clients = LLMClientRegistry()
+    # No generation cache or history: every run must reach the model
+    router = build_router("benchmark", None, llm_clients, None) if args.mode == "llm" else None
+    browser_pool = BrowserPool(size=args.browser_pool_size or args.concurrency)
+
+    cases = {}
+    try:
+        # Launch the browser and open the first connections outside the measurements
+        warmup = argparse.Namespace(**{**vars(args), 'repeat': args.warmup})
+        if args.warmup:
+            await bench_fixture(ClonePipeline(router, None, browser_pool), fixtures.url('small'), warmup)
+
+        for name in args.fixtures:
+            print(f"{name}: {args.repeat} runs, concurrency {args.concurrency}", flush=True)
+            pipeline = ClonePipeline(router, None, browser_pool, latency_window=None)
+            cases[name] = await bench_fixture(pipeline, fixtures.url(name), args)
+    finally:
+        await browser_pool.aclose()
+        await llm_clients.aclose()
+
+    return {
+        'environment': {**environment(), 'llm_rate_limits': {name: os.environ[name] for name in MOCK_RATE_LIMITS}},
+        'config': {
+            'mode': args.mode,
+            'generation_mode': args.generation_mode,
+            'repeat': args.repeat,
+            'concurrency': args.concurrency,
+            'browser_pool_size': browser_pool.size,
+            'seed': args.seed,
+            'llm_latency': args.llm_latency,
+            'llm_tokens_per_second': args.llm_tokens_per_second,
+            'llm_completion_tokens': args.llm_completion_tokens,
+        },
+        'browser_launches': browser_pool.launches,
+        'llm_requests': llm.provider.requests,
+        'llm_max_in_flight': llm.provider.max_in_flight,
+        'cases': cases,
+    }
+
+
+def number(value) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def print_report(results: Dict[str, Any]):
+    first_stage = 'snapshot' if results['config']['mode'] == 'snapshot' else 'scrape'
+    print()
+    print(
+        f"{'fixture':<13}{'ok':>4}{'err':>5}{first_stage + ' p50/p95':>18}{'generate p50/p95':>19}"
+        f"{'total p50/p95':>16}{'clones/min':>12}{'RSS MB':>9}{'tree MB':>9}{'browsers':>10}"
+    )
+    for name, case in results['cases'].items():
+        first = case['stages'].get(first_stage, {})
+        generate = case['stages'].get('generate', {})
+        print(
+            f"{name:<13}{case['total']['n']:>4}{case['errors']:>5}"
+            f"{number(first.get('p50')) + '/' + number(first.get('p95')):>18}"
+            f"{number(generate.get('p50')) + '/' + number(generate.get('p95')):>19}"
+            f"{number(case['total']['p50']) + '/' + number(case['total']['p95']):>16}"
+            f"{case['throughput_per_min'] or 0:>12.1f}{case['peak_rss_mb'] or 0:>9.0f}"
+            f"{case['peak_tree_rss_mb'] or 0:>9.0f}{case['peak_browsers'] if case['peak_browsers'] is not None else '-':>10}"
+        )
+        if case['first_error']:
+            print(f"  first error: {case['first_error']}")
+    print(f"\nBrowser launches: {results['browser_launches']}, LLM requests: {results['llm_requests']} "
+          f"(max {results['llm_max_in_flight']} in flight)")
+
+
+def print_comparison(before: Dict[str, Any], after: Dict[str, Any]):
+    print(f"before: {before['environment']['commit']} {before['environment']['timestamp']}")
+    print(f"after:  {after['environment']['commit']} {after['environment']['timestamp']}")
+    if before['config'] != after['config']:
+        print("warning: the runs used different settings, numbers may not be comparable")
+    print(f"\n{'fixture':<13}{'metric':<16}{'before':>10}{'after':>10}{'change':>9}")
+    for name in after['cases']:
+        if name not in before['cases']:
+            continue
+        old, new = before['cases'][name], after['cases'][name]
+        rows = [('total p50', old['total']['p50'], new['total']['p50']),
+                ('total p95', old['total']['p95'], new['total']['p95'])]
+        for stage in STAGES:
+            if stage in new['stages'] and stage in old['stages']:
+                rows.append((f"{stage} p50", old['stages'][stage]['p50'], new['stages'][stage]['p50']))
+        rows += [('clones/min', old['throughput_per_min'], new['throughput_per_min']),
+                 ('peak tree MB', old['peak_tree_rss_mb'], new['peak_tree_rss_mb'])]
+        for metric, before_value, after_value in rows:
+            print(f"{name:<13}{metric:<16}{number(before_value):>10}{number(after_value):>10}{change(after_value, before_value):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", nargs="+", choices=list(FIXTURES), default=list(FIXTURES))
+    parser.add_argument("--repeat", type=int, default=5, help="Clones per fixture (default 5)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Clones of a fixture in flight at once (default 1)")
+    parser.add_argument("--browser-pool-size", type=int, default=0, help="Browser pool slots (default: --concurrency)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs before the first fixture (default 1)")
+    parser.add_argument("--mode", choices=["llm", "snapshot"], default="llm")
+    parser.add_argument("--generation-mode", choices=["single", "sectioned"], default="single")
+    parser.add_argument("--seed", type=int, default=1, help="Fixture corpus seed")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mock LLM time to first token (seconds)")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=500.0, help="Mock LLM generation rate")
+    parser.add_argument("--llm-completion-tokens", type=int, default=1500, help="Mock LLM tokens per completion")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(load_results(args.compare[0]), load_results(args.compare[1]))
+        return
+
+    provider = MockLLMProvider(
+        latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        completion_tokens=args.llm_completion_tokens,
+    )
+    with FixtureServer(seed=args.seed) as fixtures, MockLLMServer(provider) as llm:
+        results = asyncio.run(run_suite(args, fixtures, llm))
+
+    print_report(results)
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Fixture corpus and a local static-site server for the end-to-end benchmarks.
+
+Every page is generated in memory from a fixed seed, so two runs (or two
+machines) scrape byte-identical sites.
+"""
+import json
+import zlib
+import struct
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Tuple
+
+# name -> what the page stresses
+FIXTURES = {
+    'small': 'a short marketing page',
+    'large_dom': 'thousands of nested elements',
+    'css_heavy': 'thousands of CSS rules across inline and linked stylesheets',
+    'spa': 'an empty shell rendered by JavaScript after load',
+    'image_heavy': 'dozens of images of varied sizes',
+}
+
+LOREM = (
+    "Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt "
+    "ut labore et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation"
+).split()
+
+
+def png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """A solid-colour PNG"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    row = b'\x00' + bytes(rgb) * width
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(row * height))
+        + chunk(b'IEND', b'')
+    )
+
+
+def page(title: str, body: str, head: str = '') -> str:
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8">'
+        f'<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+        f'<title>{title}</title>{head}</head><body>{body}</body></html>'
+    )
+
+
+def build_corpus(seed: int = 1) -> Dict[str, Tuple[bytes, str]]:
+    """path -> (body, content type) for every fixture page and the files it links"""
+    rng = random.Random(seed)
+
+    def words(count: int) -> str:
+        return ' '.join(rng.choice(LOREM) for _ in range(count))
+
+    files: Dict[str, Tuple[bytes, str]] = {}
+
+    def add(path: str, body, content_type: str = 'text/html; charset=utf-8'):
+        files[path] = (body.encode('utf-8') if isinstance(body, str) else body, content_type)
+
+    nav = '<header><nav>' + ''.join(f'<a href="#s{i}">{words(1)}</a>' for i in range(5)) + '</nav></header>'
+    footer = f'<footer><p>{words(12)}</p></footer>'
+
+    sections = ''.join(f'<section id="s{i}"><h2>{words(3)}</h2><p>{words(40)}</p></section>' for i in range(5))
+    add('/small/', page('Small fixture', nav + f'<main><h1>{words(4)}</h1>{sections}</main>' + footer,
+                        '<style>body{font-family:sans-serif;margin:0}header,footer{padding:16px;background:#1a73e8;color:#fff}</style>'))
+
+    cards = ''.join(
+        f'<div class="card"><div class="card-body"><h3>{words(2)}</h3><ul>'
+        + ''.join(f'<li><span>{words(3)}</span></li>' for _ in range(8))
+        + '</ul></div></div>'
+        for _ in range(500)
+    )
+    add('/large_dom/', page('Large DOM fixture', nav + f'<main><div class="grid">{cards}</div></main>' + footer,
+                            '<style>.grid{display:grid;grid-template-columns:repeat(4,1fr);gap:8px}.card{border:1px solid #ddd}</style>'))
+
+    def rules(prefix: str, count: int) -> str:
+        return '\n'.join(
+            f'.{prefix}-{i}{{color:#{rng.randrange(0x1000000):06x};padding:{i % 24}px;'
+            f'margin:{i % 7}px {i % 11}px;border-radius:{i % 9}px}}'
+            for i in range(count)
+        )
+    add('/css_heavy/styles.css', rules('l', 3000) + '\n@media (max-width: 768px){' + rules('m', 500) + '}', 'text/css')
+    styled = ''.join(f'<div class="l-{i} i-{i}">{words(6)}</div>' for i in range(0, 3000, 3))
+    add('/css_heavy/', page('CSS-heavy fixture', nav + f'<main>{styled}</main>' + footer,
+                            f'<link rel="stylesheet" href="/css_heavy/styles.css"><style>{rules("i", 1500)}</style>'))
+
+    items = [{'title': words(3), 'text': words(25)} for _ in range(60)]
+    add('/spa/data.json', json.dumps(items), 'application/json')
+    add('/spa/app.js', """
+document.addEventListener('DOMContentLoaded', async () => {
+  const root = document.getElementById('root');
+  root.innerHTML = '<header><nav><a href="#">Home</a><a href="#list">List</a></nav></header><main id="list"></main>';
+  const items = await (await fetch('/spa/data.json')).json();
+  setTimeout(() => {
+    document.getElementById('list').innerHTML = items.map(
+      (item, i) => `<article class="item" id="item-${i}"><h2>${item.title}</h2><p>${item.text}</p></article>`
+    ).join('');
+  }, 300);
+});
+""", 'application/javascript')
+    add('/spa/', page('SPA fixture', '<div id="root"></div>', '<script src="/spa/app.js"></script>'))
+
+    images = []
+    for i in range(60):
+        width, height = rng.choice([(64, 64), (320, 180), (640, 360), (1200, 600)])
+        add(f'/image_heavy/img/{i}.png', png(width, height, (rng.randrange(256), rng.randrange(256), rng.randrange(256))), 'image/png')
+        images.append(f'<figure><img src="/image_heavy/img/{i}.png" width="{width}" height="{height}" alt="{words(2)}"><figcaption>{words(5)}</figcaption></figure>')
+    add('/image_heavy/', page('Image-heavy fixture', nav + f'<main class="gallery">{"".join(images)}</main>' + footer,
+                              '<style>.gallery{display:flex;flex-wrap:wrap;gap:8px}img{max-width:100%;height:auto}</style>'))
+    return files
+
+
+class FixtureServer:
+    """Serves the fixture corpus on 127.0.0.1 from a background thread"""
+
+    def __init__(self, seed: int = 1, port: int = 0):
+        files = build_corpus(seed)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if f'{path}/' in files:
+                    path = f'{path}/'
+                if path not in files:
+                    self.send_error(404)
+                    return
+                body, content_type = files[path]
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, fixture: str) -> str:
+        return f"{self.base_url}/{fixture}/"
+
+    def urls(self, fixtures: List[str]) -> List[str]:
+        return [self.url(fixture) for fixture in fixtures]
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,178 @@
+"""Shared pieces for the end-to-end benchmarks: the mock LLM server, resource
+sampling and results files."""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import platform
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.stats import percentile
+from app.mock_llm import MockLLMProvider
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class MockLLMServer:
+    """app.mock_llm served over HTTP from a background thread, so the cloners talk to it like a real provider"""
+
+    def __init__(self, provider: MockLLMProvider):
+        import uvicorn
+
+        self.provider = provider
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self.server = uvicorn.Server(uvicorn.Config(provider.app, log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self.server.run, kwargs={'sockets': [self._socket]}, daemon=True)
+
+    @property
+    def chat_url(self) -> str:
+        return f"http://127.0.0.1:{self._socket.getsockname()[1]}/v1/chat/completions"
+
+    def __enter__(self) -> "MockLLMServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Mock LLM server did not start")
+            time.sleep(0.02)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=5)
+        self._socket.close()
+
+
+def _process_table() -> Dict[int, Dict[str, Any]]:
+    """pid -> {ppid, name, rss} for every process, from /proc (Linux only)"""
+    table = {}
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+            rss_pages = int((entry / 'statm').read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            # Exited while we were looking
+            continue
+        name = stat[stat.index('(') + 1:stat.rindex(')')]
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        table[int(entry.name)] = {'ppid': ppid, 'name': name, 'rss': rss_pages * PAGE_SIZE}
+    return table
+
+
+def process_tree(root: int) -> Dict[str, Any]:
+    """RSS of this process and its descendants, and how many browser processes are among them"""
+    table = _process_table()
+    children: Dict[int, List[int]] = {}
+    for pid, info in table.items():
+        children.setdefault(info['ppid'], []).append(pid)
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        if pid in table:
+            tree.append(pid)
+        stack.extend(children.get(pid, []))
+    browser_names = ('chrom', 'headless_shell')
+    return {
+        'self_rss': table.get(root, {}).get('rss', 0),
+        'tree_rss': sum(table[pid]['rss'] for pid in tree),
+        # Only top-level browser processes: a Chromium's renderer and GPU children share its name
+        'browsers': sum(
+            1 for pid in tree
+            if table[pid]['name'].startswith(browser_names)
+            and not table.get(table[pid]['ppid'], {}).get('name', '').startswith(browser_names)
+        ) if tree else 0,
+    }
+
+
+class ResourceSampler:
+    """Samples memory and browser processes in the background while a benchmark runs"""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.supported = sys.platform.startswith('linux')
+        self.samples: List[Dict[str, Any]] = []
+        self._started = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ResourceSampler":
+        self._started = time.monotonic()
+        if self.supported:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            sample = await asyncio.to_thread(process_tree, os.getpid())
+            sample['t'] = round(time.monotonic() - self._started, 2)
+            self.samples.append(sample)
+            await asyncio.sleep(self.interval)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {'peak_rss_mb': None, 'peak_tree_rss_mb': None, 'peak_browsers': None}
+        return {
+            'peak_rss_mb': round(max(s['self_rss'] for s in self.samples) / 2**20, 1),
+            'peak_tree_rss_mb': round(max(s['tree_rss'] for s in self.samples) / 2**20, 1),
+            'peak_browsers': max(s['browsers'] for s in self.samples),
+        }
+
+
+def latency_stats(values: List[float]) -> Dict[str, Any]:
+    """Sample count and p50/p95/max in seconds"""
+    if not values:
+        return {'n': 0, 'p50': None, 'p95': None, 'max': None}
+    return {
+        'n': len(values),
+        'p50': round(percentile(values, 0.5), 3),
+        'p95': round(percentile(values, 0.95), 3),
+        'max': round(max(values), 3),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """What the numbers were measured on"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def write_results(path: str, results: Dict[str, Any]):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+    print(f"Results written to {path}")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def change(new: Optional[float], old: Optional[float]) -> str:
+    """Relative change for comparison tables"""
+    if new is None or old is None or old == 0:
+        return 'n/a'
+    return f"{(new - old) / old * 100:+.0f}%"
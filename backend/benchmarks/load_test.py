@@ -0,0 +1,359 @@
+"""Load test: how many clones one API server handles before latency degrades.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --rates 0.1 0.2 0.5 1 2 --step-duration 60 --out benchmarks/results/load.json
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --rates 0.5 1
+
+Without --target the server is started as a subprocess (uvicorn) pointed at
+the local fixture site and the mock LLM, with the generation cache and
+history off so every job does the full work. A --target server keeps its
+own LLM settings but must be able to reach the fixture site on this host.
+
+Each step offers Poisson arrivals at one rate, spread over --clients API
+keys; every simulated user POSTs /clone, polls /clone/{id}/status with
+jittered intervals until the job finishes, then fetches the result. /health is sampled throughout for event loop lag,
+memory and queue depth. Steps run from the lowest rate up and stop at the
+first one that saturates: too many failures, end-to-end p95 well above the
+first step's, or a blocked event loop.
+"""
+import os
+import sys
+import time
+import socket
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from app.mock_llm import MockLLMProvider
+
+from .fixtures import FIXTURES, FixtureServer
+from .harness import MockLLMServer, process_tree, latency_stats, environment, write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LocalServer:
+    """The API server in a subprocess, configured for load testing"""
+
+    def __init__(self, llm_url: str, extra_env: Dict[str, str]):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self._workdir = tempfile.TemporaryDirectory(prefix="loadtest-")
+        self.env = {
+            **os.environ,
+            "GROK_API_KEY": "loadtest",
+            "GROK_API_URL": llm_url,
+            "GEMINI_API_KEY": "",
+            "GENERATION_CACHE_ENABLED": "false",
+            "CLONE_HISTORY_ENABLED": "false",
+            "ARTIFACTS_DIR": os.path.join(self._workdir.name, "artifacts"),
+            "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+            **extra_env,
+        }
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "LocalServer":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=self.env,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.base_url}/health", timeout=2).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+        self.__exit__()
+        raise RuntimeError("API server did not become healthy within 60s")
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._workdir.cleanup()
+
+
+class Step:
+    """Everything measured while offering one arrival rate"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.arrivals = 0
+        self.outcomes: Counter = Counter()
+        self.end_to_end: List[float] = []
+        self.endpoints: Dict[str, List[float]] = {}
+        self.endpoint_errors: Counter = Counter()
+        self.samples: List[Dict[str, Any]] = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def timed(self, endpoint: str, seconds: float, status_code: int):
+        self.endpoints.setdefault(endpoint, []).append(seconds)
+        # 429 is admission control working, not a failure of the endpoint
+        if status_code >= 400 and status_code != 429:
+            self.endpoint_errors[endpoint] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        completed = self.outcomes['completed']
+        lag_p99 = [s['loop_lag_p99_ms'] for s in self.samples if s.get('loop_lag_p99_ms') is not None]
+        lag_max = [s['loop_lag_max_ms'] for s in self.samples if s.get('loop_lag_max_ms') is not None]
+        rss = [s[key] for s in self.samples for key in ('server_tree_rss_mb', 'server_rss_mb') if s.get(key) is not None]
+        return {
+            'rate_per_s': self.rate,
+            'arrivals': self.arrivals,
+            'outcomes': dict(self.outcomes),
+            'error_rate': round(1 - completed / self.arrivals, 4) if self.arrivals else None,
+            'rejected_rate': round(self.outcomes['rejected'] / self.arrivals, 4) if self.arrivals else None,
+            'throughput_per_min': round(completed / self.elapsed * 60, 2) if self.elapsed else None,
+            'end_to_end': latency_stats(self.end_to_end),
+            'endpoints': {
+                endpoint: {**latency_stats(values), 'errors': self.endpoint_errors[endpoint]}
+                for endpoint, values in sorted(self.endpoints.items())
+            },
+            'loop_lag_p99_ms': max(lag_p99) if lag_p99 else None,
+            'loop_lag_max_ms': max(lag_max) if lag_max else None,
+            'peak_rss_mb': max(rss) if rss else None,
+            'peak_queued': max((s.get('queued') or 0 for s in self.samples), default=None),
+            'elapsed_s': round(self.elapsed, 1),
+        }
+
+
+async def timed_request(client: httpx.AsyncClient, step: Step, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+    started = time.monotonic()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        step.timed(endpoint, time.monotonic() - started, 599)
+        raise
+    step.timed(endpoint, time.monotonic() - started, response.status_code)
+    return response
+
+
+async def user(client: httpx.AsyncClient, step: Step, url: str, api_key: str, args: argparse.Namespace, rng: random.Random):
+    """One simulated user: submit a clone, poll until it finishes, fetch the result"""
+    started = time.monotonic()
+    try:
+        response = await timed_request(
+            client, step, "POST /clone", "POST", "/clone",
+            json={"url": url, "mode": args.mode, "generation_mode": args.generation_mode},
+            headers={"X-API-Key": api_key}
+        )
+        if response.status_code == 429:
+            step.outcomes['rejected'] += 1
+            return
+        if response.status_code != 200:
+            step.outcomes['http_error'] += 1
+            return
+        clone_id = response.json()['clone_id']
+
+        while time.monotonic() - started < args.job_timeout:
+            await asyncio.sleep(args.poll_interval * rng.uniform(0.5, 1.5))
+            response = await timed_request(client, step, "GET /clone/{id}/status", "GET", f"/clone/{clone_id}/status")
+            if response.status_code != 200:
+                step.outcomes['http_error'] += 1
+                return
+            status = response.json()['status']
+            if status == "error":
+                step.outcomes['failed'] += 1
+                return
+            if status == "completed":
+                response = await timed_request(client, step, "GET /clone/{id}/result", "GET", f"/clone/{clone_id}/result")
+                if response.status_code != 200:
+                    step.outcomes['http_error'] += 1
+                    return
+                step.end_to_end.append(time.monotonic() - started)
+                step.outcomes['completed'] += 1
+                return
+        step.outcomes['timeout'] += 1
+    except httpx.HTTPError:
+        step.outcomes['http_error'] += 1
+
+
+async def sample_server(client: httpx.AsyncClient, step: Step, server_pid: Optional[int], interval: float):
+    """Event loop lag, memory and queue depth from /health (and /proc for a local server) until cancelled"""
+    while True:
+        sample: Dict[str, Any] = {'t': round(time.monotonic() - step.started, 1)}
+        try:
+            health = (await client.get("/health", timeout=10)).json()
+            runtime = health.get('runtime') or {}
+            admission = health.get('admission') or {}
+            sample.update(
+                loop_lag_p99_ms=(runtime.get('loop_lag_ms') or {}).get('p99'),
+                loop_lag_max_ms=(runtime.get('loop_lag_ms') or {}).get('max'),
+                server_rss_mb=runtime.get('rss_mb'),
+                queued=admission.get('queued'),
+                running=admission.get('running', health.get('active_clones')),
+            )
+        except (httpx.HTTPError, ValueError):
+            sample['health_error'] = True
+        if server_pid:
+            tree = await asyncio.to_thread(process_tree, server_pid)
+            sample.update(server_tree_rss_mb=round(tree['tree_rss'] / 2**20, 1), browsers=tree['browsers'])
+        step.samples.append(sample)
+        await asyncio.sleep(interval)
+
+
+async def run_step(client: httpx.AsyncClient, rate: float, urls: List[str], args: argparse.Namespace, server_pid: Optional[int]) -> Step:
+    step = Step(rate)
+    rng = random.Random(f"{args.seed}-{rate}")
+    sampler = asyncio.create_task(sample_server(client, step, server_pid, args.sample_interval))
+    users = []
+    try:
+        # Open loop: arrivals keep coming at the offered rate however slow the server gets
+        next_arrival = step.started
+        while True:
+            next_arrival += rng.expovariate(rate)
+            if next_arrival - step.started > args.step_duration:
+                break
+            await asyncio.sleep(max(0.0, next_arrival - time.monotonic()))
+            step.arrivals += 1
+            # Spread arrivals over distinct clients so per-client fair-share limits don't dominate
+            api_key = f"loadtest-{step.arrivals % args.clients}"
+            users.append(asyncio.create_task(user(client, step, urls[step.arrivals % len(urls)], api_key, args, rng)))
+        # Let this step's jobs finish so they are measured here and don't load the next step
+        if users:
+            await asyncio.wait(users, timeout=args.job_timeout)
+    finally:
+        for task in users:
+            if not task.done():
+                task.cancel()
+                step.outcomes['timeout'] += 1
+        sampler.cancel()
+        await asyncio.gather(sampler, *users, return_exceptions=True)
+    step.elapsed = time.monotonic() - step.started
+    return step
+
+
+def saturation_reasons(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]], args: argparse.Namespace) -> List[str]:
+    """Why a step counts as past the saturation point (empty if it doesn't)"""
+    reasons = []
+    if summary['error_rate'] is not None and summary['error_rate'] > args.max_error_rate:
+        reasons.append(f"{summary['error_rate']:.0%} of jobs did not complete")
+    p95, base_p95 = summary['end_to_end']['p95'], baseline['end_to_end']['p95'] if baseline else None
+    if p95 is not None and base_p95 and p95 > base_p95 * args.latency_factor:
+        reasons.append(f"end-to-end p95 {p95:.1f}s is over {args.latency_factor:g}x the first step's {base_p95:.1f}s")
+    if summary['loop_lag_p99_ms'] is not None and summary['loop_lag_p99_ms'] > args.max_loop_lag_ms:
+        reasons.append(f"event loop lag p99 {summary['loop_lag_p99_ms']:.0f}ms")
+    return reasons
+
+
+async def run_load_test(base_url: str, urls: List[str], args: argparse.Namespace, server_pid: Optional[int]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    steps, timeline = [], []
+    saturation_rate, baseline = None, None
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        for rate in sorted(args.rates):
+            print(f"step {rate:g}/s for {args.step_duration:g}s ...", flush=True)
+            step = await run_step(client, rate, urls, args, server_pid)
+            summary = step.summary()
+            if baseline is None and summary['end_to_end']['n']:
+                baseline = summary
+            summary['saturated'] = saturation_reasons(summary, baseline, args)
+            steps.append(summary)
+            timeline.extend({**sample, 'rate_per_s': rate} for sample in step.samples)
+            print_step(summary)
+            if summary['saturated']:
+                saturation_rate = rate
+                if not args.keep_going:
+                    break
+
+    passed = [s['rate_per_s'] for s in steps if not s['saturated']]
+    return {
+        'environment': environment(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('out', 'target')},
+        'target': base_url if args.target else 'local',
+        'saturated_at_rate_per_s': saturation_rate,
+        'max_sustained_rate_per_s': max(passed) if passed else None,
+        'steps': steps,
+        'timeline': timeline,
+    }
+
+
+def print_step(summary: Dict[str, Any]):
+    e2e = summary['end_to_end']
+    status = summary['endpoints'].get("GET /clone/{id}/status", {})
+    print(
+        f"  {summary['arrivals']} arrivals, outcomes {summary['outcomes']}, "
+        f"{summary['throughput_per_min'] or 0:.1f} clones/min\n"
+        f"  end-to-end p50 {e2e['p50'] or 0:.1f}s p95 {e2e['p95'] or 0:.1f}s, "
+        f"status p95 {(status.get('p95') or 0) * 1000:.0f}ms, "
+        f"loop lag p99 {summary['loop_lag_p99_ms'] or 0:.0f}ms, peak RSS {summary['peak_rss_mb'] or 0:.0f}MB, "
+        f"peak queue {summary['peak_queued'] or 0}",
+        flush=True
+    )
+    for reason in summary['saturated']:
+        print(f"  saturated: {reason}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", help="Base URL of a running server (default: start one locally)")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.1, 0.2, 0.5, 1.0, 2.0], help="Arrival rates to step through (clones/s)")
+    parser.add_argument("--step-duration", type=float, default=60.0, help="Seconds of arrivals per step (default 60)")
+    parser.add_argument("--job-timeout", type=float, default=300.0, help="Give up on a job after this many seconds (default 300)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Mean seconds between status polls (default 2)")
+    parser.add_argument("--clients", type=int, default=50, help="Distinct API keys users are spread over (default 50)")
+    parser.add_argument("--fixtures", nargs="+", choices=list(FIXTURES), default=list(FIXTURES))
+    parser.add_argument("--mode", choices=["llm", "snapshot"], default="llm")
+    parser.add_argument("--generation-mode", choices=["single", "sectioned"], default="single")
+    parser.add_argument("--max-error-rate", type=float, default=0.05, help="Saturated above this share of failed/rejected jobs")
+    parser.add_argument("--latency-factor", type=float, default=2.0, help="Saturated when end-to-end p95 exceeds the first step's by this factor")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=200.0, help="Saturated above this event loop lag p99")
+    parser.add_argument("--keep-going", action="store_true", help="Run every rate even after saturation")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between /health samples")
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--max-connections", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mock LLM time to first token (seconds)")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=500.0, help="Mock LLM generation rate")
+    parser.add_argument("--llm-completion-tokens", type=int, default=1500, help="Mock LLM tokens per completion")
+    parser.add_argument("--server-env", nargs="*", default=[], metavar="NAME=VALUE", help="Extra settings for the local server, e.g. BROWSER_POOL_SIZE=8")
+    parser.add_argument("--out", help="Write the results (steps and the sampled timeline) to this JSON file")
+    args = parser.parse_args()
+
+    provider = MockLLMProvider(
+        latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        completion_tokens=args.llm_completion_tokens,
+    )
+    with FixtureServer(seed=args.seed) as fixtures, MockLLMServer(provider) as llm:
+        urls = fixtures.urls(args.fixtures)
+        if args.target:
+            results = asyncio.run(run_load_test(args.target, urls, args, None))
+        else:
+            extra_env = dict(setting.split("=", 1) for setting in args.server_env)
+            with LocalServer(llm.chat_url, extra_env) as server:
+                results = asyncio.run(run_load_test(server.base_url, urls, args, server.process.pid))
+
+    print()
+    if results['saturated_at_rate_per_s'] is None:
+        print(f"No saturation up to {max(args.rates):g} clones/s")
+    else:
+        print(f"Saturated at {results['saturated_at_rate_per_s']:g} clones/s; "
+              f"highest sustained rate {results['max_sustained_rate_per_s'] or 0:g} clones/s")
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
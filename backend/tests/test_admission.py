@@ -0,0 +1,35 @@
+import time
+import asyncio
+import unittest
+
+from app.admission import AdmissionController
+
+
+class FixedLatencies:
+    """Pipeline stand-in with known stage durations"""
+
+    def latency(self, stage: str) -> float:
+        return {'scrape': 0.4, 'generate': 1.6, 'snapshot': 1.0}[stage]
+
+
+class EstimateTest(unittest.IsolatedAsyncioTestCase):
+    async def test_running_job_eta_counts_down(self):
+        admission = AdmissionController(FixedLatencies(), browser_slots=1, llm_slots=lambda: 1, max_running=1)
+        admission.enqueue("a", "client", "interactive", "llm")
+        admission.enqueue("b", "client", "interactive", "llm")
+
+        async with admission.slot("a"):
+            self.assertEqual(admission.position("b"), 1)
+            first = admission.estimate(None, "llm", admission.started_at("a"))
+            await asyncio.sleep(0.5)
+            later = admission.estimate(None, "llm", admission.started_at("a"))
+
+        self.assertIsNone(admission.started_at("a"))
+        self.assertEqual(first['eta_seconds'], 2.0)
+        self.assertAlmostEqual(later['eta_seconds'], 1.5, delta=0.15)
+        # Running longer than usual doesn't go negative
+        self.assertEqual(admission.estimate(None, "llm", time.monotonic() - 10)['eta_seconds'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import os
+import asyncio
+import zipfile
+import tempfile
+import unittest
+
+from app.artifacts import ArtifactStore, iter_zip, slice_chunks
+
+
+class GatedStore(ArtifactStore):
+    """Holds back any write whose HTML mentions "slow" until the gate opens"""
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.gate = asyncio.Event()
+
+    async def _download_assets(self, directory, base_url, html, css):
+        if 'slow' in html:
+            await self.gate.wait()
+        return {}
+
+
+class WriteOrderingTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = GatedStore(self.tmp.name)
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    def index(self, clone_id: str) -> str:
+        return (self.store.path(clone_id) / 'index.html').read_text(encoding='utf-8')
+
+    async def test_older_write_finishing_last_does_not_replace_newer(self):
+        older = asyncio.create_task(self.store.write('c1', {'html': '<p>slow original</p>'}))
+        await asyncio.sleep(0)
+        newer = await self.store.write('c1', {'html': '<p>refined</p>'})
+        self.store.gate.set()
+        returned = await older
+
+        self.assertIn('refined', self.index('c1'))
+        self.assertEqual(returned, newer)
+        self.assertEqual(await self.store.manifest('c1'), newer)
+
+    async def test_concurrent_writes_both_succeed(self):
+        self.store.gate.set()
+        results = await asyncio.gather(*[self.store.write('c1', {'html': f'<p>{i}</p>'}) for i in range(5)])
+
+        self.assertEqual(await self.store.manifest('c1'), results[-1])
+        self.assertIn('<p>4</p>', self.index('c1'))
+
+    async def test_write_in_flight_when_removed_is_discarded(self):
+        pending = asyncio.create_task(self.store.write('c1', {'html': '<p>slow</p>'}))
+        await asyncio.sleep(0)
+        await self.store.remove('c1')
+        self.store.gate.set()
+        await pending
+
+        self.assertFalse(self.store.path('c1').exists())
+        self.assertIsNone(await self.store.manifest('c1'))
+
+
+class ArchiveTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(self.tmp.name, download_assets=False)
+        # Large enough to span several chunks, with a stored (already compressed) member too
+        manifest = await self.store.write('c1', {
+            'html': '<main>' + ''.join(f'<p>paragraph {i}</p>' for i in range(5000)) + '</main>',
+            'css': 'body { color: red; }\n' * 200,
+            'javascript': 'console.log(1);',
+        })
+        asset = self.store.path('c1') / 'assets' / 'blob.png'
+        asset.write_bytes(os.urandom(150_000))
+        self.manifest = {**manifest, 'files': {**manifest['files'], 'assets/blob.png': 'unhashed'}}
+        self.files = self.store.files('c1', self.manifest)
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trips_through_zipfile(self):
+        data = b''.join(iter_zip(self.files, chunk_size=4096))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(sorted(archive.namelist()), sorted(name for name, _ in self.files))
+            for name, path in self.files:
+                self.assertEqual(archive.read(name), path.read_bytes())
+
+    def test_output_is_reproducible(self):
+        self.assertEqual(b''.join(iter_zip(self.files)), b''.join(iter_zip(self.files, chunk_size=1000)))
+
+    async def test_archive_size_equals_streamed_length(self):
+        size = await self.store.archive_size('c1', self.manifest)
+
+        self.assertEqual(size, len(b''.join(iter_zip(self.files))))
+
+    def test_slice_chunks_matches_full_slice(self):
+        full = b''.join(iter_zip(self.files))
+        last = len(full) - 1
+        for start, end in [(0, 0), (0, last), (1, 4096), (4095, 4096), (65535, 65536), (last - 10, last), (last, last), (100, 50_000)]:
+            with self.subTest(start=start, end=end):
+                sliced = b''.join(slice_chunks(iter_zip(self.files, chunk_size=4096), start, end))
+                self.assertEqual(sliced, full[start:end + 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
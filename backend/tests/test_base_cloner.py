@@ -0,0 +1,120 @@
+import unittest
+
+from app.base_cloner import BaseLLMCloner, MIN_CONTINUATION_OVERLAP
+from app.deadline import Deadline, DeadlineExceeded
+
+
+class ScriptedCloner(BaseLLMCloner):
+    """Returns queued completions in order; an exception in the queue is raised instead"""
+
+    provider = "scripted"
+    model = "scripted"
+
+    def __init__(self, completions):
+        super().__init__("key")
+        self.completions = list(completions)
+
+    async def _request_completion(self, messages, max_tokens, deadline=None):
+        completion = self.completions.pop(0)
+        if isinstance(completion, Exception):
+            raise completion
+        return completion
+
+    def _build_request(self, messages, max_tokens):
+        return "http://scripted", {}, {}
+
+    def _parse_response(self, result):
+        return None
+
+
+def completion(content: str, finish_reason: str = "stop"):
+    return {'content': content, 'finish_reason': finish_reason, 'usage': {'prompt_tokens': 10, 'completion_tokens': 5}}
+
+
+class ContinuationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_continuation_out_of_time_keeps_received_output(self):
+        first = "<html><body><main><p>" + "x" * 100 + "</p>"
+        cloner = ScriptedCloner([
+            completion(first, "length"),
+            completion("<p>more</p>", "length"),
+            DeadlineExceeded("scripted ran out of time"),
+        ])
+
+        generation = await cloner._complete("system", "user", deadline=Deadline.after(60))
+
+        self.assertEqual(generation['content'], first + "<p>more</p>")
+        self.assertTrue(generation['truncated_by_deadline'])
+        self.assertEqual(generation['continuations'], 2)
+        self.assertEqual(generation['usage'], {'prompt_tokens': 20, 'completion_tokens': 10})
+
+
+class MergeContinuationTest(unittest.TestCase):
+    def setUp(self):
+        self.cloner = ScriptedCloner([])
+
+    def test_long_repeated_overlap_is_dropped(self):
+        repeated = '<div class="card-grid">' + "y" * MIN_CONTINUATION_OVERLAP
+        content = "<main>" + repeated
+        merged = self.cloner._merge_continuation(content, repeated + "</div></main>")
+
+        self.assertEqual(merged, "<main>" + repeated + "</div></main>")
+
+    def test_exact_minimum_overlap_is_dropped(self):
+        repeated = "z" * MIN_CONTINUATION_OVERLAP
+        merged = self.cloner._merge_continuation("<p>" + repeated, repeated + "</p>")
+
+        self.assertEqual(merged, "<p>" + repeated + "</p>")
+
+    def test_short_overlap_is_kept(self):
+        # "</div>" repeating at the join is normal output, not the model restating itself
+        content = "<div><div>a</div>"
+        continuation = "</div><footer></footer>"
+        self.assertLess(len("</div>"), MIN_CONTINUATION_OVERLAP)
+
+        self.assertEqual(self.cloner._merge_continuation(content, continuation), content + continuation)
+
+    def test_no_overlap_appends(self):
+        self.assertEqual(self.cloner._merge_continuation("<ul><li>a</li>", "<li>b</li></ul>"), "<ul><li>a</li><li>b</li></ul>")
+
+    def test_whitespace_at_the_join_is_kept(self):
+        content = self.cloner._clean_response("```html\n<p>Hello", truncated=True)
+        continuation = self.cloner._clean_response(" world</p>\n```", continued=True)
+
+        self.assertEqual(self.cloner._merge_continuation(content, continuation), "<p>Hello world</p>")
+
+
+class TrimToSafeBoundaryTest(unittest.TestCase):
+    def setUp(self):
+        self.cloner = ScriptedCloner([])
+
+    def test_cut_inside_a_tag_is_trimmed_to_the_last_closed_tag(self):
+        content = "<section><h2>Plans</h2><p>Pick one</p><a href=\"/pri"
+
+        self.assertEqual(self.cloner._trim_to_safe_boundary(content), "<section><h2>Plans</h2><p>Pick one</p>")
+
+    def test_cut_inside_a_css_rule_is_trimmed_to_the_last_rule(self):
+        content = ".a { color: red; }\n.b { color: blue; }\n.c { mar"
+
+        self.assertEqual(self.cloner._trim_to_safe_boundary(content), ".a { color: red; }\n.b { color: blue; }")
+
+    def test_long_tail_is_not_thrown_away(self):
+        content = "<p>" + "text without any closing boundary " * 10
+
+        self.assertEqual(self.cloner._trim_to_safe_boundary(content), content)
+
+    def test_complete_output_is_unchanged(self):
+        self.assertEqual(self.cloner._trim_to_safe_boundary("<p>done</p>"), "<p>done</p>")
+
+
+class SubclassTest(unittest.TestCase):
+    def test_missing_provider_methods_fail_at_instantiation(self):
+        class Incomplete(BaseLLMCloner):
+            def _build_request(self, messages, max_tokens):
+                return "http://incomplete", {}, {}
+
+        with self.assertRaises(TypeError):
+            Incomplete("key")
+
+
+if __name__ == "__main__":
+    unittest.main()
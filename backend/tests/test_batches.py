@@ -0,0 +1,33 @@
+import asyncio
+import unittest
+
+from app.batches import CloneBatch
+
+
+class ForgetTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.batch = CloneBatch('b1', ['https://a.example.com', 'https://b.example.com', 'https://a.example.com/'], 2)
+        self.a, self.b = (job['clone_id'] for job in self.batch.jobs)
+
+    def test_removes_items_and_jobs_of_the_clone(self):
+        self.batch.forget(self.a)
+
+        self.assertEqual([job['clone_id'] for job in self.batch.jobs], [self.b])
+        # The duplicate item pointed at the same clone
+        self.assertEqual([item['clone_id'] for item in self.batch.items], [self.b])
+
+    async def test_followers_skip_records_of_forgotten_clones(self):
+        await self.batch.record({'clone_id': self.a, 'status': 'completed'})
+        self.batch.forget(self.a)
+        follower = asyncio.create_task(self.collect())
+        await self.batch.record({'clone_id': self.b, 'status': 'completed'})
+        await self.batch.finish()
+
+        self.assertEqual([record['clone_id'] for record in await follower], [self.b])
+
+    async def collect(self):
+        return [record async for record in self.batch.follow()]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+from typing import Dict, List
+
+from app.clone_history import CloneHistory, diff_sections, section_key
+
+
+def keys(sections: List[Dict[str, str]]) -> List[str]:
+    used: Dict[str, int] = {}
+    return [
+        section_key(s['tag'], s.get('id', ''), s.get('heading', ''), s.get('class', ''), used)
+        for s in sections
+    ]
+
+
+class SectionKeyTest(unittest.TestCase):
+    def test_prefers_id_then_heading_then_class(self):
+        self.assertEqual(
+            keys([
+                {'tag': 'section', 'id': 'Pricing', 'heading': 'Plans'},
+                {'tag': 'section', 'heading': 'What our customers say!'},
+                {'tag': 'footer', 'class': 'site-footer dark'},
+                {'tag': 'nav'},
+            ]),
+            ['section-pricing', 'section-what-our-customers-say', 'footer-site-footer', 'nav-1'],
+        )
+
+    def test_inserting_a_section_keeps_the_other_keys(self):
+        page = [
+            {'tag': 'header', 'class': 'top'},
+            {'tag': 'section', 'heading': 'Features'},
+            {'tag': 'section', 'heading': 'Pricing'},
+            {'tag': 'footer'},
+        ]
+        edited = page[:1] + [{'tag': 'section', 'heading': 'Announcement'}] + page[1:]
+
+        before, after = keys(page), keys(edited)
+
+        self.assertEqual([k for k in after if k != 'section-announcement'], before)
+
+    def test_position_breaks_ties(self):
+        self.assertEqual(
+            keys([
+                {'tag': 'section', 'class': 'card'},
+                {'tag': 'section', 'class': 'card'},
+                {'tag': 'section'},
+                {'tag': 'section'},
+            ]),
+            ['section-card', 'section-card-2', 'section-1', 'section-2'],
+        )
+
+
+class DiffSectionsTest(unittest.TestCase):
+    def test_classifies_sections(self):
+        previous = [
+            {'key': 'header-top', 'hash': 'a'},
+            {'key': 'section-features', 'hash': 'b'},
+            {'key': 'section-old', 'hash': 'c'},
+            {'key': 'footer-1', 'hash': None},
+        ]
+        current = {'header-top': 'a', 'section-features': 'B', 'section-new': 'd', 'footer-1': 'e'}
+
+        self.assertEqual(diff_sections(previous, current), {
+            'unchanged': ['header-top'],
+            'changed': ['section-features', 'footer-1'],
+            'added': ['section-new'],
+            'removed': ['section-old'],
+        })
+
+
+class CloneHistoryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_round_trip_keyed_by_url(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = CloneHistory(directory)
+            state = {'skeleton': ':root {}', 'styles_hash': 'x', 'sections': [{'key': 'nav-1', 'hash': 'h', 'content': '<nav></nav>'}]}
+
+            await history.save('https://example.com/', state)
+            loaded = await history.load('https://example.com')
+
+            self.assertEqual(loaded['sections'], state['sections'])
+            self.assertEqual(loaded['url'], 'https://example.com/')
+            self.assertIsNone(await history.load('https://example.org'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from typing import List, Optional
+
+from app.clone_index import CloneIndex, decode_cursor, encode_cursor
+
+STATUSES = ['pending', 'processing', 'completed', 'error']
+HOSTS = ['https://a.example.com', 'https://b.example.com', 'https://shop.example.org']
+
+
+def created(i: int) -> str:
+    return f"2026-01-{1 + i // 24:02d}T{i % 24:02d}:00:00"
+
+
+class PaginationTest(unittest.TestCase):
+    def setUp(self):
+        self.jobs = {}
+        self.index = CloneIndex(max_scan=7)
+        for i in range(60):
+            clone_id = f"id-{i:03d}"
+            # Pairs of jobs share a timestamp so the id tie-breaker is exercised
+            job = (created(i // 2), f"{HOSTS[i % 3]}/page/{i % 5}", STATUSES[i % 4])
+            self.jobs[clone_id] = job
+            self.index.add(clone_id, job[1], job[0], job[2])
+
+    def expected(self, status=None, url_prefix=None, created_after=None, created_before=None) -> List[str]:
+        matching = [
+            (created_at, clone_id) for clone_id, (created_at, url, job_status) in self.jobs.items()
+            if (not status or job_status == status)
+            and (not url_prefix or url.startswith(url_prefix))
+            and (not created_after or created_at >= created_after)
+            and (not created_before or created_at < created_before)
+        ]
+        return [clone_id for _, clone_id in sorted(matching, reverse=True)]
+
+    def walk(self, limit: int, **filters) -> List[str]:
+        ids: List[str] = []
+        cursor: Optional[str] = None
+        for _ in range(1000):
+            page, cursor = self.index.page(limit, cursor=cursor, **filters)
+            self.assertLessEqual(len(page), limit)
+            ids.extend(page)
+            if cursor is None:
+                return ids
+        self.fail("pagination did not terminate")
+
+    def test_walks_every_filter_combination(self):
+        cases = [
+            {},
+            {'status': 'completed'},
+            {'status': 'unknown'},
+            {'url_prefix': 'https://b.example.com'},
+            {'url_prefix': 'https://'},
+            {'url_prefix': 'https://a.example.com/page/3', 'status': 'error'},
+            {'created_after': created(5), 'created_before': created(20)},
+            {'status': 'pending', 'created_after': created(10)},
+            {'url_prefix': 'https://shop', 'created_before': created(12)},
+        ]
+        for filters in cases:
+            for limit in (1, 4, 50):
+                with self.subTest(limit=limit, **filters):
+                    self.assertEqual(self.walk(limit, **filters), self.expected(**filters))
+
+    def test_pages_are_bounded_by_max_scan(self):
+        page, cursor = self.index.page(50, url_prefix='https://', status='error')
+
+        # The broad prefix can't use the URL index, so the scan stops after max_scan entries
+        self.assertLessEqual(len(page), 7)
+        self.assertIsNotNone(cursor)
+
+    def test_status_changes_and_removals_are_reflected(self):
+        self.index.set_status('id-000', 'completed')
+        self.jobs['id-000'] = self.jobs['id-000'][:2] + ('completed',)
+        self.index.remove('id-059')
+        del self.jobs['id-059']
+
+        self.assertEqual(self.walk(5, status='completed'), self.expected(status='completed'))
+        self.assertEqual(self.walk(5, status='pending'), self.expected(status='pending'))
+        self.assertEqual(self.walk(5), self.expected())
+        self.assertEqual(len(self.index), 59)
+
+
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        key = ('2026-01-01T00:00:00', 'abc|def')
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+
+    def test_malformed(self):
+        for cursor in ['not base64!', encode_cursor(('', 'x')), 'bm9zZXBhcmF0b3I=']:
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
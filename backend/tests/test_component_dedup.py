@@ -0,0 +1,74 @@
+import unittest
+
+from bs4 import BeautifulSoup
+
+from app.component_dedup import REPEAT_ATTRIBUTE, RepeatedComponentDetector, expand_repeated_components
+
+PLANS = [
+    ('Free', 'Free', '/signup?plan=free'),
+    ('Pro', '$10', '/signup?plan=pro'),
+    ('Team', '$30', '/signup?plan=team'),
+    ('Enterprise', 'Contact us', '/contact'),
+]
+
+
+def card(name: str, price: str, href: str) -> str:
+    return f'<div class="plan"><h3>{name}</h3><p class="price">{price}</p><a href="{href}">Choose {name}</a></div>'
+
+
+def plans(html: str):
+    soup = BeautifulSoup(html, 'html.parser')
+    return [
+        (el.h3.get_text(), el.p.get_text(), el.a['href'], el.a.get_text())
+        for el in soup.find_all('div', class_='plan')
+    ]
+
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.original = '<html><body><h1>Pricing</h1><section>' + ''.join(card(*plan) for plan in PLANS) + '</section></body></html>'
+        self.soup = BeautifulSoup(self.original, 'html.parser')
+        self.groups = RepeatedComponentDetector().collapse(self.soup)
+
+    def test_collapse_keeps_one_marked_exemplar(self):
+        self.assertEqual(len(self.groups), 1)
+        group = self.groups[0]
+        self.assertEqual(group['count'], len(PLANS))
+        self.assertEqual(len(group['rows']), len(PLANS))
+        self.assertEqual(len(self.soup.find_all('div', class_='plan')), 1)
+        self.assertEqual(self.soup.find('div', class_='plan')[REPEAT_ATTRIBUTE], group['id'])
+
+    def test_expand_restores_every_instance_when_exemplar_values_repeat(self):
+        # Row 1 has the same text ("Free") in two fields; each must get its own value back
+        html, stats = expand_repeated_components(str(self.soup), self.groups)
+
+        self.assertEqual(plans(html), plans(self.original))
+        self.assertEqual(stats['expanded_instances'], len(PLANS) - 1)
+        self.assertNotIn(REPEAT_ATTRIBUTE, html)
+
+    def test_expand_follows_generated_markup(self):
+        # The model restyles the exemplar and adds text of its own; fields still land in the right places
+        generated = (
+            f'<main><section class="grid"><article class="plan" {REPEAT_ATTRIBUTE}="{self.groups[0]["id"]}">'
+            '<span class="badge">Plan</span><h3>Free</h3><p>Free</p>'
+            '<a class="btn" href="/signup?plan=free">Choose Free</a></article></section></main>'
+        )
+
+        html, _ = expand_repeated_components(generated, self.groups)
+
+        soup = BeautifulSoup(html, 'html.parser')
+        cards = soup.find_all('article')
+        self.assertEqual([c.h3.get_text() for c in cards], [p[0] for p in PLANS])
+        self.assertEqual([c.p.get_text() for c in cards], [p[1] for p in PLANS])
+        self.assertEqual([c.a['href'] for c in cards], [p[2] for p in PLANS])
+        self.assertEqual({c.find(class_='badge').get_text() for c in cards}, {'Plan'})
+
+    def test_missing_exemplar_is_reported(self):
+        html, stats = expand_repeated_components('<main><p>nothing here</p></main>', self.groups)
+
+        self.assertEqual(stats['missing'], [self.groups[0]['id']])
+        self.assertEqual(stats['expanded_instances'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.generation_cache import GenerationCache
+
+
+def entry(text: str, tokens: int = 0):
+    return {'content': text, 'finish_reason': 'stop', 'usage': {'prompt_tokens': tokens, 'completion_tokens': tokens}}
+
+
+def size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+
+class MemoryTierTest(unittest.IsolatedAsyncioTestCase):
+    async def test_entries_expire_after_ttl(self):
+        cache = GenerationCache(ttl=60)
+        with mock.patch('app.generation_cache.time.time', return_value=1000.0):
+            await cache.set('k', entry('a'))
+        with mock.patch('app.generation_cache.time.time', return_value=1059.0):
+            self.assertEqual(await cache.get('k'), entry('a'))
+        with mock.patch('app.generation_cache.time.time', return_value=1061.0):
+            self.assertIsNone(await cache.get('k'))
+
+        self.assertEqual(cache.stats()['memory_entries'], 0)
+        self.assertEqual(cache.stats()['memory_bytes'], 0)
+
+    async def test_evicts_least_recently_used_by_bytes(self):
+        one = size(entry('a' * 100))
+        cache = GenerationCache(max_memory_bytes=one * 3)
+        for key in 'abc':
+            await cache.set(key, entry(key * 100))
+        await cache.get('a')
+        await cache.set('d', entry('d' * 100))
+
+        self.assertIsNone(await cache.get('b'))
+        for key in 'acd':
+            self.assertIsNotNone(await cache.get(key))
+        self.assertEqual(cache.stats()['memory_bytes'], one * 3)
+
+    async def test_entry_larger_than_memory_bound_is_not_kept(self):
+        cache = GenerationCache(max_memory_bytes=50)
+        await cache.set('k', entry('x' * 100))
+
+        self.assertIsNone(await cache.get('k'))
+
+    async def test_hits_count_saved_tokens(self):
+        cache = GenerationCache()
+        await cache.set('k', entry('a', tokens=100))
+        await cache.get('k')
+        await cache.get('missing')
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['tokens_saved']), (1, 1, 200))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+
+class DiskTierTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def test_survives_a_restart(self):
+        await GenerationCache(self.tmp.name).set('abcd', entry('kept'))
+
+        restarted = GenerationCache(self.tmp.name)
+        self.assertEqual(await restarted.get('abcd'), entry('kept'))
+        self.assertEqual(restarted.disk_hits, 1)
+        # Promoted to memory on the way out
+        await restarted.get('abcd')
+        self.assertEqual(restarted.memory_hits, 1)
+
+    async def test_expired_disk_entry_is_removed(self):
+        with mock.patch('app.generation_cache.time.time', return_value=1000.0):
+            await GenerationCache(self.tmp.name, ttl=60).set('abcd', entry('old'))
+        with mock.patch('app.generation_cache.time.time', return_value=2000.0):
+            self.assertIsNone(await GenerationCache(self.tmp.name, ttl=60).get('abcd'))
+
+        self.assertEqual(list(self.directory.glob('*/*.json')), [])
+
+    async def test_evicts_oldest_files_over_the_size_bound(self):
+        cache = GenerationCache(self.tmp.name, max_disk_bytes=2000)
+        for i in range(10):
+            key = f"{i:02d}" + 'f' * 62
+            await cache.set(key, entry('x' * 300))
+            path = cache._path(key)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        files = list(self.directory.glob('*/*.json'))
+        self.assertLessEqual(sum(p.stat().st_size for p in files), 2000)
+        self.assertEqual(cache.stats()['disk_bytes'], sum(p.stat().st_size for p in files))
+        self.assertIn(cache._path('09' + 'f' * 62), files)
+        self.assertNotIn(cache._path('00' + 'f' * 62), files)
+
+    async def test_concurrent_sets_of_one_key(self):
+        cache = GenerationCache(self.tmp.name)
+        await asyncio.gather(*[cache.set('abcd', entry(str(i) * 50)) for i in range(20)])
+
+        files = list(self.directory.rglob('*'))
+        self.assertEqual([p.name for p in files if p.is_file()], ['abcd.json'])
+        self.assertEqual(cache.stats()['disk_bytes'], cache._path('abcd').stat().st_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from app.http_cache import choose_encoding, etag_matches, parse_range
+
+
+class ParseRangeTest(unittest.TestCase):
+    def test_closed_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=10-10', 1000), (10, 10))
+
+    def test_end_past_size_is_clamped(self):
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+
+    def test_open_ended(self):
+        self.assertEqual(parse_range('bytes=500-', 1000), (500, 999))
+        self.assertEqual(parse_range('bytes=999-', 1000), (999, 999))
+
+    def test_suffix(self):
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_unsatisfiable(self):
+        for header, size in [('bytes=1000-', 1000), ('bytes=2000-3000', 1000), ('bytes=-0', 1000), ('bytes=-10', 0)]:
+            with self.subTest(header=header, size=size), self.assertRaises(ValueError):
+                parse_range(header, size)
+
+    def test_ignored_headers_serve_full_body(self):
+        for header in [None, '', 'items=0-1', 'bytes=-', 'bytes=a-b', 'bytes=0-1,5-9', 'bytes=50-10']:
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+
+class EtagMatchesTest(unittest.TestCase):
+    def test_matches(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches('*', '"abc"'))
+        self.assertFalse(etag_matches('"abd"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+
+class ChooseEncodingTest(unittest.TestCase):
+    def test_prefers_brotli_at_equal_quality(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br', ['gzip', 'br']), 'br')
+
+    def test_respects_quality_and_availability(self):
+        self.assertEqual(choose_encoding('br;q=0.5, gzip', ['gzip', 'br']), 'gzip')
+        self.assertEqual(choose_encoding('br', ['gzip']), None)
+        self.assertEqual(choose_encoding('gzip;q=0', ['gzip']), None)
+        self.assertEqual(choose_encoding('*', ['gzip']), 'gzip')
+
+
+if __name__ == '__main__':
+    unittest.main()
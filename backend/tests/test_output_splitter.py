@@ -0,0 +1,84 @@
+import unittest
+
+from app.output_splitter import OutputSplitter
+
+DOCUMENT = """```html
+<!DOCTYPE html>
+<html>
+<head>
+<STYLE type="text/css">
+body { color: red; }
+</STYLE>
+<script src="https://cdn.example.com/lib.js"></script>
+<script type="application/ld+json">{"@type": "Organization"}</script>
+</head>
+<body>
+<!-- <style>not css</style> -->
+<p>Inline `code` and a ``` that is not a fence</p>
+<style>.card { padding: 1rem; }</style>
+<script>
+document.querySelectorAll('.card').forEach(c => c.classList.add('ready'));
+</script>
+<script type="module">import './app.js';</script>
+</body>
+</html>
+```"""
+
+
+def split_in_chunks(content: str, size: int):
+    splitter = OutputSplitter()
+    for start in range(0, len(content), size):
+        splitter.feed(content[start:start + size])
+    return splitter.close()
+
+
+class SplitTest(unittest.TestCase):
+    def setUp(self):
+        self.result = OutputSplitter.split(DOCUMENT)
+
+    def test_style_blocks_go_to_css(self):
+        self.assertEqual(self.result['css'], "body { color: red; }\n\n.card { padding: 1rem; }")
+        self.assertNotIn('padding: 1rem', self.result['html'])
+        self.assertNotIn('<STYLE', self.result['html'])
+
+    def test_inline_scripts_go_to_javascript(self):
+        self.assertEqual(
+            self.result['javascript'],
+            "document.querySelectorAll('.card').forEach(c => c.classList.add('ready'));\n\nimport './app.js';"
+        )
+
+    def test_external_and_data_scripts_stay_in_html(self):
+        html = self.result['html']
+        self.assertIn('<script src="https://cdn.example.com/lib.js"></script>', html)
+        self.assertIn('<script type="application/ld+json">{"@type": "Organization"}</script>', html)
+
+    def test_comments_and_fences(self):
+        html = self.result['html']
+        self.assertTrue(html.startswith('<!DOCTYPE html>'))
+        self.assertTrue(html.endswith('</html>'))
+        self.assertIn('<!-- <style>not css</style> -->', html)
+        self.assertIn('a ``` that is not a fence', html)
+
+    def test_unterminated_blocks_are_flushed(self):
+        result = OutputSplitter.split("<p>a</p><style>.x { color: blue; }")
+
+        self.assertEqual(result, {'html': '<p>a</p>', 'css': '.x { color: blue; }', 'javascript': ''})
+
+
+class ChunkedFeedTest(unittest.TestCase):
+    def test_every_chunk_size_matches_whole_document(self):
+        whole = OutputSplitter.split(DOCUMENT)
+        for size in list(range(1, 40)) + [64, 127, 512]:
+            with self.subTest(size=size):
+                self.assertEqual(split_in_chunks(DOCUMENT, size), whole)
+
+    def test_closing_tag_split_across_chunks(self):
+        splitter = OutputSplitter()
+        for chunk in ['<script>let a = 1;</scr', 'ipt', '><p>after</p>']:
+            splitter.feed(chunk)
+
+        self.assertEqual(splitter.close(), {'html': '<p>after</p>', 'css': '', 'javascript': 'let a = 1;'})
+
+
+if __name__ == '__main__':
+    unittest.main()
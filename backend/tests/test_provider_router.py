@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+
+from app.provider_router import ProviderRouter
+
+
+class FakeCloner:
+    """Answers after a fixed delay"""
+
+    def __init__(self, provider: str, delay: float):
+        self.provider = provider
+        self.delay = delay
+
+    async def clone_website(self, scraping_data, mode="single", previous=None, deadline=None):
+        await asyncio.sleep(self.delay)
+        return {'html': self.provider, 'metadata': {}}
+
+
+class HedgeLatencyTest(unittest.IsolatedAsyncioTestCase):
+    def router(self, primary_delay: float, backup_delay: float) -> ProviderRouter:
+        router = ProviderRouter([FakeCloner("a", primary_delay), FakeCloner("b", backup_delay)], hedge=True)
+        # "a" ranks first and hedges after 0.05s; "b" has a slower history
+        router.stats["a"].latencies.extend([0.05] * 5)
+        router.stats["b"].latencies.extend([0.5] * 5)
+        return router
+
+    async def test_hedge_loser_is_recorded_no_faster_than_its_percentile(self):
+        router = self.router(primary_delay=0.1, backup_delay=1.0)
+
+        result = await router.clone_website({})
+
+        self.assertEqual(result['metadata']['router']['provider'], "a")
+        # "b" was cancelled after ~0.05s but is recorded at its percentile, not the cut-short time
+        self.assertEqual(list(router.stats["b"].latencies), [0.5] * 6)
+
+    async def test_cancelled_job_records_nothing(self):
+        router = self.router(primary_delay=1.0, backup_delay=1.0)
+
+        job = asyncio.create_task(router.clone_website({}))
+        await asyncio.sleep(0.1)
+        job.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await job
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(router.stats["a"].latencies), 5)
+        self.assertEqual(len(router.stats["b"].latencies), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
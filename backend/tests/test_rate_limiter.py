@@ -0,0 +1,110 @@
+import time
+import unittest
+
+import httpx
+
+from app.deadline import Deadline, DeadlineExceeded
+from app.mock_llm import MockLLMProvider
+from app.rate_limiter import ProviderScheduler
+
+MESSAGES = [{"role": "user", "content": "Clone this page"}]
+
+
+class ProviderSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    """ProviderScheduler against the mock provider, served in-process"""
+
+    def scheduler(self, provider: MockLLMProvider, **options) -> ProviderScheduler:
+        self.provider = provider
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=provider.app), base_url="http://mock")
+        self.addAsyncCleanup(self.client.aclose)
+        # A generous latency tolerance keeps timing jitter from shrinking the limit
+        return ProviderScheduler("mock", **{'requests_per_minute': 6000, 'latency_tolerance': 100.0, 'base_backoff': 0.01, **options})
+
+    async def send(self) -> httpx.Response:
+        return await self.client.post("/v1/chat/completions", json={"messages": MESSAGES, "max_tokens": 50})
+
+    @staticmethod
+    def used_tokens(response: httpx.Response) -> int:
+        usage = response.json()['usage']
+        return usage['prompt_tokens'] + usage['completion_tokens']
+
+    async def test_retries_throttled_request_after_retry_after(self):
+        scheduler = self.scheduler(MockLLMProvider(latency=0.01, completion_tokens=50, rate_limit_every=2, retry_after=0.2))
+
+        self.assertEqual((await scheduler.run(self.send)).status_code, 200)
+        started = time.monotonic()
+        response = await scheduler.run(self.send)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual((scheduler.throttled, scheduler.retries), (1, 1))
+        self.assertEqual((self.provider.requests, self.provider.throttled), (3, 1))
+
+    async def test_halves_limit_on_throttling_and_recovers_additively(self):
+        scheduler = self.scheduler(
+            MockLLMProvider(latency=0.01, completion_tokens=50, rate_limit_every=2, retry_after=0.01), max_concurrency=4
+        )
+
+        await scheduler.run(self.send)
+        self.assertEqual(scheduler.limit, 4)
+        await scheduler.run(self.send)
+        # The 429 halved the limit and the retry's success added 1/limit back
+        self.assertAlmostEqual(scheduler.limit, 2.5)
+
+        self.provider.rate_limit_every = 0
+        limits = []
+        for _ in range(6):
+            await scheduler.run(self.send)
+            limits.append(scheduler.limit)
+        self.assertEqual(limits, sorted(limits))
+        self.assertEqual(limits[-1], 4)
+
+    async def test_throttled_retries_charge_the_token_estimate_once(self):
+        scheduler = self.scheduler(
+            MockLLMProvider(latency=0.01, completion_tokens=50, rate_limit_every=2, retry_after=0.05), tokens_per_minute=600
+        )
+
+        response = await scheduler.run(self.send, estimated_tokens=300)
+        scheduler.record_usage(300, self.used_tokens(response))
+        after_first = scheduler.tokens.tokens
+        # Throttled once, then succeeds: one charge of 300, settled down to real usage
+        response = await scheduler.run(self.send, estimated_tokens=300)
+        scheduler.record_usage(300, self.used_tokens(response))
+
+        self.assertEqual(scheduler.retries, 1)
+        self.assertAlmostEqual(scheduler.tokens.tokens, after_first - self.used_tokens(response), delta=5)
+
+    async def test_failed_request_gives_its_token_estimate_back(self):
+        scheduler = self.scheduler(
+            MockLLMProvider(latency=0.01, rate_limit_every=1, retry_after=0.01), tokens_per_minute=600, max_retries=2
+        )
+
+        response = await scheduler.run(self.send, estimated_tokens=300)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.provider.requests, 3)
+        self.assertAlmostEqual(scheduler.tokens.tokens, 600, delta=1)
+
+    async def test_gives_up_instead_of_retrying_past_the_deadline(self):
+        scheduler = self.scheduler(MockLLMProvider(latency=0.01, rate_limit_every=1, retry_after=5), tokens_per_minute=600)
+
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            await scheduler.run(self.send, estimated_tokens=300, deadline=Deadline.after(1))
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(self.provider.requests, 1)
+        self.assertAlmostEqual(scheduler.tokens.tokens, 600, delta=1)
+
+    async def test_gives_up_instead_of_waiting_for_a_drained_bucket_past_the_deadline(self):
+        scheduler = self.scheduler(MockLLMProvider(latency=0.01), tokens_per_minute=600)
+
+        await scheduler.run(self.send, estimated_tokens=600)
+        with self.assertRaises(DeadlineExceeded):
+            await scheduler.run(self.send, estimated_tokens=300, deadline=Deadline.after(1))
+
+        self.assertEqual(self.provider.requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from typing import Any, Dict, List
+
+from app.tracing import SpanExporter, Tracer
+
+
+class MemoryExporter(SpanExporter):
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class ExporterTest(unittest.TestCase):
+    def test_exporter_without_export_fails_at_instantiation(self):
+        class Incomplete(SpanExporter):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_finished_spans_reach_the_exporter(self):
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter, flush_interval=60)
+        with tracer.start_span("parent"):
+            with tracer.start_span("child", {"attempt": 1}):
+                pass
+        tracer.shutdown()
+
+        child, parent = exporter.spans
+        self.assertEqual((parent['name'], child['name']), ("parent", "child"))
+        self.assertEqual(child['trace_id'], parent['trace_id'])
+        self.assertEqual(child['parent_span_id'], parent['span_id'])
+        self.assertEqual(child['attributes'], {"attempt": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()